@@ -0,0 +1,124 @@
+"""Measures all-interface aggregation on a synthetic /proc/net/dev with many interfaces.
+
+Compares one read_all() plus InterfaceTable's deltas against reading every interface on
+its own and computing the deltas one by one, as a per-interface loop would. The table's
+own cost is then timed for its pure-Python and, when NumPy is installed, its vectorized
+path at a range of interface counts, checking both give the same totals and ranking;
+the crossover is what VECTORIZE_MIN_INTERFACES is based on.
+
+Usage: python benchmarks/bench_aggregate.py [--interfaces 500] [--samples 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from widgets.aggregate import VECTORIZE_MIN_INTERFACES, InterfaceTable, load_numpy, to_counter_array
+from widgets.counter_sources import ProcNetDevCounterSource
+
+HEADER = (
+    "Inter-|   Receive                                                |  Transmit\n"
+    " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n"
+)
+
+
+def write_proc_net_dev(path, count, step):
+    rows = [f"{'lo' if i == 0 else f'veth{i}':>6s}: {10 ** 9 + i * 1000 + step * (i + 1)} 100 0 0 0 0 0 0 "
+            f"{10 ** 8 + i * 500 + step * i} 50 0 0 0 0 0 0\n" for i in range(count)]
+    with open(path, "w") as f:
+        f.write(HEADER + "".join(rows))
+
+
+def table_costs(count, samples):
+    """Returns {path: (update + totals us, top us)} for `count` interfaces, checking the paths agree."""
+    names = tuple(["lo"] + [f"veth{i}" for i in range(1, count)])
+    ticks = [(to_counter_array(10 ** 9 + i * 1000 + tick * 4096 * (i + 1) for i in range(count)),
+              to_counter_array(10 ** 8 + i * 500 + tick * 1024 * i for i in range(count))) for tick in range(8)]
+    paths = {"python": False}
+    if load_numpy() is not None:
+        paths["numpy"] = True
+    costs, answers = {}, {}
+    for path, vectorize in paths.items():
+        table = InterfaceTable(vectorize=vectorize)
+        table.update(0.0, names, *ticks[0])
+        assert table.vectorized == vectorize
+        timestamps = iter(range(1, 10 ** 9))
+
+        def tick():
+            number = next(timestamps)
+            table.update(float(number), names, *ticks[number % 8])
+            return table.totals()
+
+        update = min(timeit.repeat(tick, number=samples, repeat=5)) / samples * 1e6
+        top = min(timeit.repeat(table.top, number=samples, repeat=5)) / samples * 1e6
+        costs[path] = (update, top)
+        answers[path] = (tick(), [name for name, _, _ in table.top()])
+    if "numpy" in answers:
+        (python_totals, python_top), (numpy_totals, numpy_top) = answers["python"], answers["numpy"]
+        assert all(abs(a - b) <= 1e-6 * max(a, 1.0) for a, b in zip(python_totals, numpy_totals)), answers
+        assert python_top == numpy_top, answers
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interfaces", type=int, default=500)
+    parser.add_argument("--samples", type=int, default=2000)
+    args = parser.parse_args()
+    count, samples = args.interfaces, args.samples
+    print(f"interfaces={count} samples={samples}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "dev")
+        write_proc_net_dev(path, count, 0)
+        source = ProcNetDevCounterSource(path)
+        names = source.read_all()[0]
+        try:
+            best = min(timeit.repeat(source.read_all, number=samples, repeat=5))
+            print(f"read_all                   {best / samples * 1e6:10.1f} us/sample")
+
+            table = InterfaceTable()
+            table.update(0.0, *source.read_all())
+            write_proc_net_dev(path, count, 4096)
+            timestamps = iter(range(1, 10 ** 9))
+
+            def aggregate_tick():
+                table.update(float(next(timestamps)), *source.read_all())
+                table.totals()
+
+            best = min(timeit.repeat(aggregate_tick, number=samples, repeat=5))
+            print(f"read_all + update + totals {best / samples * 1e6:10.1f} us/sample")
+            best = min(timeit.repeat(table.top, number=samples, repeat=5))
+            print(f"top(5)                     {best / samples * 1e6:10.1f} us/call")
+
+            previous = {name: source.read(name) for name in names}
+
+            def per_interface_tick():
+                download = upload = 0
+                for name in names:
+                    recv, sent = source.read(name)
+                    old_recv, old_sent = previous[name]
+                    download += recv - old_recv
+                    upload += sent - old_sent
+                    previous[name] = recv, sent
+                return download, upload
+
+            loop_samples = max(samples // 100, 5)
+            best = min(timeit.repeat(per_interface_tick, number=loop_samples, repeat=3))
+            print(f"per-interface read loop    {best / loop_samples * 1e6:10.1f} us/sample")
+        finally:
+            source.close()
+
+    print(f"InterfaceTable alone (update + totals / top(5), us); vectorized from {VECTORIZE_MIN_INTERFACES} "
+          f"interfaces{'' if load_numpy() is not None else ', NumPy not installed'}")
+    for interfaces in sorted({4, 16, 32, 64, 128, 256, count}):
+        costs = table_costs(interfaces, samples)
+        print(f"  {interfaces:5d} interfaces  " + "  ".join(
+            f"{path} {update:7.1f} / {top:5.1f}" for path, (update, top) in costs.items()))
+
+
+if __name__ == "__main__":
+    main()
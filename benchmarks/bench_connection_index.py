@@ -0,0 +1,199 @@
+"""Times the socket owner index on a synthetic procfs tree and checks its attribution.
+
+The tree in a temporary directory has the layout the index reads: <pid>/comm,
+<pid>/fd/<n> symlinks to socket:[inode] or a regular file, and net/{tcp,tcp6,udp,udp6}
+listing the sockets, a few without any owner. A full build is timed against a refresh
+after a handful of processes opened, closed or swapped sockets, exited or appeared,
+and against a refresh with nothing changed. Every refresh is checked against the
+known owners. A swapped descriptor whose fd directory keeps its stat, as on procfs
+where the size is the descriptor count, must still be found by the fallback pass.
+When /proc has socket tables, the same is timed there.
+
+Usage: python benchmarks/bench_connection_index.py [--processes 2000] [--sockets-per-process 4]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from widgets.connection_index import SOCKET_TABLES, SocketOwnerIndex, is_supported, rank_processes, read_sockets
+
+HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+OWNERLESS = 40
+
+
+class SyntheticProc:
+    """A procfs-like tree whose true socket owners are known."""
+
+    def __init__(self, root, processes, sockets_per_process, seed=1):
+        self.root = root
+        self.rng = random.Random(seed)
+        self.next_inode = 100000
+        self.owners = {}  # inode -> pid
+        self.fds = {}  # pid -> {fd: inode or None}
+        self.sockets = {}  # inode -> (protocol, state, tx_queue, rx_queue)
+        for pid in range(1, processes + 1):
+            self.spawn(pid, sockets_per_process)
+        self.ownerless = [self.new_socket() for _ in range(OWNERLESS)]
+        self.write_tables()
+
+    def new_socket(self):
+        self.next_inode += 1
+        protocol = self.rng.choice(SOCKET_TABLES)
+        state = 0x0A if protocol.startswith("tcp") and self.rng.random() < 0.1 else 0x01
+        self.sockets[self.next_inode] = (protocol, state, self.rng.randrange(4096), self.rng.randrange(4096))
+        return self.next_inode
+
+    def spawn(self, pid, sockets):
+        os.makedirs(f"{self.root}/{pid}/fd")
+        with open(f"{self.root}/{pid}/comm", "w") as f:
+            f.write(f"proc{pid}\n")
+        self.fds[pid] = {}
+        for fd in range(3):
+            self.set_fd(pid, fd, None)
+        for _ in range(sockets):
+            self.open_socket(pid)
+
+    def set_fd(self, pid, fd, inode):
+        path = f"{self.root}/{pid}/fd/{fd}"
+        if fd in self.fds[pid]:
+            self.close_fd(pid, fd)
+        os.symlink(f"socket:[{inode}]" if inode else "/dev/null", path)
+        self.fds[pid][fd] = inode
+        if inode:
+            self.owners[inode] = pid
+
+    def open_socket(self, pid):
+        fd = max(self.fds[pid]) + 1
+        self.set_fd(pid, fd, self.new_socket())
+
+    def close_fd(self, pid, fd):
+        os.unlink(f"{self.root}/{pid}/fd/{fd}")
+        inode = self.fds[pid].pop(fd)
+        if inode:
+            del self.owners[inode]
+            del self.sockets[inode]
+
+    def exit(self, pid):
+        for inode in self.fds.pop(pid).values():
+            if inode:
+                del self.owners[inode]
+                del self.sockets[inode]
+        shutil.rmtree(f"{self.root}/{pid}")
+
+    def write_tables(self):
+        os.makedirs(f"{self.root}/net", exist_ok=True)
+        lines = {protocol: [HEADER] for protocol in SOCKET_TABLES}
+        for inode, (protocol, state, tx_queue, rx_queue) in self.sockets.items():
+            table = lines[protocol]
+            table.append(f"{len(table) - 1:4d}: 0100007F:1F90 0100007F:C350 {state:02X} "
+                         f"{tx_queue:08X}:{rx_queue:08X} 00:00000000 00000000  1000        0 {inode} 1 0\n")
+        # A TIME_WAIT socket has no inode and must be skipped.
+        lines["tcp"].append(f"{len(lines['tcp']) - 1:4d}: 0100007F:1F90 0100007F:C351 06 "
+                            "00000000:00000000 03:00000FA0 00000000     0        0 0 3 0\n")
+        for protocol, table in lines.items():
+            with open(f"{self.root}/net/{protocol}", "w") as f:
+                f.writelines(table)
+
+    def churn(self, count):
+        """Changes `count` processes; returns the pid whose swap kept its fd directory stat."""
+        pids = self.rng.sample(sorted(self.fds), count)
+        for pid in pids[:count // 4]:
+            self.open_socket(pid)
+        for pid in pids[count // 4:count // 2]:
+            fd = next((fd for fd, inode in self.fds[pid].items() if inode), None)
+            if fd is not None:
+                self.close_fd(pid, fd)
+        for pid in pids[count // 2:count * 3 // 4]:
+            self.exit(pid)
+        for pid in pids[count * 3 // 4:]:
+            # A new process behind a reused pid.
+            self.exit(pid)
+            self.spawn(pid, 2)
+        for pid in range(max(self.fds) + 1, max(self.fds) + 1 + count // 4):
+            self.spawn(pid, 3)
+        # Swaps one socket for another without changing the directory's stat, as a
+        # dup2 over an open descriptor does on procfs.
+        pid = self.rng.choice([pid for pid in sorted(self.fds) if pid not in pids and any(self.fds[pid].values())])
+        fd_dir = f"{self.root}/{pid}/fd"
+        before = os.stat(fd_dir)
+        fd = next(fd for fd, inode in self.fds[pid].items() if inode)
+        self.set_fd(pid, fd, self.new_socket())
+        os.utime(fd_dir, ns=(before.st_atime_ns, before.st_mtime_ns))
+        self.write_tables()
+        return pid
+
+
+def refreshed(index):
+    """Returns the seconds spent reading the tables and updating the index, the sockets and the ranking."""
+    started = time.perf_counter()
+    entries = read_sockets(index.root)
+    parsed = time.perf_counter()
+    index.refresh({entry.inode for entry in entries})
+    return parsed - started, time.perf_counter() - parsed, entries, rank_processes(entries, index, 10)
+
+
+def timings(tables, update, index):
+    return f"tables {tables * 1000:.1f} ms + index {update * 1000:.1f} ms, {index.scanned} fd tables read"
+
+
+def check(index, proc, entries):
+    assert len(entries) == len(proc.sockets), (len(entries), len(proc.sockets))
+    for entry in entries:
+        assert index.owners.get(entry.inode) == proc.owners.get(entry.inode), entry
+    for pid in proc.fds:
+        assert index.names[pid] == f"proc{pid}", pid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=2000)
+    parser.add_argument("--sockets-per-process", type=int, default=4)
+    args = parser.parse_args()
+    processes, per_process = args.processes, args.sockets_per_process
+    root = tempfile.mkdtemp(prefix="procfs-")
+    try:
+        proc = SyntheticProc(root, processes, per_process)
+        index = SocketOwnerIndex(root)
+        tables, full, entries, ranked = refreshed(index)
+        check(index, proc, entries)
+        print(f"{processes} processes, {len(entries)} sockets ({OWNERLESS} ownerless): "
+              f"full build {timings(tables, full, index)}")
+        assert [p.connections for p in ranked] == sorted((p.connections for p in ranked), reverse=True)
+        assert ranked[0].pid is None and ranked[0].connections == OWNERLESS
+
+        tables, steady, entries, _ = refreshed(index)
+        check(index, proc, entries)
+        print(f"nothing changed: {timings(tables, steady, index)}")
+        assert index.scanned == 0
+
+        churn = max(processes // 100, 8)
+        swapped = proc.churn(churn)
+        tables, incremental, entries, _ = refreshed(index)
+        check(index, proc, entries)
+        print(f"{churn} processes changed, one swap hidden from stat: {timings(tables, incremental, index)}")
+        assert index.owners[max(inode for inode in proc.fds[swapped].values() if inode)] == swapped
+
+        tables, steady, entries, _ = refreshed(index)
+        check(index, proc, entries)
+        print(f"after churn, nothing changed: {timings(tables, steady, index)}")
+        assert index.scanned == 0
+        print(f"an idle index update is {full / steady:.1f}x faster than a full build")
+    finally:
+        shutil.rmtree(root)
+
+    if is_supported():
+        index = SocketOwnerIndex()
+        tables, full, entries, _ = refreshed(index)
+        print(f"/proc: {len(entries)} sockets, full build {timings(tables, full, index)}")
+        tables, steady, _, _ = refreshed(index)
+        print(f"/proc: refresh {timings(tables, steady, index)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Compares context menu open latency: rebuilt on every right-click vs. built once and synced.
+
+Usage: python benchmarks/bench_context_menu.py [--interfaces 300] [--opens 200]
+"""
+import argparse
+import sys
+
+from bench_hot_paths import app, measure, stub_interfaces, QApplication
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interfaces", type=int, default=300)
+    parser.add_argument("--opens", type=int, default=200)
+    args = parser.parse_args()
+    interfaces, opens = args.interfaces, args.opens
+
+    qt_app = QApplication.instance() or QApplication(sys.argv)
+    stub_interfaces(interfaces)
+    widget = app.MainWidget(font_name="Vazirmatn FD")
+    qt_app.processEvents()
+    print(f"interfaces={interfaces}")
+
+    def rebuild_every_open():
+        # What every right-click used to cost: a fresh menu with all actions.
+        menu = widget._build_context_menu()
+        widget._sync_context_menu()
+        menu.deleteLater()
+
+    measure("before: rebuild per open", rebuild_every_open, max(opens // 10, 10), setup=qt_app.processEvents)
+    widget._context_menu = None
+    measure("after: cached open", widget._prepare_context_menu, opens)
+
+    flip = [0]
+
+    def change_interfaces():
+        flip[0] += 1
+        stub_interfaces(interfaces + flip[0] % 2)
+
+    measure("after: interfaces changed", widget._prepare_context_menu, max(opens // 10, 10), setup=change_interfaces)
+    widget.network.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Measures the per-sample cost of each network counter source.
+
+Usage: python benchmarks/bench_counter_sources.py [--interface NAME] [--samples 20000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+
+from widgets.counter_sources import PsutilCounterSource, ProcNetDevCounterSource
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interface", help="the first interface psutil lists by default")
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+    interface = args.interface or next(iter(psutil.net_if_stats()))
+    samples = args.samples
+    print(f"interface={interface} interfaces_on_host={len(psutil.net_if_stats())} samples={samples}")
+
+    sources = [("psutil", PsutilCounterSource)]
+    if os.path.exists("/proc/net/dev"):
+        sources.append(("procfs", ProcNetDevCounterSource))
+
+    for name, factory in sources:
+        source = factory()
+        try:
+            best = min(timeit.repeat(lambda: source.read(interface), number=samples, repeat=5))
+            print(f"{name:8s} {best / samples * 1e6:8.2f} us/sample")
+        finally:
+            source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Compares registering the full UI font from its file with registering the subset from memory.
+
+Each variant runs in a fresh process under Qt's offscreen platform. The process measures
+the registration call, the first layout of every string the app draws (which is when
+Qt actually parses the font), and the resident memory added by both. It also renders
+those strings to an image, so the two variants can be checked for identical output. The
+bundle size compares the full font with the subset main.spec packs instead.
+
+Usage: python benchmarks/bench_font_load.py [--runs 10]
+"""
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FULL_FONT = os.path.join(ROOT, "fonts", "Vazirmatn-FD-Regular.ttf")
+SUBSET_FONT = os.path.join(ROOT, "fonts", "Vazirmatn-FD-Subset.ttf")
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def app_strings():
+    """The strings the app draws: its literals and holiday titles, one per line."""
+    import ast
+    import glob
+    from subset_fonts import _strings
+    texts = []
+    for path in [os.path.join(ROOT, "main.py")] + sorted(glob.glob(os.path.join(ROOT, "widgets", "*.py"))):
+        with open(path, encoding="utf-8") as f:
+            for node in ast.walk(ast.parse(f.read())):
+                if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value.strip():
+                    texts.extend(line for line in node.value.splitlines() if line.strip())
+    with open(os.path.join(ROOT, "data", "holidays.json"), encoding="utf-8") as f:
+        texts.extend(_strings(json.load(f)))
+    texts.append("↓ 123.45 MB/s ↑ 0.98 KB/s 1404/01/13")
+    return texts
+
+
+def child(variant: str):
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt6.QtCore import QRectF
+    from PyQt6.QtGui import QColor, QFont, QFontDatabase, QGuiApplication, QImage, QPainter, QTextLayout
+
+    texts = app_strings()
+    app = QGuiApplication(sys.argv)
+    rss_before = rss_bytes()
+    started = time.perf_counter()
+    if variant == "full":
+        font_id = QFontDatabase.addApplicationFont(FULL_FONT)
+    else:
+        with open(SUBSET_FONT, "rb") as f:
+            font_id = QFontDatabase.addApplicationFontFromData(f.read())
+    registered = time.perf_counter()
+    font = QFont(QFontDatabase.applicationFontFamilies(font_id)[0], 10)
+    for text in texts:
+        layout = QTextLayout(text, font)
+        layout.beginLayout()
+        layout.createLine()
+        layout.endLayout()
+    laid_out = time.perf_counter()
+    rss_after = rss_bytes()
+
+    image = QImage(1200, 20 * len(texts), QImage.Format.Format_ARGB32)
+    image.fill(QColor(0, 0, 0))
+    painter = QPainter(image)
+    painter.setFont(font)
+    painter.setPen(QColor(255, 255, 255))
+    for i, text in enumerate(texts):
+        painter.drawText(QRectF(0, 20 * i, 1200, 20), text)
+    painter.end()
+    print(json.dumps({
+        "register_ms": (registered - started) * 1000,
+        "first_layout_ms": (laid_out - registered) * 1000,
+        "rss_kib": (rss_after - rss_before) / 1024,
+        "image": hashlib.sha256(image.constBits().asstring(image.sizeInBytes())).hexdigest(),
+    }))
+    del app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--child", choices=("full", "subset"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+    runs = args.runs
+    if not os.path.exists(SUBSET_FONT):
+        sys.exit(f"{SUBSET_FONT} not found; run python subset_fonts.py first.")
+    before = os.path.getsize(FULL_FONT)
+    after = os.path.getsize(SUBSET_FONT)
+    print(f"bundled font data: {before / 1024:.0f} KiB -> {after / 1024:.0f} KiB")
+
+    results = {"full": [], "subset": []}
+    for _ in range(runs):
+        for variant, measurements in results.items():
+            output = subprocess.run([sys.executable, __file__, "--child", variant],
+                                    capture_output=True, text=True, check=True).stdout
+            measurements.append(json.loads(output.splitlines()[-1]))
+    for variant, measurements in results.items():
+        print(f"{variant:7s} " + "  ".join(
+            f"{key} {statistics.median(m[key] for m in measurements):6.2f}"
+            for key in ("register_ms", "first_layout_ms", "rss_kib")))
+    images = {m["image"] for measurements in results.values() for m in measurements}
+    print("rendering identical" if len(images) == 1 else f"rendering differs ({len(images)} distinct images)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Measures GUI-thread time per NetworkWidget tick while the counter read stalls.
+
+The counter source sleeps on every read to mimic a slow procfs or a suspended NIC
+driver; since reads happen on the sampler thread, the GUI tick must stay short.
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_gui_tick.py [--stall-ms 300] [--ticks 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+from widgets.counter_sources import CounterSource
+from widgets.network_widget import NetworkWidget
+
+
+class StallingCounterSource(CounterSource):
+    def __init__(self, stall):
+        self.stall = stall
+        self.bytes = 0
+
+    def read(self, interface):
+        time.sleep(self.stall)
+        self.bytes += 123456
+        return self.bytes, self.bytes // 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stall-ms", type=int, default=300, help="how long every counter read blocks")
+    parser.add_argument("--ticks", type=int, default=2000)
+    args = parser.parse_args()
+    stall_ms, ticks = args.stall_ms, args.ticks
+
+    app = QApplication(sys.argv)
+    widget = NetworkWidget()
+    widget.show()
+    widget.timer.stop()
+    widget.hub.sampler.counter_source = StallingCounterSource(stall_ms / 1000)
+    widget.set_interface("bench0")
+    widget.set_update_interval(50)
+    widget.timer.stop()
+
+    durations = []
+    for _ in range(ticks):
+        widget.update_speed()
+        durations.append(widget.last_tick_ns)
+        app.processEvents()
+        time.sleep(0.001)
+
+    durations.sort()
+    print(f"stall={stall_ms}ms ticks={ticks}")
+    print(f"p50={durations[len(durations) // 2] / 1000:.1f}us "
+          f"p99={durations[int(len(durations) * 0.99)] / 1000:.1f}us "
+          f"max={widget.max_tick_ns / 1000:.1f}us")
+    widget.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Headless benchmark suite for the widget hot paths.
+
+Runs under Qt's offscreen platform with a stubbed counter source and a stubbed interface
+list, so results don't depend on the host's network. For every case it reports the
+per-call latency distribution plus the peak and retained memory allocated per call
+(tracemalloc).
+
+Usage: python benchmarks/bench_hot_paths.py [--calls N] [--interfaces N] [--json results.json]
+
+Save the JSON of two releases and compare them to catch regressions.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+CONFIG_HOME = tempfile.mkdtemp(prefix="bench-config-")
+os.environ["XDG_CONFIG_HOME"] = os.environ["APPDATA"] = CONFIG_HOME
+os.chdir(ROOT)
+
+from PyQt6.QtWidgets import QApplication
+
+import main as app
+from widgets import network_widget
+from widgets.counter_sources import CounterSource
+
+
+class StubCounterSource(CounterSource):
+    """Deterministic counters that grow by a varying amount on every read."""
+
+    def __init__(self):
+        self.reads = 0
+        self.bytes_recv = 0
+        self.bytes_sent = 0
+
+    def read(self, interface):
+        self.reads += 1
+        self.bytes_recv += 1000 + (self.reads * 7919) % 2_000_000
+        self.bytes_sent += 500 + (self.reads * 104729) % 200_000
+        return self.bytes_recv, self.bytes_sent
+
+
+def stub_interfaces(count):
+    """Replaces the interface list with `count` fake interfaces."""
+    fake = tuple(f"bench{i}" for i in range(count))
+    network_widget.list_interfaces = lambda: fake
+    for widget in QApplication.topLevelWidgets() if QApplication.instance() else ():
+        if isinstance(widget, app.MainWidget):
+            widget.network._interfaces = None
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def measure(name, func, calls, setup=None):
+    """Times `calls` invocations of func, then measures its allocations on a second pass."""
+    durations = []
+    for _ in range(calls):
+        if setup:
+            setup()
+        start = time.perf_counter_ns()
+        func()
+        durations.append(time.perf_counter_ns() - start)
+    durations.sort()
+
+    alloc_calls = max(calls // 10, 1)
+    peak = 0
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(alloc_calls):
+        if setup:
+            setup()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    allocated = sum(stat.size_diff for stat in stats if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+
+    result = {
+        "name": name,
+        "calls": calls,
+        "p50_us": percentile(durations, 0.50) / 1000,
+        "p90_us": percentile(durations, 0.90) / 1000,
+        "p99_us": percentile(durations, 0.99) / 1000,
+        "max_us": durations[-1] / 1000,
+        "peak_bytes_per_call": peak,
+        "retained_bytes_per_call": allocated / alloc_calls,
+        "retained_blocks_per_call": blocks / alloc_calls,
+    }
+    print(f"{name:28s} p50 {result['p50_us']:9.1f}  p90 {result['p90_us']:9.1f}  "
+          f"p99 {result['p99_us']:9.1f}  max {result['max_us']:9.1f} us  "
+          f"peak {peak:8d} B  retained {result['retained_bytes_per_call']:8.0f} B/call")
+    return result
+
+
+def run(calls, interfaces):
+    qt_app = QApplication.instance() or QApplication(sys.argv)
+    stub_interfaces(interfaces)
+    widget = app.MainWidget(font_name="Vazirmatn FD")
+    network = widget.network
+    network.hub.sampler.counter_source = StubCounterSource()
+    network.set_interface("bench0")
+    qt_app.processEvents()
+
+    def take_sample():
+        network.hub.sample_once()
+
+    def build_menu():
+        widget._build_context_menu().deleteLater()
+        widget._sync_context_menu()
+
+    font_sizes = iter(range(10 ** 9))
+
+    def restyle():
+        widget.apply_global_font_size(9 + next(font_sizes) % 8)
+
+    positions = iter(range(10 ** 9))
+
+    def save_and_flush():
+        # Move the widget so every save has a change to write.
+        widget.move(next(positions) % 500, 100)
+        widget.save_config()
+        widget.config_store.flush()
+
+    def load():
+        widget.load_config()
+
+    from widgets.month_view import MonthView
+    month_view = MonthView({"01/01": {"title": "Nowruz", "holiday": True}})
+    flips = iter(range(10 ** 9))
+
+    def flip_month():
+        # Back and forth across the current month, so today's cell changes state every flip.
+        month_view.step_month(1 if next(flips) % 2 else -1)
+
+    results = [
+        measure("format_speed", lambda: network.format_speed(123456.0), calls * 10),
+        measure("NetworkWidget.update_speed", network.update_speed, calls, setup=take_sample),
+        measure("CalendarWidget.update_time", widget.calendar.update_time, calls),
+        measure("context menu cold build", build_menu, max(calls // 10, 10), setup=qt_app.processEvents),
+        measure("context menu open (cached)", widget._prepare_context_menu, calls),
+        measure("apply_global_font_size", restyle, max(calls // 10, 10)),
+        measure("save_config (snapshot)", widget.save_config, calls),
+        measure("save_config + flush", save_and_flush, max(calls // 10, 10)),
+        measure("load_config", load, max(calls // 10, 10)),
+        measure("MonthView month flip", flip_month, calls),
+    ]
+    month_view.deleteLater()
+    network.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--interfaces", type=int, default=16)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.calls, args.interfaces)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "interfaces": args.interfaces,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Checks batch Gregorian->Jalali conversion against jdatetime and measures its throughput.
+
+Every day of the index range (1200..1600 AP) is compared with jdatetime, then random
+timestamps are converted and formatted: millions with NumPy when it is installed, and a
+smaller batch through the pure-Python path that runs without it.
+
+Usage: python benchmarks/bench_jalali_batch.py [--millions 5]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from array import array
+
+import jdatetime
+
+from widgets import jalali_batch
+from widgets.jalali_index import DAYS_IN_PERSIAN, get_index
+
+NUMPY = jalali_batch.np
+PYTHON_PATH_LIMIT = 200_000
+
+
+def verify():
+    index = get_index()
+    ordinals = array('q', range(index.year_starts[0], index.year_starts[-1]))
+    years, months, days, weekdays = jalali_batch.ordinals_to_jalali(ordinals)
+    labels = jalali_batch.format_jalali(years, months, days, weekdays)
+    for i, ordinal in enumerate(ordinals):
+        expected = jdatetime.date.fromgregorian(date=datetime.date.fromordinal(ordinal))
+        assert (years[i], months[i], days[i], weekdays[i]) == (
+            expected.year, expected.month, expected.day, expected.weekday()), ordinal
+        assert labels[i] == f"{DAYS_IN_PERSIAN[expected.weekday()]}\n{expected.strftime('%Y/%m/%d')}", ordinal
+    print(f"verified {len(ordinals)} days ({index.first_year}..{index.last_year} AP) against jdatetime")
+
+
+def measure(label, timestamps):
+    count = len(timestamps)
+    start = time.perf_counter()
+    converted = jalali_batch.epoch_to_jalali(timestamps, utc_offset=12600)
+    elapsed = time.perf_counter() - start
+    print(f"{label:6s} convert  {count / elapsed / 1e6:8.2f} M timestamps/s")
+
+    start = time.perf_counter()
+    jalali_batch.format_jalali(*converted[:3])
+    elapsed = time.perf_counter() - start
+    print(f"{label:6s} format   {count / elapsed / 1e6:8.2f} M timestamps/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--millions", type=float, default=5, help="timestamps to convert, in millions")
+    args = parser.parse_args()
+    count = int(args.millions * 1_000_000)
+    rng = random.Random(0)
+    timestamps = array('q', (rng.randrange(2_000_000_000) for _ in range(count)))
+
+    if NUMPY is not None:
+        verify()
+        measure("numpy", NUMPY.asarray(timestamps))
+    # The path without NumPy, as in the shipped app.
+    jalali_batch.np = None
+    verify()
+    measure("python", timestamps[:PYTHON_PATH_LIMIT])
+    jalali_batch.np = NUMPY
+
+    sample = rng.sample(list(timestamps), 100_000)
+    tz = datetime.timezone(datetime.timedelta(seconds=12600))
+    start = time.perf_counter()
+    for timestamp in sample:
+        jdatetime.datetime.fromtimestamp(timestamp, tz).strftime("%Y/%m/%d")
+    elapsed = time.perf_counter() - start
+    print(f"jdatetime loop  {len(sample) / elapsed / 1e6:8.2f} M timestamps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Compares building Jalali month grids from JalaliIndex against per-day jdatetime objects.
+
+Usage: python benchmarks/bench_jalali_index.py [--years 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jdatetime
+
+from widgets.jalali_index import JalaliIndex, get_index, month_grid
+
+
+def jdatetime_month_grid(year, month):
+    """The straightforward approach: one jdatetime object per day of the month."""
+    length = 31 if month <= 6 else 30 if month <= 11 else (30 if jdatetime.date(year, 1, 1).isleap() else 29)
+    cells = [0] * 42
+    offset = jdatetime.date(year, month, 1).weekday()
+    for day in range(1, length + 1):
+        cells[offset + day - 1] = jdatetime.date(year, month, day).day
+    return tuple(tuple(cells[i:i + 7]) for i in range(0, 42, 7))
+
+
+def timed(label, months, build):
+    start = time.perf_counter()
+    for year, month in months:
+        build(year, month)
+    elapsed = time.perf_counter() - start
+    print(f"{label:22s} {elapsed / len(months) * 1e6:8.2f} us/month")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=100)
+    args = parser.parse_args()
+    years = args.years
+    months = [(year, month) for year in range(1350, 1350 + years) for month in range(1, 13)]
+
+    start = time.perf_counter()
+    JalaliIndex()
+    print(f"index build            {(time.perf_counter() - start) * 1e3:8.2f} ms (once)")
+    index = get_index()
+
+    for year, month in months[:24]:
+        assert index.month_grid(year, month).weeks == jdatetime_month_grid(year, month)
+
+    timed("jdatetime per day", months, jdatetime_month_grid)
+    timed("index", months, index.month_grid)
+    month_grid.cache_clear()
+    timed("index + lru (cold)", months, month_grid)
+    timed("index + lru (warm)", months[-64:], month_grid)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Checks the latency probe against local stand-ins with known delay and loss, and times it.
+
+UDP echo servers on localhost answer after an injected delay and drop a fixed share of
+the probes at random; a TCP listener accepts connections. The probe's median RTT and
+loss are compared with what was injected. Then many echo targets with a long delay are
+probed at once, to show that the number of probes in flight never exceeds its bound,
+and the CPU time of the probe thread per probe is measured.
+
+Usage: python benchmarks/bench_latency_probe.py [--seconds 10]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from widgets.latency_probe import LatencyProbe
+from widgets.probe_targets import ProbeTarget
+
+
+class DelayedEcho(asyncio.DatagramProtocol):
+    def __init__(self, loop, delay, loss, rng):
+        self.loop = loop
+        self.delay = delay
+        self.loss = loss
+        self.rng = rng
+        self.received = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.received += 1
+        if self.rng.random() >= self.loss:
+            self.loop.call_later(self.delay, self.transport.sendto, data, addr)
+
+
+class EchoServers(threading.Thread):
+    """UDP echo servers on their own event loop, one per (delay, loss) pair."""
+
+    def __init__(self, specs, seed=1):
+        super().__init__(daemon=True)
+        self.specs = specs
+        self.rng = random.Random(seed)
+        self.ports = []
+        self.protocols = []
+        self.ready = threading.Event()
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        for delay, loss in self.specs:
+            transport, protocol = self.loop.run_until_complete(self.loop.create_datagram_endpoint(
+                lambda: DelayedEcho(self.loop, delay, loss, self.rng), local_addr=("127.0.0.1", 0)))
+            self.ports.append(transport.get_extra_info("sockname")[1])
+            self.protocols.append(protocol)
+        self.ready.set()
+        self.loop.run_forever()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+def start_echoes(specs):
+    servers = EchoServers(specs)
+    servers.start()
+    servers.ready.wait()
+    return servers
+
+
+def thread_cpu_seconds(thread):
+    with open(f"/proc/self/task/{thread.native_id}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def probes_done(probe):
+    return sum(window.count for window in probe.windows.values())
+
+
+def accept_forever(listener):
+    while True:
+        try:
+            connection, _ = listener.accept()
+        except OSError:
+            return
+        connection.close()
+
+
+def check_accuracy(seconds):
+    delay, loss, count = 0.030, 0.25, 8
+    servers = start_echoes([(delay, loss)] * count)
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(64)
+    threading.Thread(target=accept_forever, args=(listener,), daemon=True).start()
+    targets = [ProbeTarget("udp", "127.0.0.1", port) for port in servers.ports]
+    targets.append(ProbeTarget("tcp", "127.0.0.1", listener.getsockname()[1]))
+    probe = LatencyProbe(targets, interval_ms=20, timeout=0.2, window=int(seconds / 0.02))
+    probe.start()
+    time.sleep(seconds)
+    probe.stop()
+    probe.join()
+    servers.stop()
+    listener.close()
+    *udp, tcp = probe.summaries
+    probes = sum(summary.count for summary in udp)
+    measured_loss = sum(summary.loss * summary.count for summary in udp) / probes
+    medians = sorted(summary.median_rtt for summary in udp)
+    print(f"udp echo: injected {delay * 1000:.0f} ms / {loss:.0%} loss, measured median "
+          f"{medians[0] * 1000:.1f}-{medians[-1] * 1000:.1f} ms / {measured_loss:.1%} over {probes} probes")
+    print(f"tcp connect: median {tcp.median_rtt * 1000:.2f} ms, {tcp.loss:.0%} loss over {tcp.count} probes")
+    assert delay <= medians[0] and medians[-1] < delay + 0.010, medians
+    assert abs(measured_loss - loss) < 0.05, measured_loss
+    assert tcp.loss == 0 and tcp.median_rtt < 0.010, tcp
+
+
+def check_in_flight(seconds):
+    count, bound = 200, 32
+    servers = start_echoes([(0.4, 0.0)] * count)
+    targets = [ProbeTarget("udp", "127.0.0.1", port) for port in servers.ports]
+    probe = LatencyProbe(targets, interval_ms=100, timeout=1.0, max_in_flight=bound)
+    probe.start()
+    time.sleep(seconds)
+    probe.stop()
+    probe.join()
+    servers.stop()
+    answered = probes_done(probe)
+    # A target with a probe out is skipped, so each gets at most one per its 0.4 s round trip.
+    print(f"{count} targets, 400 ms delay: at most {probe.max_seen_in_flight} in flight (bound {bound}), "
+          f"{answered} probes in {seconds:g} s, {sum(p.received for p in servers.protocols)} sent")
+    assert probe.max_seen_in_flight <= bound
+    assert answered <= bound * seconds / 0.4 + bound
+
+
+def measure_cpu(seconds):
+    count = 20
+    servers = start_echoes([(0.005, 0.0)] * count)
+    targets = [ProbeTarget("udp", "127.0.0.1", port) for port in servers.ports]
+    probe = LatencyProbe(targets, interval_ms=100, timeout=0.5)
+    probe.start()
+    time.sleep(0.5)
+    cpu_before = thread_cpu_seconds(probe)
+    probes_before = probes_done(probe)
+    time.sleep(seconds)
+    cpu = thread_cpu_seconds(probe) - cpu_before
+    probes = probes_done(probe) - probes_before
+    probe.pause()
+    time.sleep(0.2)
+    cpu_paused = thread_cpu_seconds(probe)
+    time.sleep(1.0)
+    cpu_paused = thread_cpu_seconds(probe) - cpu_paused
+    probe.stop()
+    probe.join()
+    servers.stop()
+    print(f"{count} targets every 100 ms: {probes / seconds:.0f} probes/s, "
+          f"{cpu / seconds * 100:.2f}% CPU, {cpu / max(probes, 1) * 1e6:.0f} us CPU/probe; "
+          f"paused {cpu_paused * 1000:.0f} ms CPU/s")
+    assert cpu_paused <= 0.02
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+    seconds = args.seconds
+    check_accuracy(seconds)
+    check_in_flight(min(seconds, 4))
+    measure_cpu(min(seconds, 5))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Tracks resident memory of the widget after startup, after a simulated day, and after menu use.
+
+Runs in a fresh process under Qt's offscreen platform, with its config in a temporary
+directory. The process starts the way main.py does (the same sample hub and windows),
+lets the late settings run, and records RSS. Then it feeds a day of 1 second samples
+through the hub and the network widget, the path of every real tick, showing the
+tooltip with its rolling percentiles once per simulated hour. Last, it opens and
+closes the context menu and the about dialog a number of times. Growth over the day
+should stay near zero; a regression shows up as steady growth here.
+
+Usage: python benchmarks/bench_memory.py [--hours 24] [--menu-cycles 20]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MiB = 2 ** 20
+
+
+def child(hours: float, menu_cycles: int):
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.chdir(ROOT)
+    from PyQt6.QtCore import QEvent, QPoint, QTimer
+    from PyQt6.QtGui import QContextMenuEvent, QHelpEvent
+    from PyQt6.QtWidgets import QApplication, QDialog
+
+    import main as app_main
+    from widgets.config_store import ConfigStore
+    from widgets.counter_sources import CounterSource
+    from widgets.process_memory import rss_bytes
+    from widgets.sample_hub import SampleHub
+
+    class SyntheticDay(CounterSource):
+        """Counters of a busy interface; every read is one second later."""
+
+        def __init__(self):
+            self.now = 0.0
+            self.recv = self.sent = 0
+
+        def clock(self):
+            return self.now
+
+        def read(self, interface):
+            self.now += 1.0
+            step = int(self.now)
+            self.recv += (step * 7919) % 4_000_000 if step % 600 < 400 else step % 2000
+            self.sent += (step * 104729) % 300_000
+            return self.recv, self.sent
+
+    def run_for(ms):
+        QTimer.singleShot(ms, app.quit)
+        app.exec()
+
+    def close_soon(find):
+        QTimer.singleShot(20, lambda: (find() or app.activeWindow()).close())
+
+    config_store = ConfigStore()
+    source = SyntheticDay()
+    hub = SampleHub(port=0, counter_source=source, clock=source.clock, record_usage=False)
+    hub.start()
+    app = QApplication(sys.argv)
+    views = app_main.ViewSet("Sans", hub, config_store)
+    window = views.open_saved()
+    views.show()
+    run_for(1300)
+    startup = rss_bytes()
+
+    # From here on every sample is taken by this loop instead of the hub's thread.
+    network = window.network
+    network.set_interface("eth0")
+    network.timer.stop()
+    network.sampler.pause()
+    read_before = source.now
+    ticks = int(hours * 3600)
+    checkpoints = []
+    for tick in range(1, ticks + 1):
+        hub.sample_once()
+        network.update_speed()
+        if tick % 3600 == 0:
+            QApplication.sendEvent(network, QHelpEvent(QEvent.Type.ToolTip, QPoint(2, 2), network.mapToGlobal(QPoint(2, 2))))
+            app.processEvents()
+            checkpoints.append(rss_bytes())
+    run_for(50)
+    after_day = rss_bytes()
+    simulated = source.now - read_before
+
+    for _ in range(menu_cycles):
+        close_soon(QApplication.activePopupWidget)
+        window.contextMenuEvent(QContextMenuEvent(QContextMenuEvent.Reason.Mouse, QPoint(5, 5), window.mapToGlobal(QPoint(5, 5))))
+        close_soon(QApplication.activeModalWidget)
+        window._show_about_dialog()
+        app.processEvents()
+    run_for(200)
+    after_menus = rss_bytes()
+
+    print(json.dumps({
+        "startup": startup,
+        "after_day": after_day,
+        "after_menus": after_menus,
+        "hourly": checkpoints,
+        "simulated": simulated,
+        "in_stats": network.stats.summary(source.now)[-1][1].count,
+        "asyncio": "asyncio" in sys.modules,
+        "modules": len(sys.modules),
+        "dialogs": len(window.findChildren(QDialog)),
+        "hashlib": "_hashlib" in sys.modules,
+    }))
+    views.quit()
+    hub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=24, help="simulated hours of sampling")
+    parser.add_argument("--menu-cycles", type=int, default=20, help="menu and dialog open/close cycles")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.hours, args.menu_cycles)
+        return
+    hours, menu_cycles = args.hours, args.menu_cycles
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, XDG_CONFIG_HOME=directory, APPDATA=directory)
+        output = subprocess.run([sys.executable, __file__, "--child", "--hours", str(hours),
+                                 "--menu-cycles", str(menu_cycles)],
+                                capture_output=True, text=True, env=env, check=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    hourly = result["hourly"]
+    # Growth over the second half of the run, when every cache has been filled once.
+    late_growth = (hourly[-1] - hourly[len(hourly) // 2]) / MiB if len(hourly) > 1 else 0.0
+    print(f"startup {result['startup'] / MiB:6.1f} MiB  after {hours:g} h {result['after_day'] / MiB:6.1f} MiB  "
+          f"after {menu_cycles} menus/dialogs {result['after_menus'] / MiB:6.1f} MiB  "
+          f"(second-half growth {late_growth:+.2f} MiB; {result['modules']} modules, "
+          f"asyncio {'loaded' if result['asyncio'] else 'not loaded'}, "
+          f"hashlib {'loaded' if result['hashlib'] else 'not loaded'}, {result['dialogs']} dialogs kept)")
+    assert result["simulated"] >= hours * 3600 and result["in_stats"] > 0, result
+    assert result["dialogs"] == 0, result
+    assert late_growth < 1.0, hourly
+    # Serving loads asyncio only once another process attaches, which none does here; hashlib maps
+    # libcrypto (~3 MiB) and nothing the widget runs needs it.
+    assert not result["asyncio"] and not result["hashlib"], result
+
+
+if __name__ == "__main__":
+    main()
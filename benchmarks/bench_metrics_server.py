@@ -0,0 +1,94 @@
+"""Load test for the metrics endpoint with many concurrent local scrapers.
+
+Starts a MetricsServer on an ephemeral localhost port, keeps publishing snapshots at
+the widget's pace from another thread, and has concurrent keep-alive clients scrape
+/metrics and /metrics.json. Reports throughput and per-request latency, and checks
+every response.
+
+Usage: python benchmarks/bench_metrics_server.py [--clients 200] [--requests 50] [--interfaces 32]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from widgets.metrics_server import MetricsServer, MetricsSnapshot
+
+
+def make_snapshot(tick, interfaces):
+    names = tuple(f"eth{i}" for i in range(interfaces))
+    bytes_recv = [10 ** 9 + tick * 1000 * (i + 1) for i in range(interfaces)]
+    bytes_sent = [10 ** 8 + tick * 100 * (i + 1) for i in range(interfaces)]
+    return MetricsSnapshot(time.time(), "*", 1000.0 * tick, 100.0 * tick, (names, bytes_recv, bytes_sent),
+                           120_000, 900_000, 40_000, 1000)
+
+
+async def scrape(port, requests, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for i in range(requests):
+            path = "/metrics" if i % 2 == 0 else "/metrics.json"
+            start = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = head.split(b" ", 2)[1]
+            length = int(head.lower().split(b"content-length:")[1].split(b"\r\n")[0])
+            body = await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if status != b"200" or not (body.endswith(b"# EOF\n") or body.startswith(b"{")):
+                raise AssertionError(f"bad response for {path}: {head!r}")
+    finally:
+        writer.close()
+
+
+async def load(port, clients, requests):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(scrape(port, requests, latencies) for _ in range(clients)))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    parser.add_argument("--interfaces", type=int, default=32)
+    args = parser.parse_args()
+
+    server = MetricsServer(port=0)
+    server.start()
+    server.ready.wait()
+    if server.error:
+        sys.exit(f"server failed to start: {server.error}")
+
+    # Publish like the widget does: once per second, from a thread that isn't the server's.
+    stop = threading.Event()
+
+    def publisher():
+        tick = 0
+        while not stop.is_set():
+            server.publish(make_snapshot(tick, args.interfaces))
+            tick += 1
+            stop.wait(1.0)
+
+    threading.Thread(target=publisher, daemon=True).start()
+    try:
+        elapsed, latencies = asyncio.run(load(server.port, args.clients, args.requests))
+    finally:
+        stop.set()
+        server.stop()
+
+    total = len(latencies)
+    print(f"clients={args.clients} requests={total} interfaces={args.interfaces}")
+    print(f"throughput {total / elapsed:10.0f} req/s")
+    for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        print(f"{label:10s} {latencies[min(int(total * fraction), total - 1)] * 1e3:10.2f} ms")
+    print(f"max        {latencies[-1] * 1e3:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Compares one sampler per view with one SampleHub serving all views.
+
+Runs N views for a few seconds at a short interval in three setups: N independent
+NetworkSamplers (what N copies of the program used to do), one hub with N local
+readers, and one owning hub with a local reader plus N-1 hubs attached over localhost
+(standing in for other processes). Reports counter reads, CPU time and, for the
+attached readers, how long a sample takes to arrive.
+
+Usage: python benchmarks/bench_sample_hub.py [--views 4] [--interval-ms 50] [--seconds 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from widgets.counter_sources import create_counter_source
+from widgets.rates import default_interface
+from widgets.sample_hub import SampleHub, SampleReader
+from widgets.sampler import NetworkSampler
+
+
+class CountingSource:
+    """Wraps a counter source and counts its reads."""
+
+    def __init__(self, source):
+        self.source = source
+        self.reads = 0
+
+    def read(self, interface):
+        self.reads += 1
+        return self.source.read(interface)
+
+    def read_all(self):
+        self.reads += 1
+        return self.source.read_all()
+
+    def close(self):
+        self.source.close()
+
+
+class TimedReader(SampleReader):
+    """Records how old each sample is when it reaches the reader."""
+
+    def __init__(self, hub, interval_ms):
+        super().__init__(hub, interval_ms)
+        self.delays = []
+
+    def deliver(self, sample):
+        self.delays.append(time.monotonic() - sample.timestamp)
+        super().deliver(sample)
+
+
+def run_for(seconds):
+    cpu, wall = time.process_time(), time.perf_counter()
+    time.sleep(seconds)
+    return time.process_time() - cpu, time.perf_counter() - wall
+
+
+def separate_samplers(views, interface, interval_ms, seconds):
+    sources = [CountingSource(create_counter_source()) for _ in range(views)]
+    samplers = [NetworkSampler(source, interface, interval_ms) for source in sources]
+    for sampler in samplers:
+        sampler.start()
+    cpu, wall = run_for(seconds)
+    for sampler in samplers:
+        sampler.stop()
+    return sum(source.reads for source in sources), cpu, wall, []
+
+
+def local_hub(views, interface, interval_ms, seconds):
+    source = CountingSource(create_counter_source())
+    hub = SampleHub(counter_source=source)
+    hub.start()
+    for _ in range(views):
+        reader = hub.attach(interval_ms)
+        reader.set_interface(interface)
+        reader.resume()
+    cpu, wall = run_for(seconds)
+    hub.stop()
+    return source.reads, cpu, wall, []
+
+
+def attached_hubs(views, interface, interval_ms, seconds):
+    source = CountingSource(create_counter_source())
+    # The owner raises other processes' intervals to the menu's minimum unless told otherwise.
+    owner = SampleHub(port=0, counter_source=source, min_request_ms=interval_ms)
+    owner.start()
+    reader = owner.attach(interval_ms)
+    reader.set_interface(interface)
+    reader.resume()
+    hubs, readers = [], []
+    for _ in range(views - 1):
+        hub = SampleHub(port=owner.port, counter_source=CountingSource(create_counter_source()))
+        hub.start()
+        assert hub.client is not None, "did not attach"
+        timed = TimedReader(hub, interval_ms)
+        hub.attach_reader(timed)
+        timed.set_interface(interface)
+        timed.resume()
+        hubs.append(hub)
+        readers.append(timed)
+    cpu, wall = run_for(seconds)
+    for hub in hubs:
+        hub.stop()
+    owner.stop()
+    return source.reads, cpu, wall, [delay for timed in readers for delay in timed.delays]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--views", type=int, default=4)
+    parser.add_argument("--interval-ms", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    views, interval_ms, seconds = args.views, args.interval_ms, args.seconds
+    interface = default_interface() or "lo"
+    print(f"{views} views of {interface}, {interval_ms} ms interval, {seconds:.0f} s")
+    for name, setup in (("separate samplers", separate_samplers), ("one hub, local readers", local_hub),
+                        ("one hub, attached hubs", attached_hubs)):
+        reads, cpu, wall, delays = setup(views, interface, interval_ms, seconds)
+        line = f"{name:24s} {reads / wall:7.1f} reads/s  cpu {cpu / wall * 100:5.2f}%"
+        if delays:
+            delays.sort()
+            line += (f"  arrival p50 {delays[len(delays) // 2] * 1e6:.0f} us"
+                     f"  p99 {delays[int(len(delays) * 0.99)] * 1e6:.0f} us")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Checks the rolling speed percentiles against exact ones and measures their cost.
+
+Replays a trace through SpeedStats and, every few minutes of trace time, compares the
+sketch's p50/p95/max with exact values computed by sorting the same samples. The trace
+is a recording made with `main.py --headless` (ndjson or csv, raw numbers, not --human);
+without one, a synthetic day of 1 second samples with idle periods, browsing bursts and
+long downloads is used. Also reports the per-sample cost of SpeedStats.add and
+SpeedSmoother.update and the memory held by a full day of statistics.
+
+Usage: python benchmarks/bench_speed_stats.py [--trace trace.ndjson|trace.csv]
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from widgets.speed_stats import DEFAULT_STATS_WINDOWS, WINDOW_SLICES, SpeedSmoother, SpeedStats, window_label
+
+
+def load_trace(path):
+    """Returns [(timestamp, download, upload)] from a headless recording."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = [(float(row["timestamp"]), float(row["download"]), float(row["upload"])) for row in csv.DictReader(f)]
+        else:
+            rows = []
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    rows.append((record["timestamp"], record["download"], record["upload"]))
+    return rows
+
+
+def synthetic_trace(seconds=86400, seed=1):
+    """One sample per second: mostly idle, with bursts and occasional long transfers."""
+    rng = random.Random(seed)
+    rows = []
+    transfer_left, transfer_speed = 0, 0.0
+    for t in range(seconds):
+        if transfer_left:
+            transfer_left -= 1
+            download = transfer_speed * rng.uniform(0.7, 1.1)
+        elif rng.random() < 0.0005:
+            transfer_left, transfer_speed = rng.randint(60, 1800), rng.uniform(2e6, 60e6)
+            download = transfer_speed
+        elif rng.random() < 0.15:
+            download = rng.lognormvariate(math.log(200e3), 1.2)
+        else:
+            download = rng.expovariate(1 / 800)
+        upload = download * rng.uniform(0.02, 0.1) + rng.expovariate(1 / 300)
+        rows.append((1_000_000.0 + t, download, upload))
+    return rows
+
+
+def exact_percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(len(ordered) * fraction), 1) - 1]
+
+
+def relative_error(estimate, exact):
+    if exact == 0:
+        return 0.0 if estimate == 0 else 1.0
+    return abs(estimate - exact) / exact
+
+
+def check_accuracy(rows, check_every=300):
+    stats = SpeedStats(DEFAULT_STATS_WINDOWS)
+    errors = {window: {"p50": [], "p95": [], "max": []} for window in DEFAULT_STATS_WINDOWS}
+    for i, (timestamp, download, upload) in enumerate(rows):
+        stats.add(timestamp, download, upload)
+        if i % check_every:
+            continue
+        for window, sketch, _ in stats.summary(timestamp):
+            # Exact values over the samples the sketch still holds: its whole slices.
+            slice_length = window / WINDOW_SLICES
+            first_slice = int(timestamp // slice_length) - WINDOW_SLICES + 1
+            kept = [row[1] for row in rows[max(0, i - int(window) - 1):i + 1] if row[0] // slice_length >= first_slice]
+            if not kept:
+                continue
+            errors[window]["p50"].append(relative_error(sketch.percentile(0.5), exact_percentile(kept, 0.5)))
+            errors[window]["p95"].append(relative_error(sketch.percentile(0.95), exact_percentile(kept, 0.95)))
+            errors[window]["max"].append(relative_error(sketch.max, max(kept)))
+    for window, by_stat in errors.items():
+        print(f"{window_label(window):6s} " + "  ".join(
+            f"{stat} err mean {sum(values) / len(values) * 100:5.2f}% max {max(values) * 100:5.2f}%"
+            for stat, values in by_stat.items() if values))
+
+
+def measure_cost(rows):
+    count = min(len(rows), 100_000)
+    sample_rows = rows[:count]
+
+    def add_all():
+        stats = SpeedStats(DEFAULT_STATS_WINDOWS)
+        for timestamp, download, upload in sample_rows:
+            stats.add(timestamp, download, upload)
+
+    def smooth_all():
+        smoother = SpeedSmoother(5.0)
+        for timestamp, download, upload in sample_rows:
+            smoother.update(timestamp, download, upload)
+
+    for name, func in (("SpeedStats.add", add_all), ("SpeedSmoother.update", smooth_all)):
+        per_call = min(timeit.repeat(func, number=1, repeat=5)) / count * 1e9
+        print(f"{name:22s} {per_call:8.0f} ns/sample")
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    full = SpeedStats(DEFAULT_STATS_WINDOWS)
+    for timestamp, download, upload in rows:
+        full.add(timestamp, download, upload)
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    timestamp = rows[-1][0]
+    per_query = min(timeit.repeat(lambda: full.summary(timestamp), number=10, repeat=3)) / 10 * 1e6
+    print(f"{'summary (tooltip)':22s} {per_query:8.0f} us")
+    print(f"memory after {len(rows)} samples: {held / 1024:.0f} KiB "
+          f"(raw samples for the longest window: {min(len(rows), max(DEFAULT_STATS_WINDOWS)) * 2 * 8 / 1024:.0f} KiB as doubles)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--trace", help="an .ndjson or .csv trace; a synthetic one by default")
+    args = parser.parse_args()
+    rows = load_trace(args.trace) if args.trace else synthetic_trace()
+    print(f"{len(rows)} samples over {(rows[-1][0] - rows[0][0]) / 3600:.1f} h")
+    check_accuracy(rows)
+    measure_cost(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Measures import time and time-to-first-paint of the app under Qt's offscreen platform.
+
+Launches main.py repeatedly with --quit-after-first-paint, collects the startup phase
+breakdown it prints and reports the median of each phase, plus the slowest imports.
+
+Usage: python benchmarks/bench_startup.py [--runs 10]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASE_PATTERN = re.compile(r"(\w+) ([\d.]+) ms")
+
+
+def run_once(env, extra_args=()):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *extra_args, "main.py", "--quit-after-first-paint"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=60,
+    )
+    wall = (time.perf_counter() - start) * 1000
+    line = next((l for l in result.stdout.splitlines() if l.startswith("Startup:")), None)
+    if line is None:
+        raise RuntimeError(f"no startup report in output:\n{result.stdout}\n{result.stderr}")
+    return dict((name, float(ms)) for name, ms in PHASE_PATTERN.findall(line)), wall, result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    runs = args.runs
+    with tempfile.TemporaryDirectory() as config_home:
+        # A fresh config directory keeps runs independent of the developer's settings.
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", XDG_CONFIG_HOME=config_home, APPDATA=config_home)
+        run_once(env)  # Warm the OS file cache.
+
+        phases, walls = {}, []
+        for _ in range(runs):
+            report, wall, _ = run_once(env)
+            walls.append(wall)
+            for name, ms in report.items():
+                phases.setdefault(name, []).append(ms)
+
+        print(f"runs={runs} (median ms)")
+        for name, values in phases.items():
+            print(f"  {name:14s} {statistics.median(values):8.1f}")
+        print(f"  {'process wall':14s} {statistics.median(walls):8.1f}")
+
+        _, _, stderr = run_once(env, ("-X", "importtime"))
+    imports = []
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                imports.append((int(cumulative), name.rstrip()))
+    print("slowest imports (cumulative ms):")
+    for cumulative, name in sorted(imports, reverse=True)[:10]:
+        print(f"  {cumulative / 1000:8.1f} {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Compares stylesheet QLabels with StaticTextLabel for the per-tick speed display.
+
+"before" builds the old layout: a stylesheeted background widget holding two QLabels
+with per-label stylesheets, fonts set through QApplication.setStyleSheet. "after"
+uses StaticTextLabel with the speed template on a painted background. Each tick sets
+new speed texts and processes events, counting the layout requests and paint events
+this causes, then times a forced repaint of the labels. The same runs for ticks whose
+text didn't change, and finally the cost of a font size change is measured.
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_text_paint.py [--ticks 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import QEvent, QObject
+from PyQt6.QtGui import QFont, QFontDatabase
+from PyQt6.QtWidgets import QApplication, QLabel, QVBoxLayout, QWidget
+
+from main import RoundedBackground
+from widgets.network_widget import SPEED_TEMPLATE
+from widgets.rates import format_speed
+from widgets.static_text import StaticTextLabel
+
+OLD_LABEL_STYLE = "background-color: transparent; color: white; padding: 0px 0px;"
+OLD_BACKGROUND_STYLE = "QWidget { background-color: rgba(20, 20, 20, 150); border-radius: 8px; }"
+
+
+class EventCounter(QObject):
+    def __init__(self):
+        super().__init__()
+        self.layouts = 0
+        self.paints = 0
+        self.active = True
+
+    def eventFilter(self, obj, event):
+        if not self.active:
+            return False
+        if event.type() == QEvent.Type.LayoutRequest:
+            self.layouts += 1
+        elif event.type() == QEvent.Type.Paint:
+            self.paints += 1
+        return False
+
+
+def build(app, kind):
+    if kind == "before":
+        app.setStyleSheet("* { font-family: 'Vazirmatn FD'; font-size: 10pt; }")
+        background = QWidget()
+        background.setStyleSheet(OLD_BACKGROUND_STYLE)
+        labels = [QLabel("↓ 0.0 KB/s"), QLabel("↑ 0.0 KB/s")]
+        for label in labels:
+            label.setStyleSheet(OLD_LABEL_STYLE)
+    else:
+        app.setStyleSheet("")
+        app.setFont(QFont("Vazirmatn FD", 10))
+        background = RoundedBackground()
+        labels = [StaticTextLabel("↓ 0.0 KB/s", size_template=SPEED_TEMPLATE % "↓"),
+                  StaticTextLabel("↑ 0.0 KB/s", size_template=SPEED_TEMPLATE % "↑")]
+    layout = QVBoxLayout(background)
+    for label in labels:
+        layout.addWidget(label)
+    background.show()
+    app.processEvents()
+    return background, labels
+
+
+def run_ticks(app, window, labels, speeds):
+    counter = EventCounter()
+    for widget in [window, *labels]:
+        widget.installEventFilter(counter)
+    paint_ns = 0
+    for download, upload in speeds:
+        labels[0].setText(f"↓ {format_speed(download)}")
+        labels[1].setText(f"↑ {format_speed(upload)}")
+        app.processEvents()
+        # A forced repaint of the labels, timed but not counted.
+        counter.active = False
+        start = time.perf_counter_ns()
+        for label in labels:
+            label.repaint()
+        paint_ns += time.perf_counter_ns() - start
+        counter.active = True
+    for widget in [window, *labels]:
+        widget.removeEventFilter(counter)
+    ticks = len(speeds)
+    return paint_ns / ticks / 1000, counter.layouts / ticks, counter.paints / ticks
+
+
+def font_change_ms(app, kind, window, sizes=(9, 14, 10)):
+    start = time.perf_counter()
+    for size in sizes:
+        if kind == "before":
+            app.setStyleSheet(f"* {{ font-family: 'Vazirmatn FD'; font-size: {size}pt; }}")
+        else:
+            font = QFont("Vazirmatn FD", size)
+            app.setFont(font)
+            window.setFont(font)
+        app.processEvents()
+        window.adjustSize()
+    return (time.perf_counter() - start) / len(sizes) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=2000)
+    args = parser.parse_args()
+    ticks = args.ticks
+    app = QApplication(sys.argv)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    QFontDatabase.addApplicationFont(os.path.join(root, "fonts", "Vazirmatn-FD-Regular.ttf"))
+    rng = random.Random(1)
+    # Speeds hopping across units and digit counts, as a busy link does.
+    changing = [(rng.choice((0, 512, 9_999, 123_456, 5_000_000, 87_654_321)) * rng.random(),
+                 rng.random() * 200_000) for _ in range(ticks)]
+    unchanged = [(123_456.0, 7_890.0)] * ticks
+
+    for kind in ("before", "after"):
+        window, labels = build(app, kind)
+        paint_us, layouts, paints = run_ticks(app, window, labels, changing)
+        print(f"{kind:6s} changing text:  paint {paint_us:7.1f} us/tick  "
+              f"layout requests {layouts:.2f}/tick  paint events {paints:.2f}/tick")
+        paint_us, layouts, paints = run_ticks(app, window, labels, unchanged)
+        print(f"{kind:6s} unchanged text: paint {paint_us:7.1f} us/tick  "
+              f"layout requests {layouts:.2f}/tick  paint events {paints:.2f}/tick")
+        print(f"{kind:6s} font size change: {font_change_ms(app, kind, window):.2f} ms")
+        window.close()
+        window.deleteLater()
+        app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
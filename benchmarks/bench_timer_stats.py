@@ -0,0 +1,61 @@
+"""Measures the overhead of timer instrumentation, with recording off and on.
+
+Compares calling a callback directly with dispatching it through
+InstrumentedTimer._fire, which is what every timeout runs. Afterwards it runs a
+real 10 ms timer for a few seconds with recording on and prints its percentiles.
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_timer_stats.py [--calls 1000000] [--seconds 3]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import QCoreApplication, QTimer
+
+from widgets.timer_stats import Histogram, InstrumentedTimer
+
+
+def callback():
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    calls, seconds = args.calls, args.seconds
+    app = QCoreApplication(sys.argv)
+
+    timer = InstrumentedTimer("bench", callback)
+    timer.setInterval(10)
+    histogram = Histogram()
+    cases = [
+        ("direct callback", callback),
+        ("_fire, recording off", timer._fire),
+        ("Histogram.record", lambda: histogram.record(123_456)),
+    ]
+    results = {}
+    for name, func in cases:
+        results[name] = min(timeit.repeat(func, number=calls, repeat=5)) / calls * 1e9
+        print(f"{name:24s} {results[name]:8.1f} ns/call")
+    timer.set_recording(True)
+    on = min(timeit.repeat(timer._fire, number=calls, repeat=5)) / calls * 1e9
+    print(f"{'_fire, recording on':24s} {on:8.1f} ns/call")
+    print(f"overhead when off: {results['_fire, recording off'] - results['direct callback']:.1f} ns per timeout")
+
+    timer.stats.__init__()
+    timer.start()
+    QTimer.singleShot(int(seconds * 1000), app.quit)
+    app.exec()
+    lateness, duration = timer.stats.lateness, timer.stats.duration
+    print(f"10 ms timer for {seconds:.0f} s: {duration.count} fires, lateness p50 {lateness.percentile(0.5):.2f} "
+          f"p95 {lateness.percentile(0.95):.2f} p99 {lateness.percentile(0.99):.2f} "
+          f"max {lateness.max_ns / 1e6:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
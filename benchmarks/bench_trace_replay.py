@@ -0,0 +1,163 @@
+"""Replays synthetic traces through the sampler and rate calculation, checking and timing them.
+
+Scripted traces cover steady traffic, a counter reset, a 32-bit counter wraparound,
+an interface that disappears and comes back, and the all-interfaces table gaining and
+losing an interface. Each is written to a trace file, read back and replayed stepwise
+through NetworkSampler and RateCalculator, the same path the widget and the headless
+mode use, and the resulting rates are checked. Then a day of 1 second samples is
+replayed as fast as possible, and through a SampleHub at 3600x real time.
+
+Usage: python benchmarks/bench_trace_replay.py [--hours 24]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from widgets.aggregate import to_counter_array
+from widgets.counter_sources import ALL_INTERFACES
+from widgets.rates import RateCalculator
+from widgets.sample_hub import SampleHub
+from widgets.sample_trace import ReplayCounterSource, TraceWriter, read_trace
+from widgets.sampler import NetworkSampler, Sample
+
+START = 5000.0
+MB = 1_000_000
+
+
+def steady(count=10, interface="eth0"):
+    return [Sample(START + i, interface, (i * MB, i * MB // 10), False) for i in range(count)]
+
+
+def counter_reset():
+    samples = steady(5)
+    samples += [Sample(START + 5 + i, "eth0", (i * MB, i * MB // 10), False) for i in range(5)]
+    return samples
+
+
+def wraparound():
+    # A 32-bit counter (as some drivers and older Windows APIs report) wrapping at 2**32.
+    base = 2 ** 32 - 3 * MB
+    return [Sample(START + i, "eth0", ((base + i * MB) % 2 ** 32, i * MB // 10), False) for i in range(8)]
+
+
+def flap():
+    samples = steady(4)
+    samples += [Sample(START + 4 + i, "eth0", None, False) for i in range(3)]
+    # The interface comes back with its counters restarted.
+    samples += [Sample(START + 7 + i, "eth0", (i * MB, i * MB // 10), False) for i in range(4)]
+    return samples
+
+
+def table_changes():
+    samples = []
+    for i in range(8):
+        names = ("lo", "eth0", "wlan0") if 2 <= i < 5 else ("lo", "eth0")
+        recv = [i * 50, i * MB] + ([(i - 2) * 2 * MB] if "wlan0" in names else [])
+        samples.append(Sample(START + i, ALL_INTERFACES, (names, to_counter_array(recv), to_counter_array(recv)),
+                              False))
+    return samples
+
+
+def replay_rates(samples, interface, path):
+    """Writes samples to a trace, replays it stepwise and returns the download rates (None when unknown)."""
+    writer = TraceWriter(path)
+    for sample in samples:
+        writer.write(sample)
+    writer.close()
+    source = ReplayCounterSource.open(path, speed=0)
+    sampler = NetworkSampler(source, interface, clock=source.clock)
+    rates = RateCalculator()
+    downloads = []
+    while True:
+        sampler.sample_once()
+        speeds = rates.update(sampler.ring.drain_latest())
+        downloads.append(None if speeds is None else round(speeds[0]))
+        if source.finished:
+            return downloads
+
+
+def check_scenarios(directory):
+    path = os.path.join(directory, "scenario.nst")
+    scenarios = [
+        ("steady", steady(), "eth0", [None] + [MB] * 9),
+        # A counter that went backwards counts as no traffic for that interval.
+        ("counter reset", counter_reset(), "eth0", [None] + [MB] * 4 + [0] + [MB] * 4),
+        ("32-bit wraparound", wraparound(), "eth0", [None, MB, MB, 0, MB, MB, MB, MB]),
+        # While missing there is nothing to show; the restarted counters read as a reset.
+        ("interface flap", flap(), "eth0", [None, MB, MB, MB, None, None, None, 0, MB, MB, MB]),
+        ("interface flap (table)", table_changes(), "eth0", [None] + [MB] * 7),
+        ("table totals", table_changes(), ALL_INTERFACES, [None, MB, MB, 3 * MB, 3 * MB, MB, MB, MB]),
+    ]
+    for name, samples, interface, expected in scenarios:
+        downloads = replay_rates(samples, interface, path)
+        assert downloads == expected, (name, downloads, expected)
+        print(f"{name:24s} ok")
+
+
+def day_trace(hours):
+    samples = []
+    recv = sent = 0
+    for i in range(int(hours * 3600)):
+        recv += (i * 7919) % 3 * MB
+        sent += (i * 104729) % 5 * 1000
+        samples.append(Sample(START + i, "eth0", (recv, sent), False))
+    return samples
+
+
+def measure(directory, hours):
+    samples = day_trace(hours)
+    for name in ("day.nst", "day.nst.gz"):
+        path = os.path.join(directory, name)
+        started = time.perf_counter()
+        writer = TraceWriter(path)
+        for sample in samples:
+            writer.write(sample)
+        writer.close()
+        written = time.perf_counter() - started
+        started = time.perf_counter()
+        _, loaded = read_trace(path)
+        read = time.perf_counter() - started
+        assert loaded == samples
+        print(f"{name:11s} {os.path.getsize(path) / len(samples):5.1f} bytes/sample  "
+              f"write {written / len(samples) * 1e6:.2f} us/sample  read {read / len(samples) * 1e6:.2f} us/sample")
+
+    source = ReplayCounterSource(samples, speed=0)
+    sampler = NetworkSampler(source, "eth0", clock=source.clock)
+    rates = RateCalculator()
+    started = time.perf_counter()
+    while not source.finished:
+        sampler.sample_once()
+        rates.update(sampler.ring.drain_latest())
+    elapsed = time.perf_counter() - started
+    print(f"stepwise replay of {hours:g} h: {elapsed:.2f} s ({len(samples) / elapsed:,.0f} samples/s)")
+
+    # Through the hub at 3600x: the sampler's 50 ms interval covers three trace minutes.
+    source = ReplayCounterSource(samples, speed=3600)
+    hub = SampleHub(counter_source=source, clock=source.clock, record_usage=False)
+    hub.start()
+    reader = hub.attach(50)
+    reader.set_interface("eth0")
+    reader.resume()
+    started = time.perf_counter()
+    time.sleep(1.0)
+    covered = source.clock() - START
+    hub.stop()
+    print(f"hub replay at 3600x: {covered / 3600:.2f} trace hours in {time.perf_counter() - started:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=24)
+    args = parser.parse_args()
+    hours = args.hours
+    with tempfile.TemporaryDirectory() as directory:
+        check_scenarios(directory)
+        measure(directory, hours)
+
+
+if __name__ == "__main__":
+    main()
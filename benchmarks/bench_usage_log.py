@@ -0,0 +1,115 @@
+"""Measures usage log append cost and query time after a year of 1 s samples.
+
+The log is filled through the same append() path the sampler uses, compactions
+included, so a full year takes a few minutes; use --days or --step for a quicker run.
+Last, it times the sampler reading a single interface of a synthetic /proc/net/dev
+with the log off and on, and checks the log reads every interface only once per
+USAGE_LOG_INTERVAL rather than on every sample.
+
+Usage: python benchmarks/bench_usage_log.py [--days 365] [--step 1.0] [--interfaces 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_aggregate import write_proc_net_dev
+from widgets import sampler as sampler_module
+from widgets.counter_sources import ProcNetDevCounterSource
+from widgets.sampler import USAGE_LOG_INTERVAL, NetworkSampler
+from widgets.usage_log import UsageLog, format_bytes
+
+
+class CountingSource(ProcNetDevCounterSource):
+    read_alls = 0
+
+    def read_all(self):
+        self.read_alls += 1
+        return super().read_all()
+
+
+def sampler_costs(directory, interfaces, samples=20000):
+    """Returns (us per sample without the log, with it, read_all calls with it) over `samples` 1 s samples."""
+    path = os.path.join(directory, "dev")
+    write_proc_net_dev(path, interfaces, 0)
+    clock = [0.0]
+    monotonic = sampler_module.time.monotonic
+    sampler_module.time.monotonic = lambda: clock[0]
+    try:
+        results = []
+        for logged in (False, True):
+            source = CountingSource(path)
+            sampler = NetworkSampler(source, interface="veth1", clock=lambda: clock[0])
+            if logged:
+                sampler.usage_log = UsageLog(os.path.join(directory, "sampler"))
+            began = time.perf_counter()
+            for i in range(samples):
+                clock[0] = float(i)  # One sample a second, as the widget takes by default.
+                sampler.sample_once()
+            results.append((time.perf_counter() - began) / samples * 1e6)
+            if logged:
+                sampler.usage_log.close()
+            source.close()
+        return results[0], results[1], source.read_alls
+    finally:
+        sampler_module.time.monotonic = monotonic
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--step", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--interfaces", type=int, default=200, help="interfaces in the sampler's /proc/net/dev")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = UsageLog(directory)
+        samples = int(args.days * 86400 / args.step)
+        start = time.time() - samples * args.step
+        chunk = 100_000
+        chunk_costs = []
+        for first in range(0, samples, chunk):
+            began = time.perf_counter()
+            for i in range(first, min(first + chunk, samples)):
+                log.append(start + i * args.step, 1000 + i % 5000, 100 + i % 700)
+            chunk_costs.append((time.perf_counter() - began) / (min(first + chunk, samples) - first))
+        chunk_costs.sort()
+        print(f"samples={samples} raw records kept={log.count} log size={format_bytes(os.path.getsize(log.path))} "
+              f"rollups size={format_bytes(os.path.getsize(log.rollups_path))}")
+        print(f"append               p50 {chunk_costs[len(chunk_costs) // 2] * 1e6:8.2f} us  "
+              f"worst chunk {chunk_costs[-1] * 1e6:8.2f} us/append")
+
+        queries = [
+            ("this Jalali month", lambda: log.recent_months(1)),
+            ("last 30 days", lambda: log.total(log.recent_days(30))),
+            ("last 365 days", lambda: log.total(log.recent_days(365))),
+            ("last 24 hours", lambda: log.total(log.recent_hours(24))),
+            ("last 12 months", lambda: log.recent_months(12)),
+        ]
+        for name, query in queries:
+            number = 2000
+            best = min(timeit.repeat(query, number=number, repeat=5))
+            print(f"{name:20s} {best / number * 1e6:8.2f} us/query")
+
+        began = time.perf_counter()
+        sum(record[1] for record in log.records())
+        print(f"scan of the {log.count} retained raw records: {(time.perf_counter() - began) * 1e3:.1f} ms")
+
+        began = time.perf_counter()
+        log.close()
+        UsageLog(directory).close()
+        print(f"close + reopen: {(time.perf_counter() - began) * 1e3:.1f} ms")
+
+        samples = 20000
+        off, on, read_alls = sampler_costs(directory, args.interfaces, samples)
+        print(f"single-interface sample, {args.interfaces} interfaces: log off {off:.1f} us, log on {on:.1f} us "
+              f"({read_alls} reads of every interface in {samples} samples)")
+        assert read_alls <= samples / USAGE_LOG_INTERVAL + 1, read_alls
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,147 @@
+import time
+# Taken before any other import so the startup report includes import time.
+PROCESS_START = time.perf_counter()
+
 import sys
 import os
 import signal
-import psutil
+
+HEADLESS_ARG = "--headless"
+if __name__ == "__main__" and HEADLESS_ARG in sys.argv[1:]:
+    # Headless mode streams samples to stdout and must not import Qt at all.
+    from widgets.headless import main as headless_main
+    sys.exit(headless_main(sys.argv[1:]))
 
 from PyQt6.QtWidgets import (QApplication, QWidget, QMenu, QHBoxLayout, QMessageBox,
-                             QLabel, QDialog, QVBoxLayout, QPushButton)
-from PyQt6.QtCore import QTimer, Qt, QUrl
-from PyQt6.QtGui import QAction, QFontDatabase, QIcon, QDesktopServices
+                             QLabel, QDialog, QVBoxLayout, QPushButton, QInputDialog)
+from PyQt6.QtCore import QTimer, Qt, QUrl, QRectF, pyqtSignal
+from PyQt6.QtGui import QAction, QActionGroup, QColor, QFont, QFontDatabase, QIcon, QDesktopServices, QPainter
 
 # --- Local Imports ---
 from widgets.calendar_widget import CalendarWidget
-from widgets.network_widget import NetworkWidget
+from widgets.network_widget import NetworkWidget, ALL_INTERFACES
+from widgets.config_store import Config, ConfigStore
+from widgets.process_memory import rss_bytes
+from widgets.sample_hub import SampleHub, user_hub_port
+from widgets.speed_stats import DEFAULT_STATS_WINDOWS, parse_windows, window_label
+from widgets import timer_stats
+from widgets.timer_stats import InstrumentedTimer
 
 # --- Windows-specific Imports ---
 # Used for "Always on Top" and startup integration.
 try:
     import win32gui
     import win32con
-    import win32com.client
+    import win32ts
+    import ctypes.wintypes
     import pythoncom
     IS_WINDOWS = True
 except ImportError:
     IS_WINDOWS = False
 
+# Passing this flag makes main() exit right after the first frame; used by the startup benchmark.
+QUIT_AFTER_FIRST_PAINT_ARG = "--quit-after-first-paint"
+# `--view NAME` opens a window with its own settings; needed to add a window from another process.
+VIEW_ARG = "--view"
+# `--replay FILE [--speed N]` shows a trace recorded with `--headless --record FILE` instead of live counters.
+REPLAY_ARG = "--replay"
+SPEED_ARG = "--speed"
+# Replayed traces are shown in their own window settings unless a window is named.
+REPLAY_VIEW = "replay"
+
 # --- Constants ---
-CONFIG_FILE = "config.txt"
+# Where older versions kept their settings (relative to the working directory); read once for migration.
+LEGACY_CONFIG_FILE = "config.txt"
 APP_ICON_PATH = "icon.ico"
-BASE_STYLESHEET = "QWidget { font-family: '%s'; }"
+HOLIDAYS_PATH = os.path.join("data", "holidays.json")
+# The subset made by subset_fonts.py is preferred; the full font is the fallback when running from a checkout without it.
+FONT_PATHS = (os.path.join("fonts", "Vazirmatn-FD-Subset.ttf"), os.path.join("fonts", "Vazirmatn-FD-Regular.ttf"))
+WM_WTSSESSION_CHANGE = 0x02B1
+WTS_SESSION_LOCK = 0x7
+WTS_SESSION_UNLOCK = 0x8
+WM_TIMECHANGE = 0x001E
+WM_POWERBROADCAST = 0x0218
+PBT_APMRESUMESUSPEND = 0x7
+PBT_APMRESUMEAUTOMATIC = 0x12
+
+
+class RoundedBackground(QWidget):
+    """The translucent rounded panel behind the widgets.
+
+    Painted directly rather than through a stylesheet: widgets under a stylesheet stop
+    following application font changes.
+    """
+    RADIUS = 8
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.opacity = 0.6
+
+    def set_opacity(self, opacity: float):
+        self.opacity = opacity
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        color = QColor(20, 20, 20, round(self.opacity * 255))
+        dirty = event.rect()
+        radius = self.RADIUS
+        if (self.rect().adjusted(radius, 0, -radius, 0).contains(dirty)
+                or self.rect().adjusted(0, radius, 0, -radius).contains(dirty)):
+            # A label repainting away from the corners; no need for the antialiased path.
+            painter.fillRect(dirty, color)
+        else:
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(color)
+            painter.drawRoundedRect(QRectF(self.rect()), radius, radius)
+        painter.end()
+
+
+class StartupProfile:
+    """Records how long each startup phase took and prints a one-line breakdown."""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase: str):
+        """Ends the current phase under the given name."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        breakdown = ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in self.phases)
+        print(f"Startup: {breakdown}, total {(self.last - self.start) * 1000:.1f} ms")
 
 
 class MainWidget(QWidget):
-    """The main widget that contains and manages all other components."""
+    """The main widget that contains and manages all other components.
+
+    Several can run side by side as the windows of a ViewSet; each keeps its settings in
+    the config namespace `view_name`. Without a ViewSet it is a standalone window.
+    """
+
+    # Emitted from the hub's server thread when a second launch asks for the windows; delivered on the GUI thread.
+    show_requested = pyqtSignal()
 
-    def __init__(self, font_name: str):
+    def __init__(self, font_name: str, view_name: str = "", views=None, default_pos=None):
         super().__init__()
         self.font_name = font_name
+        self.view_name = view_name
+        self.views = views
+        self.default_pos = default_pos  # Where to appear when the config has no position yet.
         self.font_size = 10
         self.old_pos = None
+        self.press_pos = None
+        self.on_first_paint = None  # Called once, after the first frame has been painted.
+        self._context_menu = None  # Built on the first right-click, then reused.
         self.menu_is_open = False
         self.opacity_level = 0.6
         self.is_currently_in_startup = self._is_in_startup()
+        self.config_store = views.config_store if views else ConfigStore(legacy_path=LEGACY_CONFIG_FILE)
 
         # Correctly resolve paths for both bundled exe and normal script
         if getattr(sys, 'frozen', False):
@@ -48,6 +150,10 @@ class MainWidget(QWidget):
             base_path = os.path.abspath(".")
 
         icon_full_path = os.path.join(base_path, APP_ICON_PATH)
+        self.default_holidays_file = os.path.join(base_path, HOLIDAYS_PATH)
+        self.holidays_file = None  # A user-provided overlay from config, if any.
+        self.metrics_port = Config.metrics_port
+        self.hub_port = Config.hub_port
 
         if os.path.exists(icon_full_path):
             self.app_icon = QIcon(icon_full_path)
@@ -62,9 +168,13 @@ class MainWidget(QWidget):
 
         if IS_WINDOWS:
             # Periodically ensure the widget remains on top of other windows.
-            self.on_top_timer = QTimer(self)
-            self.on_top_timer.timeout.connect(self.periodic_on_top_check)
+            self.on_top_timer = InstrumentedTimer("on-top", self.periodic_on_top_check, self)
             self.on_top_timer.start(1000)
+            # Ask Windows to tell us when the session is locked so sampling can pause.
+            try:
+                win32ts.WTSRegisterSessionNotification(int(self.winId()), win32ts.NOTIFY_FOR_THIS_SESSION)
+            except Exception as e:
+                print(f"Error registering for session notifications: {e}")
 
     def init_ui(self):
         """Initializes the window and layout."""
@@ -78,15 +188,15 @@ class MainWidget(QWidget):
         main_layout = QHBoxLayout(self)
         main_layout.setContentsMargins(0, 0, 0, 0)
 
-        self.background_widget = QWidget()
+        self.background_widget = RoundedBackground()
         self.update_background_style()
 
         container_layout = QHBoxLayout(self.background_widget)
         container_layout.setContentsMargins(10, 3, 10, 3)
         container_layout.setSpacing(10)
 
-        self.calendar = CalendarWidget(parent=self)
-        self.network = NetworkWidget(parent=self)
+        self.calendar = CalendarWidget(parent=self, occasions_path=self.holidays_file or self.default_holidays_file)
+        self.network = NetworkWidget(parent=self, hub=self.views.hub if self.views else None)
 
         container_layout.addWidget(self.calendar, alignment=Qt.AlignmentFlag.AlignCenter)
         container_layout.addWidget(self.network, alignment=Qt.AlignmentFlag.AlignCenter)
@@ -111,13 +221,33 @@ class MainWidget(QWidget):
 
     def update_background_style(self):
         """Updates the background color and opacity."""
-        style = f"QWidget {{ background-color: rgba(20, 20, 20, {self.opacity_level}); border-radius: 8px; }}"
-        self.background_widget.setStyleSheet(style)
+        self.background_widget.set_opacity(self.opacity_level)
+
+    def nativeEvent(self, event_type, message):
+        """Reacts to Windows session, power and clock notifications."""
+        if IS_WINDOWS and event_type == b"windows_generic_MSG":
+            msg = ctypes.wintypes.MSG.from_address(int(message))
+            if msg.message == WM_WTSSESSION_CHANGE and msg.wParam in (WTS_SESSION_LOCK, WTS_SESSION_UNLOCK):
+                # Pause network sampling while the session is locked.
+                self.network.set_screen_locked(msg.wParam == WTS_SESSION_LOCK)
+            elif msg.message == WM_TIMECHANGE or (
+                    msg.message == WM_POWERBROADCAST and msg.wParam in (PBT_APMRESUMESUSPEND, PBT_APMRESUMEAUTOMATIC)):
+                # The date may have rolled over while asleep or after a clock/timezone change.
+                self.calendar.refresh()
+        return super().nativeEvent(event_type, message)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.on_first_paint:
+            callback, self.on_first_paint = self.on_first_paint, None
+            # Run after the frame has been flushed rather than in the middle of painting it.
+            QTimer.singleShot(0, callback)
 
     # --- Event Handlers for Window Dragging ---
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             self.old_pos = event.globalPosition().toPoint()
+            self.press_pos = self.old_pos
 
     def mouseMoveEvent(self, event):
         if self.old_pos:
@@ -127,82 +257,230 @@ class MainWidget(QWidget):
 
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
-            self.save_config()
+            # A click that didn't drag the window opens the month view when it lands on the calendar,
+            # and the per-process connections panel when it lands on the network speeds.
+            moved = (event.globalPosition().toPoint() - self.press_pos).manhattanLength() if self.press_pos else 0
+            clicked = self.childAt(event.position().toPoint()) if moved < QApplication.startDragDistance() else None
+            if clicked and self.calendar.isAncestorOf(clicked):
+                self.calendar.show_month_view()
+            elif clicked and self.network.isAncestorOf(clicked):
+                self.network.show_connections_panel()
+            else:
+                self.save_config()
             self.old_pos = None
+            self.press_pos = None
 
     def contextMenuEvent(self, event):
-        """Creates and displays the right-click context menu."""
-        context_menu = QMenu(self)
+        """Displays the right-click context menu."""
+        context_menu = self._prepare_context_menu()
         self.menu_is_open = True
+        context_menu.exec(event.globalPos())
+        self.menu_is_open = False
+
+    def _prepare_context_menu(self) -> QMenu:
+        """Returns the context menu, building it on first use and syncing it afterwards."""
+        if self._context_menu is None:
+            self._context_menu = self._build_context_menu()
+        self._sync_context_menu()
+        return self._context_menu
+
+    def _add_choice_group(self, menu: QMenu, choices, on_select) -> dict:
+        """Adds mutually exclusive checkable actions; returns them keyed by value."""
+        group = QActionGroup(menu)
+        actions = {}
+        for label, value in choices:
+            action = QAction(label, group, checkable=True)
+            action.triggered.connect(lambda checked, v=value: on_select(v))
+            menu.addAction(action)
+            actions[value] = action
+        return actions
+
+    def _build_context_menu(self) -> QMenu:
+        """Creates the right-click context menu once; check states are set by _sync_context_menu."""
+        context_menu = QMenu(self)
+        # Only user clicks are connected (triggered, not toggled), so syncing check states
+        # never calls back into the handlers.
+        self._show_calendar_action = QAction("نمایش تقویم", context_menu, checkable=True)
+        self._show_calendar_action.triggered.connect(self._toggle_calendar_visibility)
+        context_menu.addAction(self._show_calendar_action)
 
-        show_calendar_action = QAction("نمایش تقویم", self, checkable=True)
-        show_calendar_action.setChecked(self.calendar.isVisible())
-        show_calendar_action.toggled.connect(self._toggle_calendar_visibility)
-        context_menu.addAction(show_calendar_action)
+        self._show_network_action = QAction("نمایش سرعت شبکه", context_menu, checkable=True)
+        self._show_network_action.triggered.connect(self._toggle_network_visibility)
+        context_menu.addAction(self._show_network_action)
 
-        show_network_action = QAction("نمایش سرعت شبکه", self, checkable=True)
-        show_network_action.setChecked(self.network.isVisible())
-        show_network_action.toggled.connect(self._toggle_network_visibility)
-        context_menu.addAction(show_network_action)
+        self._show_graph_action = QAction("نمایش نمودار سرعت", context_menu, checkable=True)
+        self._show_graph_action.triggered.connect(self._toggle_graph_visibility)
+        context_menu.addAction(self._show_graph_action)
 
         context_menu.addSeparator()
 
         font_menu = context_menu.addMenu("تغییر اندازه فونت")
-        for size in range(9, 17):
-            label = f"{size} pt (پیشفرض)" if size == 10 else f"{size} pt"
-            action = QAction(label, self, checkable=True)
-            action.setChecked(size == self.font_size)
-            action.triggered.connect(lambda checked, s=size: self.apply_global_font_size(s))
-            font_menu.addAction(action)
+        self._font_actions = self._add_choice_group(
+            font_menu,
+            [(f"{size} pt (پیشفرض)" if size == 10 else f"{size} pt", size) for size in range(9, 17)],
+            self.apply_global_font_size,
+        )
 
         opacity_menu = context_menu.addMenu("تنظیم شفافیت")
         opacities = {"0%": 0.01, "20%": 0.2, "40%": 0.4, "60%": 0.6, "80%": 0.8, "100%": 1.0}
-        for label, value in opacities.items():
-            display_label = f"{label} (پیشفرض)" if value == 0.6 else label
-            action = QAction(display_label, self, checkable=True)
-            action.setChecked(abs(value - self.opacity_level) < 0.01)
-            action.triggered.connect(lambda checked, v=value: self.set_opacity(v))
-            opacity_menu.addAction(action)
+        self._opacity_actions = self._add_choice_group(
+            opacity_menu,
+            [(f"{label} (پیشفرض)" if value == 0.6 else label, value) for label, value in opacities.items()],
+            self.set_opacity,
+        )
 
         update_interval_menu = context_menu.addMenu("تنظیم زمان‌بندی به‌روزرسانی")
         intervals = {"0.5 ثانیه": 500, "1 ثانیه": 1000, "1.5 ثانیه": 1500, "2 ثانیه": 2000, "2.5 ثانیه": 2500, "3 ثانیه": 3000}
-        current_interval = self.network.timer.interval()
-        for label, value in intervals.items():
-            display_label = f"\u200f(پیشفرض) {label}" if value == 1000 else f"\u200f {label}"
-            action = QAction(display_label, self, checkable=True)
-            action.setChecked(value == current_interval)
-            action.triggered.connect(lambda checked, v=value: self.network.set_update_interval(v))
-            update_interval_menu.addAction(action)
-
-        interface_menu = context_menu.addMenu("انتخاب اینترفیس شبکه")
-        try:
-            for iface in psutil.net_if_addrs().keys():
-                action = QAction(iface, self, checkable=True)
-                action.setChecked(iface == self.network.interface)
-                action.triggered.connect(lambda checked, i=iface: self.network.set_interface(i))
-                interface_menu.addAction(action)
-        except Exception as e:
-            interface_menu.addAction(QAction(f"Error: {e}", self, enabled=False))
+        self._interval_actions = self._add_choice_group(
+            update_interval_menu,
+            [(f"\u200f(پیشفرض) {label}" if value == 1000 else f"\u200f {label}", value) for label, value in intervals.items()],
+            self.network.set_update_interval,
+        )
+        update_interval_menu.addSeparator()
+        self._adaptive_action = QAction("\u200fتطبیقی (کاهش به‌روزرسانی هنگام بیکاری)", context_menu, checkable=True)
+        self._adaptive_action.triggered.connect(self.network.set_adaptive)
+        update_interval_menu.addAction(self._adaptive_action)
+
+        smoothing_menu = context_menu.addMenu("هموارسازی سرعت")
+        smoothings = {"خاموش": 0.0, "2 ثانیه": 2.0, "5 ثانیه": 5.0, "10 ثانیه": 10.0}
+        self._smoothing_actions = self._add_choice_group(
+            smoothing_menu,
+            [(f"\u200f(پیشفرض) {label}" if value == 0.0 else f"\u200f {label}", value) for label, value in smoothings.items()],
+            self.network.set_smoothing,
+        )
+        smoothing_menu.addSeparator()
+        self._stats_window_actions = {}
+        for window in DEFAULT_STATS_WINDOWS:
+            action = QAction(f"\u200fآمار {window_label(window)} در راهنما", context_menu, checkable=True)
+            action.triggered.connect(lambda checked, w=window: self._toggle_stats_window(w, checked))
+            smoothing_menu.addAction(action)
+            self._stats_window_actions[window] = action
+
+        probe_menu = context_menu.addMenu("تأخیر و اتلاف بسته")
+        self._probe_target_action = QAction("تعیین مقصد...", context_menu)
+        self._probe_target_action.triggered.connect(self._ask_probe_targets)
+        probe_menu.addAction(self._probe_target_action)
+        probe_menu.addSeparator()
+        probe_intervals = {"1 ثانیه": 1000, "2 ثانیه": 2000, "5 ثانیه": 5000, "10 ثانیه": 10000}
+        self._probe_interval_actions = self._add_choice_group(
+            probe_menu,
+            [(f"\u200f(پیشفرض) {label}" if value == 2000 else f"\u200f {label}", value)
+             for label, value in probe_intervals.items()],
+            lambda ms: self.network.set_probe(self.network.probe_targets, ms),
+        )
+
+        # Filled by _sync_context_menu whenever the set of interfaces changes.
+        self._interface_menu = context_menu.addMenu("انتخاب اینترفیس شبکه")
+        self._interface_actions = {}
+        self._menu_interfaces = None
+        self._failover_action = QAction("تغییر خودکار اینترفیس هنگام قطع", context_menu, checkable=True)
+        self._failover_action.triggered.connect(self.network.set_failover)
 
         context_menu.addSeparator()
 
         if IS_WINDOWS:
-            startup_action = QAction("اجرای خودکار هنگام شروع ویندوز", self, checkable=True)
-            startup_action.setChecked(self.is_currently_in_startup)
-            startup_action.toggled.connect(self._toggle_startup)
-            context_menu.addAction(startup_action)
+            self._startup_action = QAction("اجرای خودکار هنگام شروع ویندوز", context_menu, checkable=True)
+            self._startup_action.triggered.connect(self._toggle_startup)
+            context_menu.addAction(self._startup_action)
             context_menu.addSeparator()
 
-        about_action = QAction("درباره برنامه", self)
+        self._metrics_action = QAction(f"سرویس متریک (localhost:{self.metrics_port})", context_menu, checkable=True)
+        self._metrics_action.triggered.connect(self._set_metrics_enabled)
+        context_menu.addAction(self._metrics_action)
+
+        diagnostics_menu = context_menu.addMenu("عیب‌یابی")
+        self._timer_recording_action = QAction("ثبت تأخیر و مدت اجرای تایمرها", context_menu, checkable=True)
+        self._timer_recording_action.triggered.connect(timer_stats.set_recording)
+        diagnostics_menu.addAction(self._timer_recording_action)
+        diagnostics_action = QAction("نمایش آمار تایمرها", context_menu)
+        diagnostics_action.triggered.connect(self._show_diagnostics_dialog)
+        diagnostics_menu.addAction(diagnostics_action)
+
+        usage_action = QAction("گزارش مصرف", context_menu)
+        usage_action.triggered.connect(self._show_usage_dialog)
+        context_menu.addAction(usage_action)
+
+        if self.views is not None:
+            context_menu.addSeparator()
+            new_view_action = QAction("پنجره جدید", context_menu)
+            new_view_action.triggered.connect(lambda: self.views.open_new(self))
+            context_menu.addAction(new_view_action)
+            # Further windows can be closed on their own; the first one only with the whole program.
+            close_view_action = QAction("بستن این پنجره", context_menu)
+            close_view_action.triggered.connect(lambda: self.views.close(self))
+            close_view_action.setVisible(self.view_name != self.views.primary)
+            context_menu.addAction(close_view_action)
+
+        about_action = QAction("درباره برنامه", context_menu)
         about_action.triggered.connect(self._show_about_dialog)
         context_menu.addAction(about_action)
 
-        exit_action = QAction("خروج", self)
+        exit_action = QAction("خروج", context_menu)
         exit_action.triggered.connect(self._quit_application)
         context_menu.addAction(exit_action)
+        return context_menu
+
+    def _sync_context_menu(self):
+        """Brings check states up to date and rebuilds the interface submenu if interfaces changed."""
+        self._show_calendar_action.setChecked(self.calendar.isVisible())
+        self._show_network_action.setChecked(self.network.isVisible())
+        self._show_graph_action.setChecked(self.network.graph.isVisibleTo(self.network))
+        self._show_graph_action.setEnabled(self.network.isVisible())
+        self._adaptive_action.setChecked(self.network.adaptive is not None)
+        self._failover_action.setChecked(self.network.failover)
+        self._metrics_action.setChecked(self.network.metrics_server is not None)
+        self._timer_recording_action.setChecked(timer_stats.is_recording())
+        if IS_WINDOWS:
+            self._startup_action.setChecked(self.is_currently_in_startup)
+
+        stats_windows = self.network.stats.windows if self.network.stats else ()
+        for window, action in self._stats_window_actions.items():
+            action.setChecked(window in stats_windows)
+        smoothing = self.network.smoother.time_constant if self.network.smoother else 0.0
+        targets = self.network.probe_targets
+        self._probe_target_action.setText(f"\u200fمقصد: {targets}..." if targets else "تعیین مقصد...")
+        for actions, current in ((self._font_actions, self.font_size),
+                                 (self._interval_actions, self.network.base_interval),
+                                 (self._smoothing_actions, smoothing),
+                                 (self._probe_interval_actions, self.network.probe_interval)):
+            if current in actions:
+                actions[current].setChecked(True)
+        for value, action in self._opacity_actions.items():
+            if abs(value - self.opacity_level) < 0.01:
+                action.setChecked(True)
 
-        context_menu.exec(event.globalPos())
-        self.menu_is_open = False
+        try:
+            interfaces, error = self.network.interfaces(), None
+        except Exception as e:
+            interfaces, error = None, e
+        if error is not None or interfaces != self._menu_interfaces:
+            self._rebuild_interface_menu(interfaces, error)
+
+        if self.network.interface in self._interface_actions:
+            self._interface_actions[self.network.interface].setChecked(True)
+        elif self._interface_actions:
+            checked = next(iter(self._interface_actions.values())).actionGroup().checkedAction()
+            if checked:
+                checked.setChecked(False)
+
+    def _rebuild_interface_menu(self, interfaces, error=None):
+        """Replaces the interface submenu entries."""
+        self._interface_menu.clear()
+        if self._interface_actions:
+            # The actions belong to their QActionGroup; deleting it deletes them too.
+            next(iter(self._interface_actions.values())).actionGroup().deleteLater()
+        self._interface_actions = {}
+        if error is not None:
+            self._interface_menu.addAction(QAction(f"Error: {error}", self._interface_menu, enabled=False))
+        else:
+            self._interface_actions = self._add_choice_group(
+                self._interface_menu,
+                [("همه اینترفیس‌ها (مجموع)", ALL_INTERFACES)] + [(iface, iface) for iface in interfaces],
+                self.network.set_interface,
+            )
+        self._interface_menu.addSeparator()
+        self._interface_menu.addAction(self._failover_action)
+        self._menu_interfaces = interfaces
 
     def _toggle_calendar_visibility(self, visible):
         """Shows or hides the calendar widget."""
@@ -226,6 +504,44 @@ class MainWidget(QWidget):
         self.background_widget.adjustSize()
         self.adjustSize()
 
+    def _toggle_graph_visibility(self, visible):
+        """Shows or hides the network speed history graph."""
+        self.network.set_graph_visible(visible)
+        self.background_widget.adjustSize()
+        self.adjustSize()
+
+    def _set_metrics_enabled(self, enabled: bool):
+        """Starts or stops the metrics endpoint, telling the user why when it can't start."""
+        error = self.network.set_metrics_enabled(enabled, self.metrics_port)
+        # Saved as running only if it is, so a port in use isn't retried on every start.
+        self.save_config()
+        if error is not None:
+            from html import escape
+            reason = error.strerror if isinstance(error, OSError) and error.strerror else str(error)
+            self._show_error_message(f"سرویس متریک روی پورت {self.metrics_port} راه‌اندازی نشد:<br>{escape(reason)}")
+
+    def _toggle_stats_window(self, window: int, enabled: bool):
+        """Adds or removes a percentile window of the tooltip, keeping any others from the config."""
+        windows = set(self.network.stats.windows if self.network.stats else ())
+        if enabled:
+            windows.add(window)
+        else:
+            windows.discard(window)
+        self.network.set_stats_windows(sorted(windows))
+
+    def _ask_probe_targets(self):
+        """Asks for the RTT/loss probe targets; an empty answer turns the probe off."""
+        dialog = QInputDialog(self)
+        dialog.setWindowTitle("تأخیر و اتلاف بسته")
+        dialog.setWindowIcon(self.app_icon)
+        dialog.setLabelText("مقصدها، جدا با کاما (مثلاً 1.1.1.1 یا udp://host:7). خالی برای خاموش:")
+        dialog.setTextValue(self.network.probe_targets)
+        dialog.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
+        if self._exec_dialog(dialog):
+            self.network.set_probe(dialog.textValue().strip(), self.network.probe_interval)
+            self.background_widget.adjustSize()
+            self.adjustSize()
+
     def _get_startup_shortcut_path(self):
         """Gets the path for the application shortcut in the Windows Startup folder."""
         if not IS_WINDOWS:
@@ -273,14 +589,20 @@ class MainWidget(QWidget):
         self.update_background_style()
 
     def apply_global_font_size(self, size: int, initial: bool = False):
-        """Applies a global font size to the application via stylesheets."""
+        """Applies a global font size to the application.
+
+        Set as the application font rather than an application stylesheet, which would
+        re-polish every widget.
+        """
         if not initial and size == self.font_size:
             return
 
         self.font_size = size
-        font_stylesheet = f"font-size: {self.font_size}pt;"
-        final_stylesheet = (BASE_STYLESHEET % self.font_name) + " QWidget { " + font_stylesheet + " }"
-        QApplication.instance().setStyleSheet(final_stylesheet)
+        font = QFont(self.font_name, self.font_size)
+        QApplication.setFont(font)
+        # The application font reaches widgets through posted events; setting it here too
+        # updates this window's children before the adjustSize() below.
+        self.setFont(font)
 
         if not initial:
             self.save_config()
@@ -290,53 +612,74 @@ class MainWidget(QWidget):
             self.adjustSize()
 
     def save_config(self):
-        """Saves current settings to the config file."""
-        try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                f.write(f"pos_x={self.pos().x()}\n")
-                f.write(f"pos_y={self.pos().y()}\n")
-                f.write(f"calendar_visible={self.calendar.isVisible()}\n")
-                f.write(f"network_visible={self.network.isVisible()}\n")
-                f.write(f"network_interface={self.network.interface or ''}\n")
-                f.write(f"opacity={self.opacity_level}\n")
-                f.write(f"network_interval={self.network.timer.interval()}\n")
-                f.write(f"font_size={self.font_size}\n")
-        except Exception as e:
-            print(f"Error saving config: {e}")
+        """Schedules the current settings to be written to this window's config namespace."""
+        self.config_store.save(Config(
+            pos_x=self.pos().x(),
+            pos_y=self.pos().y(),
+            calendar_visible=self.calendar.isVisible(),
+            network_visible=self.network.isVisible(),
+            network_interface=self.network.interface or "",
+            opacity=self.opacity_level,
+            network_graph=self.network.graph.isVisibleTo(self.network),
+            network_interval=self.network.base_interval,
+            network_adaptive=self.network.adaptive is not None,
+            network_failover=self.network.failover,
+            network_smoothing=self.network.smoother.time_constant if self.network.smoother else 0.0,
+            network_stats_windows=",".join(map(str, self.network.stats.windows)) if self.network.stats else "",
+            probe_targets=self.network.probe_targets,
+            probe_interval=self.network.probe_interval,
+            font_size=self.font_size,
+            holidays_file=self.holidays_file or "",
+            metrics_enabled=self.network.metrics_server is not None,
+            metrics_port=self.metrics_port,
+            hub_port=self.hub_port,
+            views=",".join(self.views.opened_from(self)) if self.views else "",
+        ), self.view_name)
 
     def load_config(self):
-        """Loads settings from the config file on startup."""
-        if not os.path.exists(CONFIG_FILE):
+        """Loads this window's settings from the config file on startup."""
+        config = self.config_store.load(self.view_name)
+        if not self.config_store.exists or config.pos_x is None or config.pos_y is None:
             # On first run, position the widget at the bottom-left of the available screen area.
             def set_initial_position():
+                if self.default_pos is not None:
+                    self.move(*self.default_pos)
+                    self.save_config()
+                    return
                 screen_geometry = QApplication.primaryScreen().geometry()
                 self.move(screen_geometry.left() + 5, screen_geometry.bottom() - self.height() - 5)
 
             QTimer.singleShot(0, set_initial_position)
-            return
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                config = {k: v for k, v in (line.strip().split("=", 1) for line in f if "=" in line)}
-            self.move(int(config.get("pos_x", 100)), int(config.get("pos_y", 100)))
-            self.font_size = int(config.get("font_size", 10))
-            self.opacity_level = float(config.get("opacity", 0.6))
-
-            # Defer applying some configs until widgets are fully initialized.
-            def apply_late_configs():
-                if hasattr(self, 'calendar'):
-                    self.calendar.setVisible(config.get("calendar_visible", "True") == "True")
-                    self.network.setVisible(config.get("network_visible", "True") == "True")
-                    if config.get('network_interface'):
-                        self.network.set_interface(config['network_interface'])
-                    interval = int(config.get("network_interval", 1000))
-                    self.network.set_update_interval(interval)
-                    self.update_background_style()
-                    self.background_widget.adjustSize()
-                    self.adjustSize()
-
-            QTimer.singleShot(10, apply_late_configs)
-        except Exception as e:
-            print(f"Error loading config: {e}")
+        else:
+            self.move(config.pos_x, config.pos_y)
+        self.font_size = config.font_size
+        self.opacity_level = config.opacity
+        self.holidays_file = config.holidays_file or None
+        self.metrics_port = config.metrics_port
+        self.hub_port = config.hub_port
+
+        # Defer applying some configs until widgets are fully initialized.
+        def apply_late_configs():
+            if hasattr(self, 'calendar'):
+                self.calendar.setVisible(config.calendar_visible)
+                self.network.setVisible(config.network_visible)
+                self.network.set_graph_visible(config.network_graph)
+                interface = (self.views.interface if self.views is not None else None) or config.network_interface
+                if interface:
+                    self.network.set_interface(interface)
+                self.network.set_update_interval(config.network_interval)
+                self.network.set_adaptive(config.network_adaptive)
+                self.network.set_failover(config.network_failover)
+                self.network.set_smoothing(config.network_smoothing)
+                self.network.set_stats_windows(parse_windows(config.network_stats_windows))
+                self.network.set_probe(config.probe_targets, config.probe_interval)
+                if config.metrics_enabled:
+                    self._set_metrics_enabled(True)
+                self.update_background_style()
+                self.background_widget.adjustSize()
+                self.adjustSize()
+
+        QTimer.singleShot(10, apply_late_configs)
 
     def _center_dialog(self, dialog):
         """Centers a given dialog on the primary screen."""
@@ -347,6 +690,13 @@ class MainWidget(QWidget):
         y = int(screen_geometry.center().y() - dialog_size.height() / 2)
         dialog.move(x, y)
 
+    def _exec_dialog(self, dialog) -> int:
+        """Shows a dialog modally, centered, and deletes it afterwards instead of keeping it as a child."""
+        self._center_dialog(dialog)
+        result = dialog.exec()
+        dialog.deleteLater()
+        return result
+
     def _show_error_message(self, text: str):
         """Displays a modal error message."""
         msg_box = QMessageBox(self)
@@ -357,8 +707,91 @@ class MainWidget(QWidget):
         ok_button = QPushButton("تأیید")
         ok_button.clicked.connect(msg_box.accept)
         msg_box.addButton(ok_button, QMessageBox.ButtonRole.AcceptRole)
-        self._center_dialog(msg_box)
-        msg_box.exec()
+        self._exec_dialog(msg_box)
+
+    def _show_usage_dialog(self):
+        """Displays traffic totals from the usage log."""
+        # Kept by the process that samples; a window attached to another process has none.
+        usage_log = self.network.hub.sampler.usage_log
+        if usage_log is None:
+            self._show_error_message("گزارش مصرف در دسترس نیست.")
+            return
+        from widgets.jalali_index import PERSIAN_MONTHS
+        from widgets.usage_log import format_bytes
+
+        def row(title, totals):
+            return (f"<tr><td>{title}</td><td align='left'>↓ {format_bytes(totals[0])}</td>"
+                    f"<td align='left'>↑ {format_bytes(totals[1])}</td></tr>")
+
+        days = usage_log.recent_days(30)
+        months = usage_log.recent_months(6)
+        rows = [
+            row("ساعت اخیر", usage_log.total(usage_log.recent_hours(1))),
+            row("امروز", days[-1][1:]),
+            row("دیروز", days[-2][1:]),
+            row("۷ روز اخیر", usage_log.total(days[-7:])),
+            row("۳۰ روز اخیر", usage_log.total(days)),
+        ]
+        rows += [row(f"{PERSIAN_MONTHS[month - 1]} {year}", (recv, sent))
+                 for year, month, recv, sent in reversed(months)]
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("گزارش مصرف")
+        dialog.setWindowIcon(self.app_icon)
+        dialog.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
+        main_layout = QVBoxLayout()
+        label = QLabel(f"<table style='font-size:12pt;' cellspacing='8'>{''.join(rows)}</table>")
+
+        button_layout = QHBoxLayout()
+        ok_button = QPushButton("تایید")
+        ok_button.clicked.connect(dialog.accept)
+        button_layout.addStretch()
+        button_layout.addWidget(ok_button)
+        button_layout.addStretch()
+
+        main_layout.addWidget(label)
+        main_layout.addLayout(button_layout)
+        dialog.setLayout(main_layout)
+        self._exec_dialog(dialog)
+
+    def _show_diagnostics_dialog(self):
+        """Displays timer lateness and callback duration percentiles."""
+        def cells(histogram):
+            return "".join(f"<td align='right'>{value:.2f}</td>" for value in (
+                histogram.percentile(0.50), histogram.percentile(0.95),
+                histogram.percentile(0.99), histogram.max_ns / 1e6))
+
+        header = "".join(f"<th>{title}</th>" for title in ("p50", "p95", "p99", "max"))
+        rows = []
+        for timer in timer_stats.instrumented_timers():
+            stats = timer.stats
+            rows.append(f"<tr><td>{timer.name}</td><td align='right'>{stats.duration.count}</td>"
+                        f"{cells(stats.lateness)}{cells(stats.duration)}</tr>")
+        state = "" if timer_stats.is_recording() else "<p>ثبت آمار خاموش است.</p>"
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("آمار تایمرها")
+        dialog.setWindowIcon(self.app_icon)
+        main_layout = QVBoxLayout()
+        label = QLabel(
+            f"<div dir='rtl'>{state}<p>زمان‌ها بر حسب میلی‌ثانیه هستند.</p>"
+            f"<p>حافظه مقیم برنامه: {rss_bytes() / 2 ** 20:.1f} MB</p></div>"
+            "<table cellspacing='6'>"
+            "<tr><th></th><th></th><th colspan='4'>lateness (ms)</th><th colspan='4'>callback (ms)</th></tr>"
+            f"<tr><th>timer</th><th>fires</th>{header}{header}</tr>{''.join(rows)}</table>"
+        )
+
+        button_layout = QHBoxLayout()
+        ok_button = QPushButton("تایید")
+        ok_button.clicked.connect(dialog.accept)
+        button_layout.addStretch()
+        button_layout.addWidget(ok_button)
+        button_layout.addStretch()
+
+        main_layout.addWidget(label)
+        main_layout.addLayout(button_layout)
+        dialog.setLayout(main_layout)
+        self._exec_dialog(dialog)
 
     def _show_about_dialog(self):
         """Displays the 'About' dialog."""
@@ -389,21 +822,104 @@ class MainWidget(QWidget):
         main_layout.addWidget(label)
         main_layout.addLayout(button_layout)
         dialog.setLayout(main_layout)
-        self._center_dialog(dialog)
-        dialog.exec()
+        self._exec_dialog(dialog)
+
+    def shutdown(self):
+        """Stops this window's timers and sampling and saves its settings."""
+        self.network.stop()
+        if IS_WINDOWS:
+            self.on_top_timer.stop()
+        self.save_config()
 
     def _quit_application(self):
         """Stops all timers, saves config, and cleanly quits the application.
         This is connected to the 'Exit' action to ensure a clean shutdown.
         """
-        self.network.timer.stop()
-        if IS_WINDOWS:
-            self.on_top_timer.stop()
-        self.save_config()
+        if self.views is not None:
+            self.views.quit()
+            return
+        self.shutdown()
+        self.config_store.flush()
+        QApplication.instance().quit()
+
+
+class ViewSet:
+    """The windows of this process, sharing one SampleHub and one ConfigStore.
+
+    The primary window is the one named on the command line; windows opened from its
+    menu are listed in its config and reopened with it.
+    """
+
+    def __init__(self, font_name: str, hub: SampleHub, config_store: ConfigStore, primary: str = ""):
+        self.font_name = font_name
+        self.hub = hub
+        self.config_store = config_store
+        self.primary = primary
+        self.windows = {}  # view name -> MainWidget
+        self.interface = None  # Shown by every window instead of its saved one, e.g. that of a replayed trace.
+
+    def open(self, name: str, default_pos=None) -> MainWidget:
+        window = MainWidget(self.font_name, view_name=name, views=self, default_pos=default_pos)
+        self.windows[name] = window
+        return window
+
+    def open_saved(self):
+        """Opens the primary window and the windows that were open with it last time."""
+        primary = self.open(self.primary)
+        for name in filter(None, self.config_store.load(self.primary).views.split(",")):
+            if name not in self.windows:
+                self.open(name)
+        return primary
+
+    def opened_from(self, window: MainWidget):
+        """Returns the names of the windows to reopen with `window`."""
+        if window.view_name != self.primary:
+            return []
+        return [name for name in self.windows if name != self.primary]
+
+    def open_new(self, opener: MainWidget):
+        """Opens another window just above `opener`."""
+        base = self.primary or "view"
+        number = 2
+        while f"{base}{number}" in self.windows:
+            number += 1
+        window = self.open(f"{base}{number}", default_pos=(opener.x(), opener.y() - opener.height() - 5))
+        window.show()
+        self.windows[self.primary].save_config()
+
+    def close(self, window: MainWidget):
+        """Closes a window other than the primary one; its settings stay for next time."""
+        if window.view_name == self.primary:
+            return
+        window.shutdown()
+        del self.windows[window.view_name]
+        window.close()
+        window.deleteLater()
+        self.windows[self.primary].save_config()
+
+    def show(self):
+        for window in self.windows.values():
+            window.show()
+
+    def bring_to_front(self):
+        """Shows every window above the others, as a second launch asks for."""
+        for window in self.windows.values():
+            window.show()
+            window.raise_()
+            window.activateWindow()
+
+    def quit(self):
+        for window in self.windows.values():
+            window.shutdown()
+        self.config_store.flush()
+        self.hub.stop()
         QApplication.instance().quit()
 
 
 def main():
+    profile = StartupProfile(PROCESS_START)
+    profile.mark("imports")
+
     # Initialize COM for win32com usage on Windows
     if IS_WINDOWS:
         pythoncom.CoInitialize()
@@ -411,7 +927,41 @@ def main():
     # Gracefully handle termination signals like Ctrl+C
     signal.signal(signal.SIGINT, lambda *args: QApplication.quit())
 
+    args = sys.argv[1:]
+    view_name = args[args.index(VIEW_ARG) + 1] if VIEW_ARG in args[:-1] else ""
+    replay = None
+    if REPLAY_ARG in args[:-1]:
+        from widgets.sample_trace import ReplayCounterSource
+        replay_path = args[args.index(REPLAY_ARG) + 1]
+        try:
+            speed = float(args[args.index(SPEED_ARG) + 1]) if SPEED_ARG in args[:-1] else 1.0
+            replay = ReplayCounterSource.open(replay_path, speed)
+        except (OSError, ValueError) as e:
+            print(f"Cannot replay {replay_path}: {e}")
+            return
+        view_name = view_name or REPLAY_VIEW
+    if any(char in view_name for char in ".=,\n"):
+        print(f"Invalid window name {view_name!r}.")
+        return
+    config_store = ConfigStore(legacy_path=LEGACY_CONFIG_FILE)
+    if replay is not None:
+        # A replay is private to this process and is not this machine's traffic.
+        hub = SampleHub(counter_source=replay, clock=replay.clock, record_usage=False)
+    else:
+        # One process samples for every window of this user; later ones attach to it.
+        hub_port = config_store.load().hub_port
+        hub = SampleHub(port=user_hub_port(hub_port) if hub_port else None)
+    hub.start()
+    if hub.client is not None and not view_name:
+        # Started again, e.g. by a double-click with no console: the running process shows its windows instead.
+        hub.client.request_show()
+        print(f"Already running; its windows were brought to the front. Start with {VIEW_ARG} NAME for another set.")
+        hub.stop()
+        return
+    profile.mark("hub")
+
     app = QApplication(sys.argv)
+    profile.mark("qapplication")
 
     font_name = "Vazirmatn FD"
     try:
@@ -422,27 +972,47 @@ def main():
         else:
             base_path = os.path.abspath(".")
 
-        font_path = os.path.join(base_path, "fonts", "Vazirmatn-FD-Regular.ttf")
+        font_path = next((path for path in (os.path.join(base_path, path) for path in FONT_PATHS)
+                          if os.path.exists(path)), None)
 
-        if os.path.exists(font_path):
-            font_id = QFontDatabase.addApplicationFont(font_path)
+        if font_path is not None:
+            # Registered from memory; the file is closed again before any window exists.
+            with open(font_path, "rb") as f:
+                font_id = QFontDatabase.addApplicationFontFromData(f.read())
             if font_id != -1:
                 font_name = QFontDatabase.applicationFontFamilies(font_id)[0]
                 print(f"Font '{font_name}' loaded successfully.")
         else:
-            print(f"Font file not found at: {font_path}")
-
-        app.setStyleSheet(BASE_STYLESHEET % font_name)
+            print(f"Font file not found at: {os.path.join(base_path, FONT_PATHS[-1])}")
 
     except Exception as e:
         print(f"An unexpected error occurred while setting the font: {e}")
-
-    widget = MainWidget(font_name=font_name)
-    widget.show()
+    profile.mark("font")
+
+    views = ViewSet(font_name, hub, config_store, primary=view_name)
+    if replay is not None:
+        views.interface = replay.interface
+    widget = views.open_saved()
+    widget.show_requested.connect(views.bring_to_front)
+    hub.on_show_request = widget.show_requested.emit
+    profile.mark("widgets")
+    views.show()
+    profile.mark("show")
+
+    def first_paint_done():
+        profile.mark("first_paint")
+        profile.report()
+        if QUIT_AFTER_FIRST_PAINT_ARG in sys.argv:
+            QApplication.instance().quit()
+
+    widget.on_first_paint = first_paint_done
 
     try:
         sys.exit(app.exec())
     finally:
+        # Don't lose a change that is still waiting out the save delay.
+        config_store.flush()
+        hub.stop()
         # Uninitialize COM before exiting
         if IS_WINDOWS:
             pythoncom.CoUninitialize()
@@ -1,17 +1,30 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import subprocess
+import sys
 
 block_cipher = None
 
+# Only the committed subset of the UI font is bundled; see subset_fonts.py. The build fails
+# when it lacks a character the app draws, so run `python subset_fonts.py` and commit the result.
+try:
+    import fontTools  # noqa: F401
+except ImportError:
+    print('fontTools is not installed; skipping the font subset check.')
+else:
+    subprocess.run([sys.executable, os.path.join(SPECPATH, 'subset_fonts.py'), '--check'], check=True)
+
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('icon.ico', '.'), ('fonts', 'fonts')],
+    datas=[('icon.ico', '.'), ('fonts/Vazirmatn-FD-Subset.ttf', 'fonts'), ('data', 'data')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Optional and only worth its size with dozens of interfaces; see widgets/aggregate.py.
+    excludes=['numpy'],
     noarchive=False,
     optimize=0,
 )
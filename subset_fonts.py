@@ -0,0 +1,113 @@
+"""Subsets the UI font to the characters the app can draw.
+
+Collects every string literal in main.py and widgets/, the strings in data/*.json, and
+a base set for text that comes from outside (printable ASCII for interface names and
+units, the Persian alphabet and digits for user holiday files), then writes a copy of
+the font with only those characters. Layout features are kept, so Persian letters
+still join and digits stay tabular. The subset is committed and bundled as is: after
+changing user-visible strings, run this by hand and commit the result. main.spec only
+runs --check, which fails the build when the committed subset lacks a character the
+app draws. Needs fontTools (pip install fonttools).
+
+Usage: python subset_fonts.py [--check]
+"""
+import ast
+import glob
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE_FONT = os.path.join(ROOT, "fonts", "Vazirmatn-FD-Regular.ttf")
+SUBSET_FONT = os.path.join(ROOT, "fonts", "Vazirmatn-FD-Subset.ttf")
+
+BASE_CHARACTERS = (
+    {chr(code) for code in range(0x20, 0x7F)}
+    | {chr(code) for code in range(0x0621, 0x063B)}  # Arabic letters used in Persian.
+    | {chr(code) for code in range(0x0640, 0x0653)}  # The rest of them, tatweel and the short vowel marks.
+    | {chr(code) for code in range(0x06F0, 0x06FA)}  # Persian digits.
+    | set("پچژکگیؤ،؛؟«» ‌‍‎‏")
+)
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield key
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def used_characters(root: str = ROOT) -> set:
+    """Returns every character the app may draw."""
+    characters = set(BASE_CHARACTERS)
+    for path in [os.path.join(root, "main.py")] + glob.glob(os.path.join(root, "widgets", "*.py")):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                characters.update(node.value)
+    for path in glob.glob(os.path.join(root, "data", "*.json")):
+        with open(path, encoding="utf-8") as f:
+            for text in _strings(json.load(f)):
+                characters.update(text)
+    # Control characters in literals (newlines, tabs) have no glyphs.
+    return {char for char in characters if char.isprintable() or char in "‌‍‎‏"}
+
+
+def _subset(source: str, unicodes, options):
+    from fontTools import subset
+
+    font = subset.load_font(source, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    return font
+
+
+def subset_font(characters: set, source: str = SOURCE_FONT, target: str = SUBSET_FONT):
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    options = subset.Options()
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    unicodes = set(map(ord, characters))
+    # Ligatures and contextual forms are kept through the layout tables, but FreeType's
+    # autohinter hints a glyph by the characters mapped to it, so a second pass keeps the
+    # mapping of every glyph that made it in. Rendering then matches the full font.
+    kept_glyphs = set(_subset(source, sorted(unicodes), options).getGlyphOrder())
+    unicodes |= {code for code, glyph in TTFont(source).getBestCmap().items() if glyph in kept_glyphs}
+    subset.save_font(_subset(source, sorted(unicodes), options), target, options)
+
+
+def missing_characters(characters: set, path: str = SUBSET_FONT) -> set:
+    """Returns the characters of `characters` that the font at `path` has no glyph for."""
+    from fontTools.ttLib import TTFont
+
+    cmap = TTFont(path).getBestCmap()
+    return {char for char in characters if ord(char) not in cmap}
+
+
+def main():
+    characters = used_characters()
+    if "--check" in sys.argv[1:]:
+        # Only what the source font has can be missing from the subset for a reason.
+        missing = missing_characters(characters) - missing_characters(characters, SOURCE_FONT)
+        if missing:
+            print(f"{SUBSET_FONT} lacks {''.join(sorted(missing))!r}; run python subset_fonts.py")
+            return 1
+        print(f"{SUBSET_FONT} is up to date.")
+        return 0
+    subset_font(characters)
+    print(f"{len(characters)} characters: {os.path.getsize(SOURCE_FONT)} -> {os.path.getsize(SUBSET_FONT)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
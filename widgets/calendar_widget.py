@@ -1,14 +1,49 @@
+import sys
+import time
+import datetime
 import jdatetime
-from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from PyQt6.QtCore import Qt, QPoint, pyqtSlot
+
+from widgets.jalali_index import DAYS_IN_PERSIAN
+from widgets.static_text import StaticTextLabel
+from widgets.timer_stats import InstrumentedTimer
+
+# Optional: used on Linux to hear about suspend/resume from logind.
+try:
+    from PyQt6.QtDBus import QDBusConnection
+except ImportError:
+    QDBusConnection = None
+
+# Upper bound for a single timer wait. The monotonic clock behind QTimer may stop during
+# suspend or miss wall-clock changes we are not notified about, so never trust one wait
+# for longer than this. On Linux a ClockWatch also reports clock and timezone changes
+# as they happen; elsewhere this bounds how long a missed one can show the wrong date.
+MAX_ROLLOVER_WAIT_MS = 6 * 60 * 60 * 1000
+
+
+def next_midnight() -> float:
+    """Returns the epoch time of the next local midnight, honoring DST and the current timezone."""
+    if hasattr(time, "tzset"):
+        # Pick up timezone changes made while the app was running.
+        time.tzset()
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    return datetime.datetime.combine(tomorrow, datetime.time()).timestamp()
+
+
+def ms_until_next_midnight() -> int:
+    """Returns the milliseconds until the next local midnight, honoring DST and the current timezone."""
+    return max(int((next_midnight() - time.time()) * 1000), 0)
 
 
 class CalendarWidget(QWidget):
     """A widget for displaying the Persian (Jalali) calendar date."""
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, occasions_path=None):
         """Initializes the widget."""
         super().__init__(parent)
+        self.occasions_path = occasions_path
+        self.month_view = None
         self.init_ui()
 
     def init_ui(self):
@@ -18,29 +53,64 @@ class CalendarWidget(QWidget):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
 
-        self.label = QLabel()
-        self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.label.setStyleSheet("background-color: transparent; color: white;")
+        self.label = StaticTextLabel(alignment=Qt.AlignmentFlag.AlignCenter)
 
         layout.addWidget(self.label)
 
+        # A single-shot timer armed for the next local midnight instead of polling.
+        self.date_update_timer = InstrumentedTimer("calendar", self.refresh, self)
+        self.date_update_timer.setSingleShot(True)
+        self.date_update_timer.setTimerType(Qt.TimerType.VeryCoarseTimer)
+
+        if QDBusConnection is not None and sys.platform.startswith("linux"):
+            QDBusConnection.systemBus().connect(
+                "org.freedesktop.login1", "/org/freedesktop/login1",
+                "org.freedesktop.login1.Manager", "PrepareForSleep", self._on_prepare_for_sleep
+            )
+
+        self.clock_watch = None
+        if sys.platform.startswith("linux"):
+            from widgets.clock_watch import ClockWatch
+            try:
+                self.clock_watch = ClockWatch(self)
+            except OSError:
+                pass  # No timerfd; the capped timer still catches up eventually.
+            else:
+                self.clock_watch.changed.connect(self.refresh)
+
+        self.refresh()
+
+    def refresh(self):
+        """Updates the date and re-arms the timer for the next rollover.
+
+        Safe to call at any time; call it after resume, clock or timezone changes.
+        """
         self.update_time()
+        # One second of slack so a slightly early timer doesn't land just before midnight.
+        self.date_update_timer.start(min(ms_until_next_midnight() + 1000, MAX_ROLLOVER_WAIT_MS))
+        if self.clock_watch is not None:
+            self.clock_watch.arm(next_midnight() + 1)
 
-        # Set a timer to update the date once a minute
-        self.date_update_timer = QTimer(self)
-        self.date_update_timer.timeout.connect(self.update_time)
-        self.date_update_timer.start(60000)
+    @pyqtSlot(bool)
+    def _on_prepare_for_sleep(self, going_to_sleep):
+        if not going_to_sleep:
+            self.refresh()
 
     def update_time(self):
         """Updates the date label with the current Persian date."""
-        # Weekday names are defined locally for a cleaner class scope
-        days_in_persian = {
-            "Saturday": "شنبه", "Sunday": "یک‌شنبه", "Monday": "دوشنبه",
-            "Tuesday": "سه‌شنبه", "Wednesday": "چهارشنبه", "Thursday": "پنج‌شنبه",
-            "Friday": "جمعه"
-        }
-        now = jdatetime.datetime.now()
-        date_str = now.strftime("%Y/%m/%d")
-        # Using .get prevents an error if the day name isn't found
-        day_str = days_in_persian.get(now.strftime("%A"), "")
-        self.label.setText(f"{day_str}\n{date_str}")
\ No newline at end of file
+        today = jdatetime.date.today()
+        text = f"{DAYS_IN_PERSIAN[today.weekday()]}\n{today.strftime('%Y/%m/%d')}"
+        self.label.setText(text)
+
+    def show_month_view(self):
+        """Opens the Jalali month grid popup just above the widget."""
+        if self.month_view is None:
+            # Imported and built on first use; most sessions never open the month view.
+            from widgets.month_view import MonthView, load_occasions
+            self.month_view = MonthView(load_occasions(self.occasions_path), parent=self)
+        else:
+            self.month_view.show_today()
+        self.month_view.adjustSize()
+        top_left = self.mapToGlobal(QPoint(0, 0))
+        self.month_view.move(top_left.x(), top_left.y() - self.month_view.height() - 8)
+        self.month_view.show()
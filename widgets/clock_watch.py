@@ -0,0 +1,93 @@
+"""Hears about wall-clock and timezone changes on Linux, without polling.
+
+A timerfd on CLOCK_REALTIME armed with TFD_TIMER_CANCEL_ON_SET fires at an absolute
+wall-clock time and is cancelled when the clock is set (by hand, or by an NTP step),
+so the calendar learns about both midnight and clock changes from one descriptor. A
+timezone change leaves the clock alone; it replaces the /etc/localtime symlink, which
+only a watch on /etc itself sees. Windows sends WM_TIMECHANGE to the window instead.
+"""
+import ctypes
+import errno
+import os
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QSocketNotifier, pyqtSignal
+
+CLOCK_REALTIME = 0
+TFD_NONBLOCK = os.O_NONBLOCK
+TFD_CLOEXEC = os.O_CLOEXEC
+TFD_TIMER_ABSTIME = 1
+TFD_TIMER_CANCEL_ON_SET = 2
+LOCALTIME_DIR = "/etc"
+LOCALTIME = "/etc/localtime"
+
+
+class Timespec(ctypes.Structure):
+    _fields_ = [("tv_sec", ctypes.c_long), ("tv_nsec", ctypes.c_long)]
+
+
+class Itimerspec(ctypes.Structure):
+    _fields_ = [("it_interval", Timespec), ("it_value", Timespec)]
+
+
+class ClockWatch(QObject):
+    """Emits `changed` at the armed wall-clock time, and whenever the clock or timezone changes.
+
+    Raises OSError where timerfd isn't available.
+    """
+
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._libc.timerfd_settime.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.POINTER(Itimerspec),
+                                               ctypes.c_void_p]
+        self.fd = self._libc.timerfd_create(CLOCK_REALTIME, TFD_NONBLOCK | TFD_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "timerfd_create failed")
+        self.notifier = QSocketNotifier(self.fd, QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self._on_timer)
+        self.timezone_watcher = QFileSystemWatcher([LOCALTIME_DIR], self)
+        self.timezone_watcher.directoryChanged.connect(self._on_etc_changed)
+        self._localtime = self._localtime_target()
+
+    def arm(self, timestamp: float):
+        """Fires `changed` at the given epoch time, replacing any earlier arming."""
+        spec = Itimerspec()
+        spec.it_value.tv_sec = int(timestamp)
+        spec.it_value.tv_nsec = int((timestamp % 1) * 1e9)
+        if self._libc.timerfd_settime(self.fd, TFD_TIMER_ABSTIME | TFD_TIMER_CANCEL_ON_SET,
+                                      ctypes.byref(spec), None) < 0:
+            error = ctypes.get_errno()
+            # ECANCELED: the clock was set since the last read, which the notifier reports.
+            if error != errno.ECANCELED:
+                raise OSError(error, "timerfd_settime failed")
+
+    def _on_timer(self):
+        try:
+            os.read(self.fd, 8)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if e.errno != errno.ECANCELED:
+                raise
+        # Expired at the armed time, or cancelled because the clock was set.
+        self.changed.emit()
+
+    @staticmethod
+    def _localtime_target():
+        try:
+            return os.path.realpath(LOCALTIME), os.stat(LOCALTIME).st_mtime_ns
+        except OSError:
+            return None
+
+    def _on_etc_changed(self, _path):
+        # Any file in /etc may have changed; only a new /etc/localtime is a timezone change.
+        target = self._localtime_target()
+        if target != self._localtime:
+            self._localtime = target
+            self.changed.emit()
+
+    def close(self):
+        self.notifier.setEnabled(False)
+        os.close(self.fd)
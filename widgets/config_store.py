@@ -0,0 +1,212 @@
+import dataclasses
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+CONFIG_FILE_NAME = "config.txt"
+APP_DIR_NAME = "JalaliCalendarAndNetSpeed"
+# Changes are written only after settings have been quiet for this long.
+DEFAULT_SAVE_DELAY = 1.0
+
+
+@dataclass
+class Config:
+    """Typed application settings, stored as key=value lines."""
+    pos_x: Optional[int] = None  # None until the widget has been placed once.
+    pos_y: Optional[int] = None
+    calendar_visible: bool = True
+    network_visible: bool = True
+    network_interface: str = ""
+    opacity: float = 0.6
+    network_graph: bool = False
+    network_interval: int = 1000
+    network_adaptive: bool = False
+    network_failover: bool = False
+    network_smoothing: float = 0.0  # EWMA time constant of the labels in seconds; 0 shows raw speeds.
+    network_stats_windows: str = "60,3600,86400"  # Tooltip percentile windows in seconds, comma-separated.
+    probe_targets: str = ""  # Comma-separated RTT/loss targets (host[:port] or udp://host:port); empty is off.
+    probe_interval: int = 2000
+    font_size: int = 10
+    holidays_file: str = ""
+    metrics_enabled: bool = False
+    metrics_port: int = 9477
+    # Process-wide, read from the default namespace: the localhost port of the sample hub, plus a
+    # per-user offset; 0 to not share.
+    hub_port: int = 9478
+    views: str = ""  # Comma-separated namespaces of further windows opened from this one.
+
+    @classmethod
+    def parse(cls, text: str, namespace: str = "") -> "Config":
+        """Parses the key=value lines of a namespace; unknown keys and malformed values keep their defaults."""
+        config = cls()
+        field_types = {field.name: field.type for field in dataclasses.fields(cls)}
+        for line in text.splitlines():
+            key, sep, value = line.strip().partition("=")
+            namespace_of_key, _, key = key.rpartition(".")
+            if not sep or namespace_of_key != namespace or key not in field_types:
+                continue
+            try:
+                setattr(config, key, _parse_value(field_types[key], value))
+            except ValueError:
+                print(f"Ignoring invalid config value {key}={value!r}")
+        return config
+
+    def serialize(self, namespace: str = "") -> str:
+        prefix = f"{namespace}." if namespace else ""
+        lines = []
+        for field in dataclasses.fields(self):
+            value = getattr(self, field.name)
+            lines.append(f"{prefix}{field.name}={'' if value is None else value}\n")
+        return "".join(lines)
+
+
+def _namespace_of(line: str) -> str:
+    return line.partition("=")[0].strip().rpartition(".")[0]
+
+
+def namespace_lines(text: str, namespace: str) -> str:
+    """Returns the lines of `text` that belong to a namespace."""
+    return "".join(line + "\n" for line in text.splitlines() if line.strip() and _namespace_of(line) == namespace)
+
+
+def merge_namespaces(text: str, replacements: dict) -> str:
+    """Replaces whole namespaces of a config text, keeping the lines of all others."""
+    kept = [line + "\n" for line in text.splitlines() if line.strip() and _namespace_of(line) not in replacements]
+    # The default namespace comes first, so files without views read as before.
+    return "".join(replacements[namespace] for namespace in sorted(replacements) if not namespace) + \
+        "".join(kept) + "".join(replacements[namespace] for namespace in sorted(replacements) if namespace)
+
+
+def _parse_value(field_type, value: str):
+    if field_type is bool:
+        if value.lower() in ("true", "1", "yes"):
+            return True
+        if value.lower() in ("false", "0", "no"):
+            return False
+        raise ValueError(value)
+    if field_type is int:
+        return int(value)
+    if field_type is float:
+        return float(value)
+    if field_type == Optional[int]:
+        return int(value) if value else None
+    return value
+
+
+def default_config_path() -> str:
+    """Returns the per-user config file location."""
+    if sys.platform == "win32" and os.environ.get("APPDATA"):
+        base = os.environ["APPDATA"]
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, APP_DIR_NAME, CONFIG_FILE_NAME)
+
+
+def atomic_write(path: str, text: str):
+    """Writes text via a temp file, fsync and rename, so readers never see a partial file."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=".config-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ConfigStore:
+    """Loads the config once and persists changes off the calling thread.
+
+    save() only records a snapshot; a background thread writes it once no new snapshot
+    has arrived for `delay` seconds, so a burst of changes costs a single write.
+
+    Every window keeps its settings in its own namespace of the file (`name.key=value`
+    lines; the first window uses plain keys). A write replaces only the namespaces saved
+    through this store and keeps the rest of the file as found on disk, so processes
+    that show different windows don't undo each other's changes.
+    """
+
+    def __init__(self, path: str = None, legacy_path: str = None, delay: float = DEFAULT_SAVE_DELAY):
+        self.path = path or default_config_path()
+        # A config.txt in the working directory from older versions, migrated on first load.
+        self.legacy_path = legacy_path
+        self.delay = delay
+        self.exists = False
+        self._pending = {}  # namespace -> serialized config
+        self._last_change = 0.0
+        self._written = {}
+        self._condition = threading.Condition()
+        # Held from taking a snapshot until it is on disk, so writes land in order.
+        self._write_lock = threading.Lock()
+        self._writer = None
+
+    def load(self, namespace: str = "") -> Config:
+        for path in (self.path, self.legacy_path):
+            if path and os.path.exists(path):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        text = f.read()
+                except OSError as e:
+                    print(f"Error loading config: {e}")
+                    continue
+                self.exists = True
+                if path == self.path:
+                    self._written[namespace] = namespace_lines(text, namespace)
+                return Config.parse(text, namespace)
+        return Config()
+
+    def save(self, config: Config, namespace: str = ""):
+        """Schedules the config to be written after the quiet period."""
+        text = config.serialize(namespace)
+        with self._condition:
+            if text == self._written.get(namespace) and namespace not in self._pending:
+                return
+            self._pending[namespace] = text
+            self._last_change = time.monotonic()
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+                self._writer.start()
+            self._condition.notify()
+
+    def flush(self):
+        """Writes any pending change immediately on the calling thread."""
+        self._write_pending()
+
+    def _write_pending(self):
+        with self._write_lock:
+            with self._condition:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            try:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        current = f.read()
+                except FileNotFoundError:
+                    current = ""
+                atomic_write(self.path, merge_namespaces(current, pending))
+                self._written.update(pending)
+            except Exception as e:
+                print(f"Error saving config: {e}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                remaining = self._last_change + self.delay - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+            self._write_pending()
@@ -0,0 +1,179 @@
+"""Which process owns which socket, from procfs (Linux only).
+
+The kernel's socket tables in /proc/net/{tcp,tcp6,udp,udp6} list every socket with its
+inode and queue sizes, but not its owner. The owner is whoever holds a file descriptor
+linking to `socket:[inode]` under /proc/<pid>/fd. Reading every descriptor of every
+process on each refresh is what makes this slow on busy hosts, so SocketOwnerIndex
+keeps the inode -> pid map between refreshes and only reads the descriptors of
+processes that are new or whose descriptor table changed.
+"""
+import os
+from collections import namedtuple
+
+PROC_ROOT = "/proc"
+SOCKET_TABLES = ("tcp", "tcp6", "udp", "udp6")
+TCP_LISTEN = 0x0A
+SOCKET_LINK_PREFIX = "socket:["
+
+# One row of a socket table; queues are in bytes. For a listening TCP socket the receive
+# queue is its accept backlog.
+SocketEntry = namedtuple("SocketEntry", ["protocol", "inode", "state", "tx_queue", "rx_queue"])
+# The sockets of one process; pid is None for sockets whose owner isn't known.
+ProcessConnections = namedtuple("ProcessConnections",
+                                ["pid", "name", "connections", "listening", "tx_queue", "rx_queue"])
+
+
+def is_supported(root: str = PROC_ROOT) -> bool:
+    return os.path.exists(os.path.join(root, "net", "tcp"))
+
+
+def parse_socket_table(text: str, protocol: str):
+    """Returns the SocketEntry rows of one /proc/net socket table.
+
+    Sockets without an inode (TIME_WAIT, or already closed) belong to nobody and are skipped.
+    """
+    entries = []
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        inode = int(fields[9])
+        if not inode:
+            continue
+        tx_queue, _, rx_queue = fields[4].partition(":")
+        entries.append(SocketEntry(protocol, inode, int(fields[3], 16), int(tx_queue, 16), int(rx_queue, 16)))
+    return entries
+
+
+def read_sockets(root: str = PROC_ROOT):
+    """Returns the sockets of every table this kernel has."""
+    entries = []
+    for protocol in SOCKET_TABLES:
+        try:
+            with open(os.path.join(root, "net", protocol)) as f:
+                text = f.read()
+        except OSError:
+            continue  # No IPv6, for example.
+        entries += parse_socket_table(text, protocol)
+    return entries
+
+
+class SocketOwnerIndex:
+    """An inode -> pid map of sockets, updated incrementally.
+
+    A process is rescanned when it is new or when the stat of its fd directory changed:
+    on procfs its size is the number of open descriptors (Linux 6.2+) and its inode is
+    new for a new process behind a reused pid. A descriptor swapped for another keeps
+    the count, and older kernels report no count at all, so sockets that are still
+    without an owner after that trigger a pass over the remaining processes. Sockets
+    no readable process owns (those of other users, without root) are remembered and
+    don't trigger another pass.
+    """
+
+    def __init__(self, root: str = PROC_ROOT):
+        self.root = root
+        self.owners = {}  # socket inode -> pid
+        self.names = {}  # pid -> process name
+        self.scanned = 0  # Descriptor tables read by the last refresh.
+        self._processes = {}  # pid -> (fd directory stat key, socket inodes)
+        self._ownerless = set()  # Inodes a full pass found no owner for.
+
+    def refresh(self, wanted=()):
+        """Updates the index; `wanted` are the socket inodes that should have an owner."""
+        self.scanned = 0
+        pids = set()
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.name.isdigit():
+                    pids.add(int(entry.name))
+        for pid in self._processes.keys() - pids:
+            self._forget(pid)
+        changed = set()
+        for pid in pids:
+            key = self._fd_key(pid)
+            known = self._processes.get(pid)
+            if known is None or known[0] != key:
+                self._scan(pid, key)
+                changed.add(pid)
+
+        unresolved = set(wanted) - self.owners.keys() - self._ownerless
+        if unresolved:
+            for pid in pids - changed:
+                unresolved.difference_update(self._scan(pid, self._processes[pid][0]))
+                if not unresolved:
+                    break
+            self._ownerless |= unresolved
+        # Only inodes that still exist stay remembered as ownerless.
+        self._ownerless.intersection_update(wanted)
+
+    def _fd_key(self, pid: int):
+        try:
+            stat = os.stat(f"{self.root}/{pid}/fd")
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _scan(self, pid: int, key):
+        """Reads the descriptors of one process, records its sockets and returns their inodes."""
+        known = self._processes.get(pid)
+        if known is not None:
+            self._drop_sockets(pid, known[1])
+        inodes = []
+        path = f"{self.root}/{pid}/fd"
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        target = os.readlink(entry.path)
+                    except OSError:
+                        continue  # Closed while we were reading.
+                    if target.startswith(SOCKET_LINK_PREFIX):
+                        inodes.append(int(target[len(SOCKET_LINK_PREFIX):-1]))
+        except OSError:
+            pass  # Another user's process, or it has just exited.
+        self.scanned += 1
+        for inode in inodes:
+            # A socket shared by several processes (after fork) goes to the first one found.
+            self.owners.setdefault(inode, pid)
+        self._processes[pid] = (key, inodes)
+        self.names[pid] = self._read_name(pid)
+        return inodes
+
+    def _read_name(self, pid: int) -> str:
+        try:
+            with open(f"{self.root}/{pid}/comm") as f:
+                return f.read().strip()
+        except OSError:
+            return str(pid)
+
+    def _drop_sockets(self, pid: int, inodes):
+        for inode in inodes:
+            if self.owners.get(inode) == pid:
+                del self.owners[inode]
+
+    def _forget(self, pid: int):
+        self._drop_sockets(pid, self._processes.pop(pid)[1])
+        self.names.pop(pid, None)
+
+
+def rank_processes(entries, index: SocketOwnerIndex, limit: int = None):
+    """Groups sockets by owning process; returns ProcessConnections, most connections first.
+
+    Processes with as many connections are ordered by their queued bytes.
+    """
+    totals = {}
+    for entry in entries:
+        pid = index.owners.get(entry.inode)
+        total = totals.get(pid)
+        if total is None:
+            total = totals[pid] = [0, 0, 0, 0]
+        total[0] += 1
+        if entry.state == TCP_LISTEN and entry.protocol.startswith("tcp"):
+            total[1] += 1
+        total[2] += entry.tx_queue
+        total[3] += entry.rx_queue
+    ranked = sorted(
+        (ProcessConnections(pid, index.names.get(pid, "?") if pid is not None else "?", *total)
+         for pid, total in totals.items()),
+        key=lambda p: (p.connections, p.tx_queue + p.rx_queue), reverse=True)
+    return ranked[:limit] if limit is not None else ranked
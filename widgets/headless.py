@@ -0,0 +1,108 @@
+"""Headless mode: streams network speed samples to stdout without importing Qt.
+
+Uses the same counter sources, sampler and RateCalculator as the widget, but drives
+the sampler from the calling thread instead of starting it. It can also record the raw
+samples to a trace file, or read them back from one instead of the live counters.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from widgets.counter_sources import ALL_INTERFACES, create_counter_source
+from widgets.rates import RateCalculator, default_interface, format_speed
+from widgets.sampler import NetworkSampler
+
+CSV_FIELDS = ("timestamp", "interface", "download", "upload")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py --headless", description="Stream network speed samples to stdout.")
+    parser.add_argument("--headless", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--interface", help=f"interface to sample, or '{ALL_INTERFACES}' for the total of all "
+                                            "interfaces (default: the one carrying the default route)")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples (default: 1)")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--count", type=int, default=0, help="stop after this many samples (default: run forever)")
+    parser.add_argument("--human", action="store_true", help="format speeds like the widget (e.g. 1.5 MB/s)")
+    parser.add_argument("--record", metavar="FILE", help="also write the raw samples to a trace file (.gz to compress)")
+    parser.add_argument("--replay", metavar="FILE", help="read samples from a trace file instead of the counters")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay this many times faster than recorded; 0 replays as fast as possible (default: 1)")
+    return parser.parse_args(argv)
+
+
+def run(args, out=sys.stdout) -> int:
+    replay = None
+    if args.replay:
+        from widgets.sample_trace import ReplayCounterSource
+        try:
+            replay = ReplayCounterSource.open(args.replay, args.speed)
+        except (OSError, ValueError) as e:
+            print(f"Cannot replay {args.replay}: {e}", file=sys.stderr)
+            return 1
+    interface = args.interface or (replay.interface if replay else default_interface())
+    if not interface:
+        print("No active network interface found; use --interface.", file=sys.stderr)
+        return 1
+
+    if replay is not None:
+        sampler = NetworkSampler(replay, interface, int(args.interval * 1000), clock=replay.clock)
+        wall_time = replay.wall_time
+        # --interval is in trace time, so a faster replay sleeps less.
+        sleep_interval = args.interval / args.speed if args.speed > 0 else 0
+    else:
+        sampler = NetworkSampler(create_counter_source(), interface, int(args.interval * 1000))
+        wall_time = time.time
+        sleep_interval = args.interval
+    recorder = None
+    if args.record:
+        from widgets.sample_trace import TraceWriter
+        recorder = TraceWriter(args.record)
+    rates = RateCalculator()
+    writer = None
+    if args.format == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(CSV_FIELDS)
+        out.flush()
+
+    emitted = 0
+    next_sample = time.monotonic()
+    try:
+        while not args.count or emitted < args.count:
+            sampler.sample_once()
+            sample = sampler.ring.drain_latest()
+            if recorder is not None:
+                recorder.write(sample)
+            speeds = rates.update(sample)
+            if speeds is not None:
+                download, upload = speeds
+                if args.human:
+                    download, upload = format_speed(download), format_speed(upload)
+                row = (round(wall_time(), 3), interface, download, upload)
+                if writer is not None:
+                    writer.writerow(row)
+                else:
+                    out.write(json.dumps(dict(zip(CSV_FIELDS, row))) + "\n")
+                out.flush()
+                emitted += 1
+            elif sample.error or not sample.counters:
+                print(f"Cannot read counters of {interface}.", file=sys.stderr)
+            if replay is not None and replay.finished:
+                break
+            # Sleep on a fixed schedule so the stream doesn't drift with the read time.
+            next_sample += sleep_interval
+            time.sleep(max(next_sample - time.monotonic(), 0))
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        sampler.counter_source.close()
+        if recorder is not None:
+            recorder.close()
+    return 0
+
+
+def main(argv) -> int:
+    return run(parse_args(argv))
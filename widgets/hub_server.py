@@ -0,0 +1,119 @@
+"""The owner's side of the sample hub: serves samples to readers in other processes.
+
+Kept apart from sample_hub and imported by its HubListener only once the first reader
+connects, since asyncio adds several megabytes to a process; owning the port until then
+and attaching to another process need plain sockets only.
+"""
+import asyncio
+import hmac
+import socket
+import struct
+
+from widgets.sample_hub import (AUTH_TIMEOUT, FRAME_LENGTH, HELLO, MAX_REQUEST, MAX_WRITE_BUFFER, SHOW_REQUEST,
+                                TOKEN_SIZE, decode_request)
+
+
+class RemoteReader:
+    """A reader in another process, as the owning hub sees it."""
+
+    def __init__(self, hub, loop, writer):
+        self.hub = hub
+        self.loop = loop
+        self.writer = writer
+        self.interface = None
+        self.interval_ms = 0
+        self.active = False
+
+    def set_request(self, interval_ms: int, interface):
+        if interval_ms == SHOW_REQUEST:
+            self.hub.request_show()
+            return
+        self.interface = interface
+        # Any process of the user may ask; none gets the sampler to spin faster than the menu allows.
+        self.interval_ms = max(interval_ms, self.hub.min_request_ms) if interval_ms else 0
+        self.active = interval_ms > 0
+        self.hub.update_schedule(sample_now=self.active)
+
+    def deliver(self, sample):
+        # Sent whole: the reader's process picks out what each of its views needs.
+        if self.active:
+            try:
+                self.loop.call_soon_threadsafe(self._write, self.hub.encoded(sample))
+            except RuntimeError:
+                pass  # The server is shutting down.
+
+    def _write(self, frame: bytes):
+        if self.writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self.writer.close()
+        elif not self.writer.is_closing():
+            self.writer.write(frame)
+
+
+class HubServer:
+    """Serves the owner's samples to readers in other processes that send the hub's token, over localhost.
+
+    run() blocks the calling thread until stop() is called from another one.
+    """
+
+    def __init__(self, hub, sock: socket.socket):
+        self.hub = hub
+        self.sock = sock
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._stopping = False
+        self._connections = {}  # handler task -> writer
+
+    async def _handle(self, reader, writer):
+        self._connections[asyncio.current_task()] = writer
+        remote = None
+        try:
+            # Only processes that could read the token file get the greeting, samples or a say.
+            token = await asyncio.wait_for(reader.readexactly(TOKEN_SIZE), AUTH_TIMEOUT)
+            if not hmac.compare_digest(token, self.hub.token):
+                return
+            remote = RemoteReader(self.hub, self._loop, writer)
+            writer.write(HELLO)
+            self.hub.attach_reader(remote)
+            while True:
+                (length,) = FRAME_LENGTH.unpack(await reader.readexactly(FRAME_LENGTH.size))
+                if length > MAX_REQUEST:
+                    break
+                remote.set_request(*decode_request(await reader.readexactly(length)))
+        except (asyncio.IncompleteReadError, TimeoutError, ConnectionError, ValueError, struct.error):
+            pass
+        finally:
+            del self._connections[asyncio.current_task()]
+            if remote is not None:
+                self.hub.detach(remote)
+            writer.close()
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._handle, sock=self.sock)
+        if self._stopping:
+            self._server.close()  # Stopped before the server existed.
+            return
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        # Readers learn that the owner is gone from their connection closing.
+        await asyncio.gather(*self._connections, return_exceptions=True)
+
+    def _close(self):
+        self._stopping = True
+        if self._server is not None:
+            self._server.close()
+        for writer in self._connections.values():
+            writer.close()
+
+    def run(self):
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+
+    def stop(self):
+        try:
+            self._loop.call_soon_threadsafe(self._close)
+        except RuntimeError:
+            pass  # The loop has already been closed.
@@ -0,0 +1,238 @@
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+from collections import namedtuple
+
+# --- rtnetlink constants (linux/netlink.h, linux/rtnetlink.h, linux/if.h) ---
+NETLINK_ROUTE = 0
+RTMGRP_LINK = 0x1
+NLMSG_HDR = struct.Struct("=IHHII")  # length, type, flags, seq, pid
+IFINFO_MSG = struct.Struct("=BxHiII")  # family, type, index, flags, change
+RTA_HDR = struct.Struct("=HH")  # length, type
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+IFLA_IFNAME = 3
+IFF_UP = 0x1
+IFF_RUNNING = 0x40
+
+PROC_NET_ROUTE = "/proc/net/route"
+DEFAULT_POLL_INTERVAL = 5.0
+
+# kind is one of "add", "remove", "up" or "down".
+LinkEvent = namedtuple("LinkEvent", ["kind", "index", "name"])
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def build_link_message(msg_type: int, index: int, name: str, up: bool = True, seq: int = 0) -> bytes:
+    """Encodes an RTM_NEWLINK/RTM_DELLINK message, e.g. for replaying events to a watcher."""
+    flags = IFF_UP | IFF_RUNNING if up else 0
+    name_bytes = name.encode() + b"\0"
+    attribute = RTA_HDR.pack(RTA_HDR.size + len(name_bytes), IFLA_IFNAME) + name_bytes
+    attribute += b"\0" * (_align(len(attribute)) - len(attribute))
+    body = IFINFO_MSG.pack(socket.AF_UNSPEC, 0, index, flags, 0xFFFFFFFF) + attribute
+    return NLMSG_HDR.pack(NLMSG_HDR.size + len(body), msg_type, 0, seq, 0) + body
+
+
+def build_dump_request(seq: int = 1) -> bytes:
+    """Encodes an RTM_GETLINK dump request for every link."""
+    body = IFINFO_MSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0)
+    return NLMSG_HDR.pack(NLMSG_HDR.size + len(body), RTM_GETLINK, NLM_F_REQUEST | NLM_F_DUMP, seq, 0) + body
+
+
+def _ends_dump(data: bytes) -> bool:
+    offset = 0
+    while offset + NLMSG_HDR.size <= len(data):
+        length, msg_type, _, _, _ = NLMSG_HDR.unpack_from(data, offset)
+        if msg_type in (NLMSG_DONE, NLMSG_ERROR) or length < NLMSG_HDR.size:
+            return True
+        offset += _align(length)
+    return False
+
+
+def dump_links(timeout: float = 1.0):
+    """Returns {index: (name, up)} for every link the kernel has right now."""
+    links = {}
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+        sock.settimeout(timeout)
+        sock.send(build_dump_request())
+        while True:
+            data = sock.recv(65536)
+            for _, index, name, up in parse_link_messages(data):
+                links[index] = (name, up)
+            if not data or _ends_dump(data):
+                return links
+
+
+def parse_link_messages(data: bytes):
+    """Yields (msg_type, index, name, up) for every link message in a netlink datagram."""
+    offset = 0
+    while offset + NLMSG_HDR.size <= len(data):
+        length, msg_type, _, _, _ = NLMSG_HDR.unpack_from(data, offset)
+        if length < NLMSG_HDR.size or msg_type == NLMSG_DONE:
+            break
+        if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+            body = offset + NLMSG_HDR.size
+            _, _, index, flags, _ = IFINFO_MSG.unpack_from(data, body)
+            name = None
+            attr = body + IFINFO_MSG.size
+            end = offset + length
+            while attr + RTA_HDR.size <= end:
+                attr_length, attr_type = RTA_HDR.unpack_from(data, attr)
+                if attr_length < RTA_HDR.size:
+                    break
+                if attr_type == IFLA_IFNAME:
+                    name = data[attr + RTA_HDR.size:attr + attr_length].split(b"\0", 1)[0].decode(errors="replace")
+                attr += _align(attr_length)
+            up = bool(flags & IFF_UP) and bool(flags & IFF_RUNNING)
+            yield msg_type, index, name, up
+        offset += _align(length)
+
+
+class NetlinkWatcher(threading.Thread):
+    """Listens for rtnetlink link events and reports interface add/remove/up/down changes.
+
+    The thread blocks in select() until the kernel sends a message, so it causes no
+    wakeups while nothing changes. `sock` can be any datagram socket delivering netlink
+    messages, which lets a socketpair stand in for the kernel; `links` then seeds the
+    links that exist at start. With the kernel's socket they come from an RTM_GETLINK
+    dump, so the first message about a link that already existed reports "down" or
+    "up" rather than "add".
+    """
+
+    def __init__(self, callback, sock=None, links=None):
+        super().__init__(name="NetlinkWatcher", daemon=True)
+        self.callback = callback
+        self._dump_links = sock is None and links is None
+        if sock is None:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK))
+        self.sock = sock
+        self.links = dict(links or {})  # index -> (name, up)
+        self._wake_read, self._wake_write = os.pipe()
+        self._running = True
+
+    def handle_datagram(self, data: bytes):
+        """Turns one netlink datagram into LinkEvents and reports them."""
+        events = []
+        for msg_type, index, name, up in parse_link_messages(data):
+            known = self.links.get(index)
+            if msg_type == RTM_DELLINK:
+                self.links.pop(index, None)
+                events.append(LinkEvent("remove", index, name or (known[0] if known else None)))
+                continue
+            self.links[index] = (name, up)
+            if known is None:
+                events.append(LinkEvent("add", index, name))
+            elif known[1] != up:
+                events.append(LinkEvent("up" if up else "down", index, name))
+        if events:
+            self.callback(events)
+
+    def run(self):
+        if self._dump_links:
+            # Subscribed before dumping, so a change in between is either in the dump or queued.
+            try:
+                self.links = dump_links()
+            except OSError:
+                pass  # Links then show up as "add" on their first message.
+        try:
+            while self._running:
+                readable, _, _ = select.select([self.sock, self._wake_read], [], [])
+                if self.sock in readable:
+                    self.handle_datagram(self.sock.recv(65536))
+        except OSError:
+            pass
+        finally:
+            self.sock.close()
+            os.close(self._wake_read)
+            os.close(self._wake_write)
+
+    def stop(self):
+        self._running = False
+        os.write(self._wake_write, b"\0")
+
+
+class PollingWatcher(threading.Thread):
+    """Fallback for platforms without rtnetlink: diffs psutil's interface stats periodically."""
+
+    def __init__(self, callback, interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__(name="InterfacePoller", daemon=True)
+        self.callback = callback
+        self.interval = interval
+        self.links = None  # name -> up
+        self._stop_event = threading.Event()
+
+    def poll_once(self):
+        import psutil
+        current = {name: stats.isup for name, stats in psutil.net_if_stats().items()}
+        if self.links is not None:
+            events = [LinkEvent("remove", -1, name) for name in self.links.keys() - current.keys()]
+            for name, up in current.items():
+                if name not in self.links:
+                    events.append(LinkEvent("add", -1, name))
+                elif self.links[name] != up:
+                    events.append(LinkEvent("up" if up else "down", -1, name))
+            if events:
+                self.callback(events)
+        self.links = current
+
+    def run(self):
+        while not self._stop_event.wait(0 if self.links is None else self.interval):
+            try:
+                self.poll_once()
+            except Exception:
+                pass
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def create_interface_watcher(callback):
+    """Returns an unstarted watcher: rtnetlink on Linux, psutil polling elsewhere."""
+    if sys.platform.startswith("linux") and hasattr(socket, "AF_NETLINK"):
+        try:
+            return NetlinkWatcher(callback)
+        except OSError:
+            pass
+    return PollingWatcher(callback)
+
+
+def default_route_interface():
+    """Returns the interface that carries the default IPv4 route, or None."""
+    if os.path.exists(PROC_NET_ROUTE):
+        best = None
+        with open(PROC_NET_ROUTE, "r") as f:
+            next(f, None)
+            for line in f:
+                fields = line.split()
+                # Iface Destination Gateway Flags RefCnt Use Metric Mask ...
+                if len(fields) > 7 and fields[1] == "00000000" and fields[7] == "00000000":
+                    metric = int(fields[6])
+                    if best is None or metric < best[0]:
+                        best = (metric, fields[0])
+        return best[1] if best else None
+
+    # Elsewhere, let the OS pick a source address for a public destination (a UDP
+    # connect sends no packets) and find the interface that owns it.
+    import psutil
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+            probe.connect(("192.0.2.1", 9))
+            local_address = probe.getsockname()[0]
+    except OSError:
+        return None
+    for name, addresses in psutil.net_if_addrs().items():
+        if any(address.address == local_address for address in addresses):
+            return name
+    return None
@@ -0,0 +1,89 @@
+from array import array
+
+from widgets.jalali_index import DAYS_IN_PERSIAN, FIRST_HALF_DAYS, get_index
+
+# Optional: vectorized conversion for tools that convert millions of timestamps. The app
+# itself never calls this module and doesn't ship NumPy; without it the same API runs
+# a loop over the JalaliIndex (bench_jalali_batch.py measures both).
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SECONDS_PER_DAY = 86400
+EPOCH_ORDINAL = 719163  # date(1970, 1, 1).toordinal()
+
+# Zero-padded "MM" and "DD" strings, indexed by the month or day number.
+_TWO_DIGITS = tuple(f"{n:02d}" for n in range(32))
+
+
+def epoch_to_ordinals(timestamps, utc_offset: int = 0):
+    """Converts epoch seconds to proleptic Gregorian ordinals of the local date.
+
+    `utc_offset` is the fixed offset of the target timezone in seconds (e.g. 12600 for
+    Tehran). Accepts a NumPy array or anything supporting the buffer protocol.
+    """
+    if np is not None:
+        seconds = np.asarray(timestamps, dtype=np.int64) + utc_offset
+        return seconds // SECONDS_PER_DAY + EPOCH_ORDINAL
+    return array('q', ((int(t) + utc_offset) // SECONDS_PER_DAY + EPOCH_ORDINAL for t in timestamps))
+
+
+def ordinals_to_jalali(ordinals, index=None):
+    """Converts Gregorian ordinals to Jalali dates in bulk.
+
+    Returns (years, months, days, weekdays) arrays, weekday 0 being Saturday as in
+    jdatetime. Uses NumPy when available; raises ValueError for ordinals outside the
+    index's year range.
+    """
+    index = index or get_index()
+    if np is None:
+        return _ordinals_to_jalali_loop(ordinals, index)
+
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+    year_starts = np.frombuffer(index.year_starts, dtype=np.int64)
+    if ordinals.size and (ordinals.min() < year_starts[0] or ordinals.max() >= year_starts[-1]):
+        raise ValueError("ordinals are outside the indexed year range")
+
+    offsets = np.searchsorted(year_starts, ordinals, side="right") - 1
+    day_of_year = ordinals - year_starts[offsets]
+    first_half = day_of_year < FIRST_HALF_DAYS
+    second_half_day = day_of_year - FIRST_HALF_DAYS
+    months = np.where(first_half, day_of_year // 31, second_half_day // 30 + 6) + 1
+    days = np.where(first_half, day_of_year % 31, second_half_day % 30) + 1
+    years = offsets + index.first_year
+    weekdays = (ordinals + 1) % 7
+    return (years.astype(np.int16), months.astype(np.int8),
+            days.astype(np.int8), weekdays.astype(np.int8))
+
+
+def _ordinals_to_jalali_loop(ordinals, index):
+    years, months, days, weekdays = array('h'), array('b'), array('b'), array('b')
+    for ordinal in ordinals:
+        year, month, day = index.from_ordinal(int(ordinal))
+        years.append(year)
+        months.append(month)
+        days.append(day)
+        weekdays.append(index.weekday(int(ordinal)))
+    return years, months, days, weekdays
+
+
+def epoch_to_jalali(timestamps, utc_offset: int = 0, index=None):
+    """Converts epoch seconds straight to (years, months, days, weekdays) arrays."""
+    return ordinals_to_jalali(epoch_to_ordinals(timestamps, utc_offset), index)
+
+
+def format_jalali(years, months, days, weekdays=None):
+    """Formats converted dates as "%Y/%m/%d" strings.
+
+    With weekdays the result matches CalendarWidget's label: the Persian weekday name,
+    a newline, then the date.
+    """
+    if np is not None:
+        years, months, days = (np.asarray(a).tolist() for a in (years, months, days))
+    dates = [f"{y}/{_TWO_DIGITS[m]}/{_TWO_DIGITS[d]}" for y, m, d in zip(years, months, days)]
+    if weekdays is None:
+        return dates
+    if np is not None:
+        weekdays = np.asarray(weekdays).tolist()
+    return [f"{DAYS_IN_PERSIAN[w]}\n{date}" for w, date in zip(weekdays, dates)]
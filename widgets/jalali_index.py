@@ -0,0 +1,106 @@
+import functools
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+import jdatetime
+
+# Indexed by jdatetime's weekday(), where Saturday is 0.
+DAYS_IN_PERSIAN = ("شنبه", "یک‌شنبه", "دوشنبه", "سه‌شنبه", "چهارشنبه", "پنج‌شنبه", "جمعه")
+
+PERSIAN_MONTHS = (
+    "فروردین", "اردیبهشت", "خرداد", "تیر", "مرداد", "شهریور",
+    "مهر", "آبان", "آذر", "دی", "بهمن", "اسفند",
+)
+
+# Day-of-year offset of the first day of each month; Esfand's length depends on the leap year.
+MONTH_OFFSETS = (0, 31, 62, 93, 124, 155, 186, 216, 246, 276, 306, 336)
+FIRST_HALF_DAYS = 186  # Farvardin through Shahrivar have 31 days each.
+
+DEFAULT_FIRST_YEAR = 1200
+DEFAULT_LAST_YEAR = 1600
+
+# A month laid out as 6 weeks of 7 days, Saturday first; cells outside the month are 0.
+MonthGrid = namedtuple("MonthGrid", ["year", "month", "length", "first_weekday", "start_ordinal", "weeks"])
+
+
+class JalaliIndex:
+    """Compact Jalali <-> Gregorian lookup table.
+
+    The only stored data is the Gregorian ordinal of 1 Farvardin for every year in the
+    range (plus one year past the end, which yields the last year's length). Month
+    starts, month lengths and weekdays all follow arithmetically from it, so converting
+    a date or laying out a month never constructs a jdatetime object.
+    """
+
+    def __init__(self, first_year: int = DEFAULT_FIRST_YEAR, last_year: int = DEFAULT_LAST_YEAR):
+        self.first_year = first_year
+        self.last_year = last_year
+        self.year_starts = array('q', (
+            jdatetime.date(year, 1, 1).togregorian().toordinal()
+            for year in range(first_year, last_year + 2)
+        ))
+
+    def _year_offset(self, year: int) -> int:
+        if not self.first_year <= year <= self.last_year:
+            raise ValueError(f"year {year} is outside {self.first_year}..{self.last_year}")
+        return year - self.first_year
+
+    def year_length(self, year: int) -> int:
+        offset = self._year_offset(year)
+        return self.year_starts[offset + 1] - self.year_starts[offset]
+
+    def is_leap(self, year: int) -> bool:
+        return self.year_length(year) == 366
+
+    def month_length(self, year: int, month: int) -> int:
+        if month <= 6:
+            return 31
+        if month <= 11:
+            return 30
+        return self.year_length(year) - MONTH_OFFSETS[11]
+
+    def to_ordinal(self, year: int, month: int, day: int) -> int:
+        """Returns the proleptic Gregorian ordinal of a Jalali date."""
+        return self.year_starts[self._year_offset(year)] + MONTH_OFFSETS[month - 1] + day - 1
+
+    def from_ordinal(self, ordinal: int):
+        """Returns (year, month, day) for a proleptic Gregorian ordinal."""
+        offset = bisect_right(self.year_starts, ordinal) - 1
+        if not 0 <= offset <= self.last_year - self.first_year:
+            raise ValueError(f"ordinal {ordinal} is outside the indexed range")
+        day_of_year = ordinal - self.year_starts[offset]
+        if day_of_year < FIRST_HALF_DAYS:
+            month, day = divmod(day_of_year, 31)
+        else:
+            month, day = divmod(day_of_year - FIRST_HALF_DAYS, 30)
+            month += 6
+        return self.first_year + offset, month + 1, day + 1
+
+    @staticmethod
+    def weekday(ordinal: int) -> int:
+        """Returns the Jalali weekday of an ordinal, with Saturday as 0 like jdatetime."""
+        # Ordinal 1 (1 January of year 1) was a Monday, i.e. Jalali weekday 2.
+        return (ordinal + 1) % 7
+
+    def month_grid(self, year: int, month: int) -> MonthGrid:
+        """Lays out a month as a 6x7 grid of day numbers in constant time."""
+        start = self.to_ordinal(year, month, 1)
+        length = self.month_length(year, month)
+        first_weekday = self.weekday(start)
+        cells = [0] * first_weekday + list(range(1, length + 1))
+        cells += [0] * (42 - len(cells))
+        weeks = tuple(tuple(cells[i:i + 7]) for i in range(0, 42, 7))
+        return MonthGrid(year, month, length, first_weekday, start, weeks)
+
+
+@functools.lru_cache(maxsize=1)
+def get_index() -> JalaliIndex:
+    """Returns the shared index covering the default year range, building it on first use."""
+    return JalaliIndex()
+
+
+@functools.lru_cache(maxsize=64)
+def month_grid(year: int, month: int) -> MonthGrid:
+    """Memoized month grid from the shared index."""
+    return get_index().month_grid(year, month)
@@ -0,0 +1,218 @@
+import asyncio
+import math
+import socket
+import struct
+import threading
+import time
+from array import array
+from collections import namedtuple
+
+from widgets.probe_targets import DEFAULT_PROBE_INTERVAL, ProbeTarget
+
+# A probe without an answer after this long counts as lost.
+DEFAULT_PROBE_TIMEOUT = 2.0
+# Results kept per target; loss and the median RTT are over this many probes.
+DEFAULT_PROBE_WINDOW = 20
+# Probes in flight across all targets; more targets than this wait for a free slot.
+DEFAULT_MAX_IN_FLIGHT = 32
+# A UDP probe carries its sequence number, which the echo must send back unchanged.
+UDP_PAYLOAD = struct.Struct("!Q")
+
+# Immutable view of one target's window, published to the GUI thread. RTTs are in seconds
+# and None while nothing has come back; loss is a fraction of the probes in the window.
+ProbeSummary = namedtuple("ProbeSummary", ["target", "last_rtt", "median_rtt", "loss", "count"])
+
+
+class ProbeWindow:
+    """The latest results of one target in a fixed-size ring; NaN marks a lost probe."""
+
+    __slots__ = ("size", "rtts", "count")
+
+    def __init__(self, size: int = DEFAULT_PROBE_WINDOW):
+        self.size = size
+        self.rtts = array('d', bytes(8 * size))
+        self.count = 0  # Total number of results ever recorded.
+
+    def record(self, rtt):
+        self.rtts[self.count % self.size] = math.nan if rtt is None else rtt
+        self.count += 1
+
+    def summary(self, target: ProbeTarget) -> ProbeSummary:
+        count = min(self.count, self.size)
+        if not count:
+            return ProbeSummary(target, None, None, 0.0, 0)
+        last = self.rtts[(self.count - 1) % self.size]
+        answered = sorted(rtt for rtt in (self.rtts if count == self.size else self.rtts[:count])
+                          if not math.isnan(rtt))
+        median = answered[len(answered) // 2] if answered else None
+        return ProbeSummary(target, None if math.isnan(last) else last, median,
+                            1 - len(answered) / count, count)
+
+
+class _EchoProtocol(asyncio.DatagramProtocol):
+    """Matches UDP echoes to the probes waiting for them by sequence number."""
+
+    def __init__(self):
+        self.waiting = {}  # sequence number -> future
+
+    def datagram_received(self, data, addr):
+        if len(data) < UDP_PAYLOAD.size:
+            return
+        future = self.waiting.pop(UDP_PAYLOAD.unpack_from(data)[0], None)
+        if future is not None and not future.done():
+            future.set_result(time.perf_counter())
+
+    def error_received(self, exc):
+        # An ICMP error (e.g. port unreachable) arrives here; the probe simply times out.
+        pass
+
+
+class LatencyProbe(threading.Thread):
+    """Measures round-trip time and loss to a set of targets on a background asyncio loop.
+
+    Every interval each target gets one probe: a TCP connect, whose handshake (or the
+    refusal of it) is the round trip, or a UDP datagram that an echo service returns.
+    A target whose previous probe is still out is skipped, and at most `max_in_flight`
+    probes run at once, so a slow network never piles up sockets. Results go into a
+    fixed-size ProbeWindow per target. After every result the thread publishes a tuple
+    of ProbeSummary as `summaries`, a single reference assignment the GUI thread can
+    read at any time without a lock. While paused the loop waits without a timeout.
+    """
+
+    def __init__(self, targets, interval_ms: int = DEFAULT_PROBE_INTERVAL, timeout: float = DEFAULT_PROBE_TIMEOUT,
+                 window: int = DEFAULT_PROBE_WINDOW, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        super().__init__(name="LatencyProbe", daemon=True)
+        self.targets = list(targets)
+        self.interval = interval_ms / 1000
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.windows = {target: ProbeWindow(window) for target in self.targets}
+        self.summaries = tuple(ProbeSummary(target, None, None, 0.0, 0) for target in self.targets)
+        self.in_flight = 0
+        self.max_seen_in_flight = 0
+        self._loop = None
+        self._wake = None
+        self._paused = False
+        self._running = True
+        self._addresses = {}  # target -> resolved (host, port), dropped when a probe fails
+        self._echo = {}  # UDP target -> (transport, _EchoProtocol)
+        self._pending = set()  # Targets with a probe out.
+        self._sequence = 0
+
+    def set_interval(self, ms: int):
+        self.interval = ms / 1000
+        self._wake_loop()
+
+    def pause(self):
+        self._paused = True
+        self._wake_loop()
+
+    def resume(self):
+        self._paused = False
+        self._wake_loop()
+
+    def stop(self):
+        self._running = False
+        self._wake_loop()
+
+    def _wake_loop(self):
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # The loop closed in between.
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        self._wake = asyncio.Event()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            for transport, _ in self._echo.values():
+                transport.close()
+            self._loop.close()
+
+    async def _run(self):
+        slots = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+        while self._running:
+            if self._paused:
+                await self._wake.wait()
+                self._wake.clear()
+                continue
+            for target in self.targets:
+                if target not in self._pending:
+                    self._pending.add(target)
+                    task = asyncio.ensure_future(self._probe(target, slots))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+        for task in list(tasks):
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _probe(self, target: ProbeTarget, slots):
+        try:
+            async with slots:
+                self.in_flight += 1
+                self.max_seen_in_flight = max(self.max_seen_in_flight, self.in_flight)
+                try:
+                    rtt = await self._measure(target)
+                finally:
+                    self.in_flight -= 1
+            self.windows[target].record(rtt)
+            self.summaries = tuple(self.windows[t].summary(t) for t in self.targets)
+        finally:
+            self._pending.discard(target)
+
+    async def _measure(self, target: ProbeTarget):
+        """Returns the round-trip time in seconds, or None if the probe was lost."""
+        try:
+            address = self._addresses.get(target)
+            if address is None:
+                # Resolved once and outside the timed part, so DNS never counts as RTT.
+                infos = await asyncio.wait_for(self._loop.getaddrinfo(
+                    target.host, target.port,
+                    type=socket.SOCK_STREAM if target.kind == "tcp" else socket.SOCK_DGRAM),
+                    self.timeout)
+                address = self._addresses[target] = infos[0][4][:2]
+            if target.kind == "udp":
+                return await self._measure_udp(target, address)
+            return await self._measure_tcp(address)
+        except (OSError, asyncio.TimeoutError):
+            self._addresses.pop(target, None)
+            return None
+
+    async def _measure_tcp(self, address):
+        started = time.perf_counter()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(*address), self.timeout)
+        except ConnectionRefusedError:
+            # The host answered the handshake with a reset; that is a round trip too.
+            return time.perf_counter() - started
+        rtt = time.perf_counter() - started
+        writer.close()
+        return rtt
+
+    async def _measure_udp(self, target: ProbeTarget, address):
+        endpoint = self._echo.get(target)
+        if endpoint is None or endpoint[0].is_closing():
+            endpoint = self._echo[target] = await self._loop.create_datagram_endpoint(
+                _EchoProtocol, remote_addr=address)
+        transport, protocol = endpoint
+        self._sequence += 1
+        sequence = self._sequence
+        answered = self._loop.create_future()
+        protocol.waiting[sequence] = answered
+        started = time.perf_counter()
+        transport.sendto(UDP_PAYLOAD.pack(sequence))
+        try:
+            return await asyncio.wait_for(answered, self.timeout) - started
+        except asyncio.TimeoutError:
+            protocol.waiting.pop(sequence, None)
+            return None
@@ -0,0 +1,177 @@
+import asyncio
+import json
+import threading
+from collections import namedtuple
+
+DEFAULT_METRICS_PORT = 9477
+METRICS_HOST = "127.0.0.1"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+JSON_CONTENT_TYPE = "application/json"
+# Upper bound on a request head; scrapers send a few hundred bytes.
+MAX_REQUEST_HEAD = 8192
+
+# What the widget last displayed. `counters` is (names, bytes_recv, bytes_sent) with one
+# entry per interface; rates are None until two samples have been seen.
+MetricsSnapshot = namedtuple("MetricsSnapshot", [
+    "timestamp", "interface", "download", "upload", "counters",
+    "gui_tick_ns", "gui_tick_max_ns", "sampler_read_ns", "interval_ms",
+])
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_openmetrics(snapshot: MetricsSnapshot) -> bytes:
+    """Formats a snapshot in the OpenMetrics text exposition format."""
+    lines = []
+
+    def family(name, kind, help_text):
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"# HELP {name} {help_text}")
+
+    if snapshot.download is not None:
+        label = f'{{interface="{_escape_label(snapshot.interface)}"}}'
+        family("netspeed_download_rate_bytes", "gauge", "Download rate shown by the widget, in bytes per second.")
+        lines.append(f"netspeed_download_rate_bytes{label} {snapshot.download}")
+        family("netspeed_upload_rate_bytes", "gauge", "Upload rate shown by the widget, in bytes per second.")
+        lines.append(f"netspeed_upload_rate_bytes{label} {snapshot.upload}")
+
+    if snapshot.counters:
+        names, bytes_recv, bytes_sent = snapshot.counters
+        labels = [f'{{interface="{_escape_label(name)}"}}' for name in names]
+        family("netspeed_interface_receive_bytes", "counter", "Bytes received by the interface.")
+        lines.extend(f"netspeed_interface_receive_bytes_total{label} {int(value)}"
+                     for label, value in zip(labels, bytes_recv))
+        family("netspeed_interface_transmit_bytes", "counter", "Bytes sent by the interface.")
+        lines.extend(f"netspeed_interface_transmit_bytes_total{label} {int(value)}"
+                     for label, value in zip(labels, bytes_sent))
+
+    family("netspeed_gui_tick_seconds", "gauge", "Time the GUI thread spent on the last display tick.")
+    lines.append(f"netspeed_gui_tick_seconds {snapshot.gui_tick_ns / 1e9}")
+    family("netspeed_gui_tick_max_seconds", "gauge", "Longest display tick so far.")
+    lines.append(f"netspeed_gui_tick_max_seconds {snapshot.gui_tick_max_ns / 1e9}")
+    family("netspeed_sampler_read_seconds", "gauge", "Time the sampler thread spent on its last counter read.")
+    lines.append(f"netspeed_sampler_read_seconds {snapshot.sampler_read_ns / 1e9}")
+    family("netspeed_update_interval_seconds", "gauge", "Current display update interval.")
+    lines.append(f"netspeed_update_interval_seconds {snapshot.interval_ms / 1000}")
+    family("netspeed_snapshot_timestamp_seconds", "gauge", "When the widget last displayed a sample.")
+    lines.append(f"netspeed_snapshot_timestamp_seconds {snapshot.timestamp}")
+    lines.append("# EOF\n")
+    return "\n".join(lines).encode()
+
+
+def render_json(snapshot: MetricsSnapshot) -> bytes:
+    """Formats a snapshot as a JSON document."""
+    interfaces = {}
+    if snapshot.counters:
+        names, bytes_recv, bytes_sent = snapshot.counters
+        interfaces = {name: {"bytes_recv": int(recv), "bytes_sent": int(sent)}
+                      for name, recv, sent in zip(names, bytes_recv, bytes_sent)}
+    return json.dumps({
+        "timestamp": snapshot.timestamp,
+        "interface": snapshot.interface,
+        "download_bytes_per_second": snapshot.download,
+        "upload_bytes_per_second": snapshot.upload,
+        "interfaces": interfaces,
+        "gui_tick_seconds": snapshot.gui_tick_ns / 1e9,
+        "gui_tick_max_seconds": snapshot.gui_tick_max_ns / 1e9,
+        "sampler_read_seconds": snapshot.sampler_read_ns / 1e9,
+        "update_interval_seconds": snapshot.interval_ms / 1000,
+    }).encode()
+
+
+ROUTES = {
+    "/metrics": (render_openmetrics, OPENMETRICS_CONTENT_TYPE),
+    "/metrics.json": (render_json, JSON_CONTENT_TYPE),
+}
+
+
+class MetricsServer(threading.Thread):
+    """Serves the latest published snapshot over HTTP on localhost.
+
+    The widget hands over an immutable snapshot with publish(); that is a single
+    reference assignment, so the GUI thread never waits on the server and the server
+    never calls into Qt. All connections are handled by one asyncio loop on this
+    thread, and each body is rendered at most once per snapshot no matter how many
+    scrapers ask for it. `port` 0 binds an ephemeral port, available after ready.wait().
+    """
+
+    def __init__(self, port: int = DEFAULT_METRICS_PORT, host: str = METRICS_HOST):
+        super().__init__(name="MetricsServer", daemon=True)
+        self.host = host
+        self.port = port
+        self.snapshot = None
+        self.ready = threading.Event()
+        self.error = None
+        self._loop = None
+        self._server = None
+        self._rendered = {}  # path -> (snapshot, body)
+
+    def publish(self, snapshot: MetricsSnapshot):
+        self.snapshot = snapshot
+
+    def _body(self, path: str, snapshot: MetricsSnapshot) -> bytes:
+        cached = self._rendered.get(path)
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        body = ROUTES[path][0](snapshot)
+        self._rendered[path] = (snapshot, body)
+        return body
+
+    def _response(self, path: str) -> bytes:
+        snapshot = self.snapshot
+        if path not in ROUTES:
+            status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+        elif snapshot is None:
+            status, content_type, body = "503 Service Unavailable", "text/plain", b"no sample yet\n"
+        else:
+            status, content_type, body = "200 OK", ROUTES[path][1], self._body(path, snapshot)
+        head = f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n"
+        return head.encode() + body
+
+    async def _handle(self, reader, writer):
+        try:
+            # Connections are kept alive, so a scraper can reuse one for every request.
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, _, headers = head.decode("latin-1").partition("\r\n")
+                parts = request_line.split()
+                path = parts[1].split("?", 1)[0] if len(parts) == 3 else ""
+                writer.write(self._response(path))
+                await writer.drain()
+                if "connection: close" in headers.lower():
+                    break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=MAX_REQUEST_HEAD)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.ready.set()
+        async with self._server:
+            try:
+                await self._server.serve_forever()
+            except asyncio.CancelledError:
+                pass
+
+    def run(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except OSError as e:
+            self.error = e
+            print(f"Error starting metrics server: {e}")
+        finally:
+            self.ready.set()
+            self._loop.close()
+
+    def stop(self):
+        loop = self._loop
+        if loop is not None and self._server is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._server.close)
+            except RuntimeError:
+                pass
@@ -0,0 +1,131 @@
+import datetime
+import json
+import os
+
+from PyQt6.QtWidgets import QWidget, QLabel, QGridLayout, QHBoxLayout, QVBoxLayout, QPushButton
+from PyQt6.QtCore import Qt
+
+from widgets.jalali_index import DAYS_IN_PERSIAN, PERSIAN_MONTHS, get_index, month_grid
+
+# Parsed once for the whole view; a day cell's look follows its "holiday" and "today"
+# properties, so a month flip only repolishes the cells whose state changed.
+VIEW_STYLE = """
+QWidget { background-color: rgb(30, 30, 30); color: white; }
+QLabel[day="true"] { background-color: transparent; border-radius: 4px; padding: 2px 6px; }
+QLabel[day="true"][holiday="true"] { color: #ff6b6b; }
+QLabel[day="true"][today="true"] { background-color: rgba(90, 180, 255, 0.45); }
+"""
+FRIDAY = 6
+
+
+def load_occasions(path):
+    """Loads the holiday/occasion overlay.
+
+    The file is a JSON object keyed by "MM/DD" for yearly occasions or "YYYY/MM/DD" for a
+    single year, each mapping to {"title": str, "holiday": bool}. A missing or invalid
+    file yields an empty overlay.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading occasions file: {e}")
+        return {}
+
+
+class MonthView(QWidget):
+    """A popup Jalali month grid with previous/next navigation and an occasion overlay."""
+
+    def __init__(self, occasions=None, parent=None):
+        super().__init__(parent, Qt.WindowType.Popup)
+        self.occasions = occasions or {}
+        self.setLayoutDirection(Qt.LayoutDirection.RightToLeft)
+        self.setStyleSheet(VIEW_STYLE)
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        header = QHBoxLayout()
+        previous_button = QPushButton("›")
+        previous_button.clicked.connect(lambda: self.step_month(-1))
+        next_button = QPushButton("‹")
+        next_button.clicked.connect(lambda: self.step_month(1))
+        self.title_label = QLabel()
+        self.title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        header.addWidget(previous_button)
+        header.addWidget(self.title_label, 1)
+        header.addWidget(next_button)
+        layout.addLayout(header)
+
+        grid = QGridLayout()
+        grid.setSpacing(2)
+        for column, name in enumerate(DAYS_IN_PERSIAN):
+            day_header = QLabel(name[0])
+            day_header.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            grid.addWidget(day_header, 0, column)
+
+        # The 42 day cells are created once and only relabelled when the month changes.
+        self.cells = []
+        self.cell_states = [(False, False)] * 42  # (holiday, today) per cell
+        for index in range(42):
+            cell = QLabel()
+            cell.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            cell.setProperty("day", True)
+            cell.setProperty("holiday", False)
+            cell.setProperty("today", False)
+            grid.addWidget(cell, 1 + index // 7, index % 7)
+            self.cells.append(cell)
+        layout.addLayout(grid)
+
+        self.show_today()
+
+    def show_today(self):
+        """Jumps back to the current month."""
+        year, month, _ = get_index().from_ordinal(datetime.date.today().toordinal())
+        self.show_month(year, month)
+
+    def step_month(self, delta: int):
+        """Moves the view delta months forward or backward."""
+        index = self.year * 12 + self.month - 1 + delta
+        year, month = divmod(index, 12)
+        index_range = get_index()
+        if index_range.first_year <= year <= index_range.last_year:
+            self.show_month(year, month + 1)
+
+    def _occasion(self, year, month, day):
+        return self.occasions.get(f"{year:04d}/{month:02d}/{day:02d}") or self.occasions.get(f"{month:02d}/{day:02d}")
+
+    def show_month(self, year: int, month: int):
+        """Displays the given Jalali month."""
+        self.year, self.month = year, month
+        self.title_label.setText(f"{PERSIAN_MONTHS[month - 1]} {year}")
+        grid = month_grid(year, month)
+        today = datetime.date.today().toordinal()
+
+        for index, day in enumerate(day for week in grid.weeks for day in week):
+            cell = self.cells[index]
+            if not day:
+                # Outside the month: blank, in the plain style.
+                cell.setText("")
+                cell.setToolTip("")
+                self._set_state(index, (False, False))
+                continue
+            occasion = self._occasion(year, month, day)
+            is_holiday = index % 7 == FRIDAY or bool(occasion and occasion.get("holiday"))
+            cell.setText(str(day))
+            cell.setToolTip(occasion.get("title", "") if occasion else "")
+            self._set_state(index, (is_holiday, grid.start_ordinal + day - 1 == today))
+
+    def _set_state(self, index: int, state):
+        if self.cell_states[index] == state:
+            return
+        self.cell_states[index] = state
+        cell = self.cells[index]
+        cell.setProperty("holiday", state[0])
+        cell.setProperty("today", state[1])
+        # Style sheets don't follow property changes on their own.
+        cell.style().unpolish(cell)
+        cell.style().polish(cell)
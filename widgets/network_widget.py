@@ -1,49 +1,97 @@
 import time
-import psutil
-from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import QWidget, QVBoxLayout
+from PyQt6.QtCore import Qt, QTimer, QEvent, QPoint, pyqtSignal
+
+from widgets.counter_sources import ALL_INTERFACES, list_interfaces
+from widgets.interface_watcher import create_interface_watcher
+from widgets.probe_targets import DEFAULT_PROBE_INTERVAL, format_target, parse_targets
+from widgets.rates import RateCalculator, default_interface, format_speed
+from widgets.sample_hub import SampleHub
+from widgets.sampler import AdaptiveInterval, WakeupCounter
+from widgets.sparkline_widget import SparklineWidget
+from widgets.speed_history import SpeedHistory, DEFAULT_HISTORY_LENGTH
+from widgets.speed_stats import DEFAULT_STATS_WINDOWS, SpeedSmoother, SpeedStats, window_label
+from widgets.static_text import StaticTextLabel
+from widgets.timer_stats import InstrumentedTimer
+
+# Widest label text up to 999 MB/s; digits are tabular, so any speed fits in it.
+SPEED_TEMPLATE = "%s 000.00 MB/s"
+PROBE_TEMPLATE = "RTT 0000 ms · 100%"
 
 
 class NetworkWidget(QWidget):
     """A widget for displaying network download and upload speeds."""
 
-    def __init__(self, parent=None):
-        """Initializes the widget."""
+    # Emitted from the interface watcher thread; delivered on the GUI thread.
+    link_events = pyqtSignal(list)
+
+    def __init__(self, parent=None, history_length: int = DEFAULT_HISTORY_LENGTH, hub: SampleHub = None):
+        """Initializes the widget; without a shared `hub` it samples on its own."""
         super().__init__(parent)
-        self.last_check_time = time.time()
-        self.last_bytes_sent = 0
-        self.last_bytes_recv = 0
-        self.interface = self.get_default_interface()
+        self.history = SpeedHistory(history_length)
+        # Turns successive samples into rates; shared with the headless mode.
+        self.rates = RateCalculator(ALL_INTERFACES)
+        # GUI-thread cost of the most recent and the slowest update_speed call.
+        self.last_tick_ns = 0
+        self.max_tick_ns = 0
+        # The interval chosen by the user; in adaptive mode the timer may run slower.
+        self.base_interval = 1000
+        self.adaptive = None
+        self.screen_locked = False
+        self.gui_wakeups = WakeupCounter()
+        self.interface = None
+        # Switch to the best remaining interface when the monitored one goes away.
+        self.failover = False
+        self.interface_watcher = None
+        # Optional localhost endpoint that exposes what the widget displays.
+        self.metrics_server = None
+        self.last_sample = None
+        self.last_speeds = (None, None)
+        # Optional EWMA of the labels, and rolling percentiles of the raw speeds for the tooltip.
+        self.smoother = None
+        self.stats = SpeedStats(DEFAULT_STATS_WINDOWS)
+        # Optional LatencyProbe shown on a third line; its targets as entered, e.g. "1.1.1.1, udp://host:7".
+        self.probe = None
+        self.probe_targets = ""
+        self.probe_interval = DEFAULT_PROBE_INTERVAL
+        self._shown_probe = None
+        self._interfaces = None  # Cached interface list, dropped on every link event.
+        self.connections_panel = None
+        self.link_events.connect(self._on_link_events)
+        # Counters are read on the hub's background thread so a stalled read never freezes
+        # the GUI; one hub serves every view. This view's reader stays paused until it is shown.
+        self._owns_hub = hub is None
+        if hub is None:
+            hub = SampleHub()
+            hub.start()
+        self.hub = hub
+        self.sampler = hub.attach(self.base_interval)
         self.init_ui()
         self.update_speed()
+        # Opening the counter source and ranking interfaces can wait until after the first paint.
+        QTimer.singleShot(0, self.discover_interface)
 
-    def get_default_interface(self):
-        """Finds a suitable active network interface to monitor."""
-        try:
-            stats = psutil.net_if_stats()
-            active_interfaces = [
-                iface for iface, data in stats.items()
-                if data.isup and 'loopback' not in iface.lower() and 'virtual' not in iface.lower()
-            ]
-            if not active_interfaces:
-                return None
-
-            # Prioritize common interface names like Wi-Fi and Ethernet
-            for priority in ['wi-fi', 'wlan', 'ethernet']:
-                for iface in active_interfaces:
-                    if priority in iface.lower():
-                        chosen_interface = iface
-                        # Initialize counters for the chosen interface
-                        counters = psutil.net_io_counters(pernic=True).get(chosen_interface)
-                        if counters:
-                            self.last_bytes_sent = counters.bytes_sent
-                            self.last_bytes_recv = counters.bytes_recv
-                        return chosen_interface
-
-            # If no priority interface is found, pick the first active one
-            return active_interfaces[0]
-        except Exception:
-            return None
+    def discover_interface(self):
+        """Opens the hub's counter source and usage log and picks a default interface, unless already set."""
+        self.hub.open()
+        if self.interface is None:
+            self.set_interface(self.get_default_interface())
+        if self.interface_watcher is None:
+            try:
+                self.interface_watcher = create_interface_watcher(self.link_events.emit)
+                self.interface_watcher.start()
+            except Exception as e:
+                print(f"Error starting interface watcher: {e}")
+
+    def interfaces(self):
+        """Returns the names of all interfaces, cached until the next link event."""
+        if self._interfaces is None:
+            self._interfaces = list_interfaces()
+        return self._interfaces
+
+    def get_default_interface(self, exclude=None):
+        """Finds a suitable active network interface to monitor, never `exclude`."""
+        return default_interface(exclude)
 
     def init_ui(self):
         """Initializes the widget's UI."""
@@ -52,82 +100,327 @@ class NetworkWidget(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
 
-        common_style = "background-color: transparent; color: white; padding: 0px 0px;"
+        # Sized for the widest common reading, so changing speeds never relayout the window.
+        self.download_label = StaticTextLabel("↓ 0.0 KB/s", size_template=SPEED_TEMPLATE % "↓")
+        self.upload_label = StaticTextLabel("↑ 0.0 KB/s", size_template=SPEED_TEMPLATE % "↑")
 
-        self.download_label = QLabel("↓ 0.0 KB/s")
-        self.download_label.setStyleSheet(common_style)
-        self.download_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self.probe_label = StaticTextLabel("RTT --", size_template=PROBE_TEMPLATE)
+        self.probe_label.setVisible(False)
 
-        self.upload_label = QLabel("↑ 0.0 KB/s")
-        self.upload_label.setStyleSheet(common_style)
-        self.upload_label.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        self.graph = SparklineWidget(self.history, parent=self)
+        self.graph.setVisible(False)
 
         layout.addWidget(self.download_label)
         layout.addWidget(self.upload_label)
+        layout.addWidget(self.probe_label)
+        layout.addWidget(self.graph)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_speed)
-        self.timer.start(1000)
+        self.timer = InstrumentedTimer("network", self.update_speed, self)
+        self.timer.setInterval(self.base_interval)
 
-    def format_speed(self, speed_bytes_per_sec):
-        """Formats speed in bytes/sec into a human-readable string (KB/s, MB/s)."""
-        if speed_bytes_per_sec < 1024:
-            return f"{speed_bytes_per_sec:.1f} B/s"
-        elif speed_bytes_per_sec < 1024 * 1024:
-            return f"{speed_bytes_per_sec / 1024:.1f} KB/s"
-        else:
-            return f"{speed_bytes_per_sec / (1024 * 1024):.2f} MB/s"
+    format_speed = staticmethod(format_speed)
 
     def update_speed(self):
-        """Calculates and displays the current network speed."""
+        """Displays the newest sample and records how long the GUI thread spent on it."""
+        tick_start = time.perf_counter_ns()
+        self.gui_wakeups.tick()
+        try:
+            self._render_latest_sample()
+        finally:
+            self.last_tick_ns = time.perf_counter_ns() - tick_start
+            if self.last_tick_ns > self.max_tick_ns:
+                self.max_tick_ns = self.last_tick_ns
+        if self.metrics_server is not None:
+            self._publish_metrics()
+        if self.probe is not None:
+            self._show_probe()
+
+    def _show_probe(self):
+        """Shows the last RTT and the loss of the first probe target, once per new result."""
+        summaries = self.probe.summaries
+        if summaries is self._shown_probe or not summaries:
+            return
+        self._shown_probe = summaries
+        summary = summaries[0]
+        if not summary.count:
+            self.probe_label.setText("RTT --")
+            return
+        rtt = f"{summary.last_rtt * 1000:.0f}" if summary.last_rtt is not None else "--"
+        self.probe_label.setText(f"RTT {rtt} ms · {summary.loss * 100:.0f}%")
+
+    def _publish_metrics(self):
+        """Hands the latest displayed values to the metrics server as an immutable snapshot."""
+        sample = self.last_sample
+        if sample is None:
+            return
+        counters = sample.counters
+        if counters and sample.interface != ALL_INTERFACES:
+            counters = ((sample.interface,), (counters[0],), (counters[1],))
+        from widgets.metrics_server import MetricsSnapshot
+        self.metrics_server.publish(MetricsSnapshot(
+            time.time(), sample.interface, *self.last_speeds, counters,
+            self.last_tick_ns, self.max_tick_ns, self.hub.sampler.read_ns, self.timer.interval(),
+        ))
+
+    def _render_latest_sample(self):
+        """Calculates and displays the current network speed from the sampler's output."""
         if not self.interface:
             self.download_label.setText("↓ --")
             self.upload_label.setText("↑ --")
             return
 
-        try:
-            current_time = time.time()
-            io_counters = psutil.net_io_counters(pernic=True).get(self.interface)
-            if not io_counters:
-                self.download_label.setText("↓ N/A")
-                self.upload_label.setText("↑ N/A")
-                return
-
-            time_delta = current_time - self.last_check_time
-            if time_delta == 0:
-                return
+        sample = self.sampler.ring.drain_latest()
+        # Nothing new yet, or a leftover sample from the previously selected interface.
+        if sample is None or sample.interface != self.interface:
+            return
+        self.last_sample = sample
 
-            bytes_recv = io_counters.bytes_recv
-            bytes_sent = io_counters.bytes_sent
+        if sample.error:
+            self.download_label.setText("↓ Error")
+            self.upload_label.setText("↑ Error")
+            return
 
-            # Calculate speed only after the first data point is gathered
-            if self.last_bytes_recv > 0:
-                download_speed = (bytes_recv - self.last_bytes_recv) / time_delta
-                self.download_label.setText(f"↓ {self.format_speed(download_speed)}")
+        if not sample.counters:
+            self.download_label.setText("↓ N/A")
+            self.upload_label.setText("↑ N/A")
+            return
 
-            if self.last_bytes_sent > 0:
-                upload_speed = (bytes_sent - self.last_bytes_sent) / time_delta
-                self.upload_label.setText(f"↑ {self.format_speed(upload_speed)}")
+        speeds = self.rates.update(sample)
+        if speeds is not None:
+            self._show_speeds(*speeds, sample.timestamp)
 
-            self.last_bytes_recv = bytes_recv
-            self.last_bytes_sent = bytes_sent
-            self.last_check_time = current_time
+    def _show_speeds(self, download_speed, upload_speed, timestamp=None):
+        """Updates the labels, history, statistics and adaptive interval; None means not yet known."""
+        shown_download, shown_upload = download_speed, upload_speed
+        if download_speed is not None and upload_speed is not None and timestamp is not None:
+            if self.stats is not None:
+                self.stats.add(timestamp, download_speed, upload_speed)
+            if self.smoother is not None:
+                shown_download, shown_upload = self.smoother.update(timestamp, download_speed, upload_speed)
+        if shown_download is not None:
+            self.download_label.setText(f"↓ {self.format_speed(shown_download)}")
+        if shown_upload is not None:
+            self.upload_label.setText(f"↑ {self.format_speed(shown_upload)}")
 
-        except (KeyError, Exception):
-            self.download_label.setText("↓ Error")
-            self.upload_label.setText("↑ Error")
+        if download_speed is not None and upload_speed is not None:
+            # The graph and the adaptive interval follow the raw speeds; metrics report what is shown.
+            self.last_speeds = (shown_download, shown_upload)
+            self.history.append(download_speed, upload_speed)
+            self.graph.add_sample(download_speed, upload_speed)
+            if self.adaptive:
+                self._apply_interval(self.adaptive.update(download_speed, upload_speed))
 
     def set_interface(self, interface_name):
         """Sets the network interface to monitor."""
         self.interface = interface_name
         # Reset counters to start fresh with the new interface
-        self.last_bytes_sent = 0
-        self.last_bytes_recv = 0
-        self.last_check_time = time.time()
-        # Update speed immediately to reflect the change
-        self.update_speed()
+        self.rates.reset()
+        self.last_sample = None
+        self.last_speeds = (None, None)
+        if self.smoother is not None:
+            self.smoother.reset()
+        if self.stats is not None:
+            self.stats.clear()
+        # The graph shares one scale, so it must not mix two interfaces' traffic.
+        self.history.clear()
+        self.graph.redraw()
+        # Ask the sampler for an immediate reading of the new interface
+        self.sampler.set_interface(interface_name)
+
+    def _on_link_events(self, events):
+        """Reacts to interfaces being added, removed or changing state."""
+        self._interfaces = None
+        if not self.failover:
+            return
+        if any(event.name == self.interface and event.kind in ("remove", "down") for event in events):
+            replacement = self.get_default_interface(exclude=self.interface)
+            if replacement:
+                self.set_interface(replacement)
+
+    def set_failover(self, enabled: bool):
+        """Enables or disables switching interfaces automatically when the current one goes away."""
+        self.failover = enabled
+
+    def set_metrics_enabled(self, enabled: bool, port: int = None):
+        """Starts or stops the localhost metrics endpoint; returns the OSError if it couldn't start."""
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if enabled:
+            from widgets.metrics_server import MetricsServer, DEFAULT_METRICS_PORT
+            server = MetricsServer(port or DEFAULT_METRICS_PORT)
+            server.start()
+            # Binding a localhost port takes well under a millisecond; wait to report failures.
+            if not server.ready.wait(1.0):
+                server.stop()
+                return TimeoutError("the metrics server did not start in time")
+            if server.error is not None:
+                return server.error
+            self.metrics_server = server
+            self._publish_metrics()
+        return None
+
+    def set_smoothing(self, time_constant: float):
+        """Smooths the labels with an EWMA of the given time constant in seconds; 0 shows raw speeds."""
+        self.smoother = SpeedSmoother(time_constant) if time_constant > 0 else None
+
+    def set_stats_windows(self, windows):
+        """Keeps rolling percentiles over the given windows in seconds; none turns statistics off."""
+        if self.stats is not None and self.stats.windows == tuple(windows):
+            return
+        self.stats = SpeedStats(windows) if windows else None
+
+    def set_probe(self, targets: str, interval_ms: int = DEFAULT_PROBE_INTERVAL):
+        """Probes RTT and loss to comma-separated targets every interval; no targets turns it off."""
+        interval_ms = interval_ms or DEFAULT_PROBE_INTERVAL
+        if targets == self.probe_targets and interval_ms == self.probe_interval:
+            return
+        self.probe_interval = interval_ms
+        if targets == self.probe_targets and self.probe is not None:
+            self.probe.set_interval(interval_ms)
+            return
+        if self.probe is not None:
+            self.probe.stop()
+            self.probe = None
+        self.probe_targets = targets
+        parsed = parse_targets(targets)
+        if parsed:
+            # Imported on first use; its asyncio loop costs several megabytes.
+            from widgets.latency_probe import LatencyProbe
+            self.probe = LatencyProbe(parsed, interval_ms)
+            if not self.timer.isActive():
+                self.probe.pause()
+            self.probe.start()
+        self._shown_probe = None
+        self.probe_label.setText("RTT --")
+        self.probe_label.setVisible(self.probe is not None)
+        self.adjustSize()
+
+    def show_connections_panel(self):
+        """Opens the per-process socket panel just above the widget; Linux only."""
+        if self.connections_panel is None:
+            # Imported and built on first use; most sessions never open the panel.
+            from widgets.connection_index import is_supported
+            if not is_supported():
+                return
+            from widgets.connections_panel import ConnectionsPanel
+            self.connections_panel = ConnectionsPanel(parent=self)
+        self.connections_panel.refresh()
+        self.connections_panel.adjustSize()
+        top_left = self.mapToGlobal(QPoint(0, 0))
+        self.connections_panel.move(top_left.x(), top_left.y() - self.connections_panel.height() - 8)
+        self.connections_panel.show()
+
+    def set_graph_visible(self, visible: bool):
+        """Shows or hides the speed history sparkline under the labels."""
+        self.graph.setVisible(visible)
+        self.adjustSize()
 
     def set_update_interval(self, ms: int):
         """Changes the speed update interval."""
-        if self.timer:
-            self.timer.start(ms)
\ No newline at end of file
+        self.base_interval = ms
+        if self.adaptive:
+            self.adaptive.reset(ms)
+        self._apply_interval(ms)
+
+    def set_adaptive(self, enabled: bool):
+        """Enables or disables backing off the update interval while the network is idle."""
+        self.adaptive = AdaptiveInterval(fast_ms=self.base_interval) if enabled else None
+        self._apply_interval(self.base_interval)
+
+    def set_screen_locked(self, locked: bool):
+        """Pauses sampling while the user's session is locked."""
+        self.screen_locked = locked
+        self._update_sampling_state()
+
+    def _apply_interval(self, ms: int):
+        """Moves both the sampler and the display timer to a new interval."""
+        if ms == self.timer.interval():
+            return
+        self.sampler.set_interval(ms)
+        self.timer.setInterval(ms)
+
+    def _update_sampling_state(self):
+        """Runs the sampler and timer only while there is someone to show the result to."""
+        should_run = self.isVisible() and not self.screen_locked
+        if should_run and not self.timer.isActive():
+            # Don't average the speed over the paused period; prime with a fresh sample.
+            self.rates.reset()
+            if self.smoother is not None:
+                self.smoother.reset()
+            if self.adaptive:
+                self.adaptive.reset()
+                self._apply_interval(self.adaptive.interval_ms)
+            self.sampler.resume()
+            if self.probe is not None:
+                self.probe.resume()
+            self.timer.start()
+        elif not should_run and self.timer.isActive():
+            self.timer.stop()
+            self.sampler.pause()
+            if self.probe is not None:
+                self.probe.pause()
+
+    def wakeups_per_minute(self) -> int:
+        """Returns the timer and sampler wakeups of the last full minute."""
+        return self.gui_wakeups.per_minute() + self.hub.wakeups.per_minute()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._update_sampling_state()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._update_sampling_state()
+
+    def event(self, event):
+        if event.type() == QEvent.Type.ToolTip:
+            # Built on demand so ticks never pay for tooltip text.
+            lines = [
+                f"\u200fبازه به‌روزرسانی: {self.timer.interval()} ms",
+                f"\u200fبیدارباش در دقیقه: {self.wakeups_per_minute()}",
+            ]
+            if self.interface == ALL_INTERFACES and self.rates.table is not None:
+                lines += [f"{name}: ↓ {self.format_speed(down)}  ↑ {self.format_speed(up)}"
+                          for name, down, up in self.rates.table.top()]
+            if self.stats is not None:
+                lines += self._stats_tooltip_lines()
+            if self.probe is not None:
+                lines += self._probe_tooltip_lines()
+            self.setToolTip("\n".join(lines))
+        return super().event(event)
+
+    def _stats_tooltip_lines(self):
+        """Returns p50 / p95 / max of the raw speeds for every statistics window."""
+        summary = self.stats.summary(self.hub.sampler.clock())
+        if not any(download.count for _, download, _ in summary):
+            return []
+        lines = ["\u200fمیانه / صدک ۹۵ / بیشینه:"]
+        for window, download, upload in summary:
+            if download.count:
+                lines.append(f"{window_label(window)}  ↓ {self._spread(download)}  ↑ {self._spread(upload)}")
+        return lines
+
+    def _probe_tooltip_lines(self):
+        """Returns the median RTT and the loss of every probe target."""
+        lines = []
+        for summary in self.probe.summaries:
+            rtt = f"{summary.median_rtt * 1000:.1f} ms" if summary.median_rtt is not None else "--"
+            lines.append(f"{format_target(summary.target)}: RTT {rtt} · {summary.loss * 100:.0f}% ({summary.count})")
+        return lines
+
+    def _spread(self, sketch):
+        return " / ".join(self.format_speed(value) for value in (*sketch.percentiles(0.5, 0.95), sketch.max))
+
+    def stop(self):
+        """Stops the display timer and detaches from the hub, stopping it if it is this widget's own."""
+        self.timer.stop()
+        self.sampler.stop()
+        if self._owns_hub:
+            self.hub.stop()
+        if self.interface_watcher is not None:
+            self.interface_watcher.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.probe is not None:
+            self.probe.stop()
@@ -0,0 +1,65 @@
+"""Probe targets as the user enters them, parsed without loading the probe itself.
+
+The widget parses and shows targets with these; widgets.latency_probe, with its asyncio
+loop, is only imported once there is something to probe.
+"""
+from collections import namedtuple
+
+DEFAULT_PROBE_INTERVAL = 2000
+DEFAULT_TCP_PORT = 443
+UDP_SCHEME = "udp://"
+
+ProbeTarget = namedtuple("ProbeTarget", ["kind", "host", "port"])
+
+
+def parse_target(text: str) -> ProbeTarget:
+    """Parses `host[:port]` (TCP connect, port 443 by default) or `udp://host:port` (UDP echo).
+
+    IPv6 addresses with a port are written in brackets, e.g. `[::1]:7`.
+    """
+    text = text.strip()
+    kind = "tcp"
+    if text.lower().startswith(UDP_SCHEME):
+        kind, text = "udp", text[len(UDP_SCHEME):]
+    if text.startswith("["):
+        host, _, rest = text[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else ""
+    elif text.count(":") == 1:
+        host, _, port = text.partition(":")
+    else:
+        host, port = text, ""
+        if ":" in host:
+            import ipaddress
+            try:
+                ipaddress.IPv6Address(host)
+            except ValueError:
+                raise ValueError(f"Invalid probe target {text!r}") from None
+    if not host or (kind == "udp" and not port):
+        raise ValueError(f"Invalid probe target {text!r}")
+    port = int(port) if port else DEFAULT_TCP_PORT
+    if not 0 < port < 65536:
+        raise ValueError(f"Invalid port in probe target {text!r}")
+    return ProbeTarget(kind, host, port)
+
+
+def parse_targets(text: str):
+    """Parses a comma-separated list of targets; invalid entries are reported and skipped."""
+    targets = []
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        try:
+            target = parse_target(part)
+        except ValueError as e:
+            print(e)
+            continue
+        if target not in targets:
+            targets.append(target)
+    return targets
+
+
+def format_target(target: ProbeTarget) -> str:
+    host = f"[{target.host}]" if ":" in target.host else target.host
+    if target.kind == "udp":
+        return f"{UDP_SCHEME}{host}:{target.port}"
+    return host if target.port == DEFAULT_TCP_PORT else f"{host}:{target.port}"
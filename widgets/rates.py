@@ -0,0 +1,103 @@
+from widgets.counter_sources import ALL_INTERFACES
+from widgets.interface_watcher import default_route_interface
+
+
+def format_speed(speed_bytes_per_sec):
+    """Formats speed in bytes/sec into a human-readable string (KB/s, MB/s)."""
+    if speed_bytes_per_sec < 1024:
+        return f"{speed_bytes_per_sec:.1f} B/s"
+    elif speed_bytes_per_sec < 1024 * 1024:
+        return f"{speed_bytes_per_sec / 1024:.1f} KB/s"
+    else:
+        return f"{speed_bytes_per_sec / (1024 * 1024):.2f} MB/s"
+
+
+def default_interface(exclude=None):
+    """Finds a suitable active network interface to monitor.
+
+    The interface carrying the default route wins; otherwise active interfaces are
+    ranked by name. `exclude` is never returned.
+    """
+    try:
+        route_interface = default_route_interface()
+        if route_interface and route_interface != exclude:
+            return route_interface
+
+        import psutil
+        stats = psutil.net_if_stats()
+        active_interfaces = [
+            iface for iface, data in stats.items()
+            if data.isup and iface != exclude and 'loopback' not in getattr(data, 'flags', '')
+            and 'loopback' not in iface.lower() and 'virtual' not in iface.lower()
+        ]
+        if not active_interfaces:
+            return None
+
+        # Prioritize common interface names like Wi-Fi and Ethernet
+        for priority in ['wi-fi', 'wlan', 'ethernet']:
+            for iface in active_interfaces:
+                if priority in iface.lower():
+                    return iface
+
+        # If no priority interface is found, pick the first active one
+        return active_interfaces[0]
+    except Exception:
+        return None
+
+
+class RateCalculator:
+    """Turns successive samples of one interface, or of all of them, into speeds.
+
+    This is the sampling core shared by the widget, the usage log and the headless
+    mode. A sample of `all_interfaces` carries (names, bytes_recv, bytes_sent) arrays
+    and yields the total over all non-loopback interfaces. Switching interfaces starts
+    over; a counter that went backwards was reset and counts as no traffic.
+    """
+
+    __slots__ = ("all_interfaces", "interface", "last_counters", "last_timestamp", "table", "elapsed")
+
+    def __init__(self, all_interfaces: str = ALL_INTERFACES):
+        self.all_interfaces = all_interfaces
+        self.interface = None
+        self.last_counters = None
+        self.last_timestamp = None
+        self.table = None  # InterfaceTable with per-interface rates while all_interfaces is sampled.
+        self.elapsed = 0.0  # Seconds covered by the rates most recently returned.
+
+    def reset(self):
+        """Forgets previous samples, so the next one only primes the calculator."""
+        self.interface = None
+        self.last_counters = None
+        self.last_timestamp = None
+        self.table = None
+
+    def update(self, sample):
+        """Feeds one Sample; returns (download, upload) in bytes per second, or None.
+
+        None means there is nothing to show yet: the sample failed, the interface does
+        not exist, or it is the first sample since a reset.
+        """
+        if sample.error or not sample.counters:
+            return None
+        if sample.interface != self.interface:
+            self.reset()
+            self.interface = sample.interface
+
+        if sample.interface == self.all_interfaces:
+            if self.table is None:
+                from widgets.aggregate import InterfaceTable
+                self.table = InterfaceTable()
+            last_timestamp = self.table.timestamp
+            if not self.table.update(sample.timestamp, *sample.counters):
+                return None
+            self.elapsed = sample.timestamp - last_timestamp
+            return self.table.totals()
+
+        last_counters, last_timestamp = self.last_counters, self.last_timestamp
+        self.last_counters, self.last_timestamp = sample.counters, sample.timestamp
+        if last_counters is None or sample.timestamp <= last_timestamp:
+            return None
+        self.elapsed = sample.timestamp - last_timestamp
+        bytes_recv, bytes_sent = sample.counters
+        return (max(bytes_recv - last_counters[0], 0) / self.elapsed,
+                max(bytes_sent - last_counters[1], 0) / self.elapsed)
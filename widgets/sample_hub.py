@@ -0,0 +1,560 @@
+import getpass
+import os
+import select
+import socket
+import struct
+import threading
+import time
+import zlib
+from array import array
+
+from widgets.config_store import atomic_write, default_config_path
+from widgets.counter_sources import ALL_INTERFACES, create_counter_source
+from widgets.sampler import NetworkSampler, Sample, SampleRing, WakeupCounter
+
+DEFAULT_HUB_PORT = 9478
+HUB_HOST = "127.0.0.1"
+# Each user's hub listens on the configured port plus an offset below this, taken from the user id.
+HUB_PORT_USERS = 1000
+# A reader's first bytes: the owner's token, which it wrote to a file only its user can read.
+TOKEN_SIZE = 32
+# A connection that hasn't sent the token by then is dropped.
+AUTH_TIMEOUT = 1.0
+# Sent by the owner once the token checked out, so a reader never mistakes another program for a hub.
+HELLO = b"NSHB\x02"
+# Every message is a frame: its payload length, then the payload.
+FRAME_LENGTH = struct.Struct("=I")
+# Owner -> reader payload: timestamp and kind, then a body that depends on the kind.
+SAMPLE_HEAD = struct.Struct("=dB")
+COUNTERS = struct.Struct("=qq")
+TABLE_SIZE = struct.Struct("=I")
+KIND_COUNTERS, KIND_TABLE, KIND_MISSING, KIND_ERROR = range(4)
+# Reader -> owner payload: the interval it wants (0 while paused), then the interface name.
+REQUEST_HEAD = struct.Struct("=I")
+# Sent as the interval by a second launch, to have the owner bring its windows to the front.
+SHOW_REQUEST = 0xFFFFFFFF
+# Intervals other processes ask for are raised to this, the shortest one the menu offers.
+MIN_REQUEST_MS = 500
+MAX_REQUEST = 4096
+# A reader with this much unsent data isn't reading anymore and is disconnected.
+MAX_WRITE_BUFFER = 64 * 1024
+ATTACH_ATTEMPTS = 3
+
+
+def select_interface(sample: Sample, interface: str):
+    """Returns the part of a sample that concerns `interface`, or None if it has none.
+
+    A sample of one interface only answers for that interface; a sample of all of them
+    answers for any.
+    """
+    if sample.interface == interface:
+        return sample
+    if sample.interface != ALL_INTERFACES or not interface:
+        return None
+    if sample.error or not sample.counters:
+        return Sample(sample.timestamp, interface, None, sample.error)
+    names, bytes_recv, bytes_sent = sample.counters
+    try:
+        index = names.index(interface)
+    except ValueError:
+        return Sample(sample.timestamp, interface, None, False)
+    return Sample(sample.timestamp, interface, (int(bytes_recv[index]), int(bytes_sent[index])), False)
+
+
+def encode_sample(sample: Sample) -> bytes:
+    """Encodes a sample as one frame."""
+    if sample.error:
+        kind, body = KIND_ERROR, sample.interface.encode()
+    elif not sample.counters:
+        kind, body = KIND_MISSING, sample.interface.encode()
+    elif sample.interface == ALL_INTERFACES:
+        names, bytes_recv, bytes_sent = sample.counters
+        # array('q') counters expose their int64 values as a buffer.
+        kind, body = KIND_TABLE, b"".join((TABLE_SIZE.pack(len(names)), memoryview(bytes_recv).tobytes(),
+                                           memoryview(bytes_sent).tobytes(), "\n".join(names).encode()))
+    else:
+        kind, body = KIND_COUNTERS, COUNTERS.pack(*sample.counters) + sample.interface.encode()
+    payload = SAMPLE_HEAD.pack(sample.timestamp, kind) + body
+    return FRAME_LENGTH.pack(len(payload)) + payload
+
+
+def decode_sample(payload: bytes) -> Sample:
+    """Decodes the payload of a frame made by encode_sample."""
+    timestamp, kind = SAMPLE_HEAD.unpack_from(payload)
+    offset = SAMPLE_HEAD.size
+    if kind == KIND_TABLE:
+        from widgets.aggregate import to_counter_array
+        (count,) = TABLE_SIZE.unpack_from(payload, offset)
+        offset += TABLE_SIZE.size
+        bytes_recv, bytes_sent = array('q'), array('q')
+        bytes_recv.frombytes(payload[offset:offset + 8 * count])
+        bytes_sent.frombytes(payload[offset + 8 * count:offset + 16 * count])
+        names = tuple(payload[offset + 16 * count:].decode().split("\n")) if count else ()
+        return Sample(timestamp, ALL_INTERFACES, (names, to_counter_array(bytes_recv), to_counter_array(bytes_sent)),
+                      False)
+    counters = None
+    if kind == KIND_COUNTERS:
+        counters = COUNTERS.unpack_from(payload, offset)
+        offset += COUNTERS.size
+    return Sample(timestamp, payload[offset:].decode(), counters, kind == KIND_ERROR)
+
+
+def encode_request(interval_ms: int, interface) -> bytes:
+    payload = REQUEST_HEAD.pack(interval_ms) + (interface or "").encode()
+    return FRAME_LENGTH.pack(len(payload)) + payload
+
+
+def decode_request(payload: bytes):
+    """Returns (interval_ms, interface) from a request payload."""
+    (interval_ms,) = REQUEST_HEAD.unpack_from(payload)
+    return interval_ms, payload[REQUEST_HEAD.size:].decode() or None
+
+
+class FrameReader:
+    """Splits a byte stream into the payloads of its frames."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes):
+        """Adds received bytes and returns the payloads completed by them."""
+        self.buffer += data
+        payloads = []
+        offset = 0
+        while len(self.buffer) - offset >= FRAME_LENGTH.size:
+            (length,) = FRAME_LENGTH.unpack_from(self.buffer, offset)
+            end = offset + FRAME_LENGTH.size + length
+            if end > len(self.buffer):
+                break
+            payloads.append(bytes(self.buffer[offset + FRAME_LENGTH.size:end]))
+            offset = end
+        del self.buffer[:offset]
+        return payloads
+
+
+def user_hub_port(port: int) -> int:
+    """Returns the hub port of the current user for a configured port.
+
+    Users of one machine then run separate hubs; should two of them still land on the
+    same port, the token keeps them apart and the second one samples without sharing.
+    """
+    user = os.getuid() if hasattr(os, "getuid") else zlib.crc32(getpass.getuser().encode())
+    offset = user % HUB_PORT_USERS
+    return port + offset if port + offset <= 65535 else port
+
+
+def hub_token_path(port: int) -> str:
+    """Returns the token file of the hub on a port, next to the per-user config."""
+    return os.path.join(os.path.dirname(default_config_path()), f"hub-{port}.token")
+
+
+def write_hub_token(port: int) -> bytes:
+    """Writes a new random token for the hub on a port and returns it.
+
+    The file is created readable by its owner only (on Windows, the profile's ACL does that).
+    """
+    # os.urandom rather than secrets, which would load hashlib and libcrypto (~3 MiB) into every process.
+    token = os.urandom(TOKEN_SIZE // 2).hex()
+    atomic_write(hub_token_path(port), token)
+    return token.encode()
+
+
+def read_hub_token(port: int) -> bytes:
+    """Returns the token of the hub on a port; raises OSError if there is none."""
+    with open(hub_token_path(port), "r", encoding="utf-8") as f:
+        token = f.read().strip().encode()
+    if len(token) != TOKEN_SIZE:
+        raise ConnectionError(f"invalid hub token for port {port}")
+    return token
+
+
+def remove_hub_token(port: int, token: bytes):
+    """Removes the token file of the hub on a port, unless another owner has replaced it."""
+    try:
+        if read_hub_token(port) == token:
+            os.remove(hub_token_path(port))
+    except OSError:
+        pass
+
+
+def bind_hub_socket(port: int, host: str = HUB_HOST) -> socket.socket:
+    """Returns a listening socket on the hub port; raises OSError if it is taken."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+            # On Windows, SO_REUSEADDR would even allow binding a port someone listens on.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else:
+            # Lets a new owner bind while connections of the previous one linger in TIME_WAIT.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen()
+        return sock
+    except BaseException:
+        sock.close()
+        raise
+
+
+def connect_to_hub(port: int, token: bytes, host: str = HUB_HOST, timeout: float = 1.0) -> socket.socket:
+    """Connects to the hub on the port with its token and checks its greeting; raises OSError otherwise."""
+    sock = socket.create_connection((host, port), timeout=timeout)
+    try:
+        sock.sendall(token)
+        hello = b""
+        while len(hello) < len(HELLO):
+            chunk = sock.recv(len(HELLO) - len(hello))
+            if not chunk:
+                break
+            hello += chunk
+        if hello != HELLO:
+            raise ConnectionError(f"port {port} is not this user's sample hub")
+        sock.settimeout(None)
+        return sock
+    except BaseException:
+        sock.close()
+        raise
+
+
+class SampleReader:
+    """One view's subscription to a SampleHub.
+
+    Offers the part of the NetworkSampler interface a view uses: samples of its
+    interface arrive in `ring`, and set_interface, set_interval, pause and resume tell
+    the hub what this view needs.
+    """
+
+    def __init__(self, hub, interval_ms: int):
+        self.hub = hub
+        self.ring = SampleRing()
+        self.interface = None
+        self.interval_ms = interval_ms
+        self.active = False
+
+    def set_interface(self, interface):
+        """Switches the interface and asks for a sample right away."""
+        self.interface = interface
+        self.hub.update_schedule(sample_now=True)
+
+    def set_interval(self, ms: int):
+        self.interval_ms = ms
+        self.hub.update_schedule()
+
+    def pause(self):
+        self.active = False
+        self.hub.update_schedule()
+
+    def resume(self):
+        """Becomes active again with an immediate sample."""
+        # Samples keep arriving while paused; the ring would hand out one from before the pause.
+        self.ring.drain_latest()
+        self.active = True
+        self.hub.update_schedule(sample_now=True)
+
+    def deliver(self, sample):
+        """Receives every sample of the hub, on the thread that produced it."""
+        sample = select_interface(sample, self.interface)
+        if sample is not None:
+            self.ring.push(sample)
+
+    def stop(self):
+        self.hub.detach(self)
+
+
+class HubClient(threading.Thread):
+    """Receives the owning process's samples and hands them to the local hub.
+
+    `sock` is a connected stream socket past the greeting; a socketpair can stand in
+    for the owner. When the owner goes away the hub is told, so it can take over.
+    """
+
+    def __init__(self, hub, sock: socket.socket):
+        super().__init__(name="SampleHubClient", daemon=True)
+        self.hub = hub
+        self.sock = sock
+        self.wakeups = WakeupCounter()
+        self._send_lock = threading.Lock()
+        self._stopping = False
+
+    def request(self, interval_ms: int, interface):
+        """Tells the owner what this process's views need; 0 ms pauses them."""
+        try:
+            with self._send_lock:
+                self.sock.sendall(encode_request(interval_ms, interface))
+        except OSError:
+            pass  # The receiving loop notices the lost owner.
+
+    def request_show(self):
+        """Asks the owner to bring its windows to the front."""
+        self.request(SHOW_REQUEST, None)
+
+    def run(self):
+        frames = FrameReader()
+        try:
+            while True:
+                data = self.sock.recv(65536)
+                if not data:
+                    break
+                self.wakeups.tick()
+                for payload in frames.feed(data):
+                    self.hub.publish(decode_sample(payload))
+        except (OSError, ValueError, struct.error):
+            pass
+        finally:
+            self.sock.close()
+        if not self._stopping:
+            self.hub.owner_lost(self)
+
+    def stop(self):
+        self._stopping = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class HubListener(threading.Thread):
+    """Owns the hub port; serves readers in other processes once the first one connects.
+
+    Until then the thread blocks in select() on the listening socket and asyncio, which
+    the HubServer needs, isn't imported: most sessions never start a second process.
+    """
+
+    def __init__(self, hub, sock: socket.socket):
+        super().__init__(name="SampleHubServer", daemon=True)
+        self.hub = hub
+        self.sock = sock
+        self.port = sock.getsockname()[1]
+        self.server = None  # HubServer once a reader has connected.
+        self._wake_read, self._wake_write = socket.socketpair()
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def run(self):
+        try:
+            select.select([self.sock, self._wake_read], [], [])
+            with self._lock:
+                if self._stopping:
+                    return
+                # The pending connection stays in the backlog until the server accepts it.
+                from widgets.hub_server import HubServer
+                self.server = HubServer(self.hub, self.sock)
+            self.server.run()
+        except OSError:
+            pass
+        finally:
+            self.sock.close()
+            self._wake_read.close()
+            self._wake_write.close()
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+            if self.server is not None:
+                self.server.stop()
+            else:
+                try:
+                    self._wake_write.send(b"\0")
+                except OSError:
+                    pass
+
+
+class SampleHub:
+    """Samples once for all views, in this process and others, and fans samples out.
+
+    The hub owns one NetworkSampler. It reads the interface every active reader wants,
+    or all interfaces when they differ, at the shortest interval any of them asks for,
+    and pauses while no reader is active. With a port, the first process to bind it on
+    localhost owns sampling and serves later processes, which attach as readers instead
+    of sampling themselves; when the owner exits, one of them takes over. The owner
+    writes a token to a file only its user can read and drops connections that don't
+    send it, and intervals other processes ask for are raised to `min_request_ms`.
+    """
+
+    def __init__(self, port: int = None, counter_source=None, clock=time.monotonic, record_usage: bool = True,
+                 min_request_ms: int = MIN_REQUEST_MS):
+        self.port = port  # None keeps the hub to this process; 0 binds any free port.
+        self.min_request_ms = min_request_ms
+        self.token = None  # Readers in other processes must send this, while this process owns the port.
+        self.readers = ()  # Replaced rather than mutated, so publish() iterates it without a lock.
+        self.record_usage = record_usage  # Off while replaying a trace, which is not this machine's traffic.
+        self.sampler = NetworkSampler(counter_source, None, all_interfaces=ALL_INTERFACES, clock=clock)
+        self.sampler.on_sample = self.publish
+        self.sampler.pause()
+        self.server = None  # HubListener while this process samples for others.
+        # Called on a server thread when a second launch asks this process to show its windows.
+        self.on_show_request = None
+        self.client = None  # HubClient while another process samples for this one.
+        self._lock = threading.RLock()
+        self._paused = True
+        self._request = None  # The last request sent to the owner.
+        self._encoded = (None, b"")  # The latest sample and its frame, shared by remote readers.
+        self._stopped = False
+
+    def start(self):
+        """Starts sampling here, or attaches to the process that already does."""
+        with self._lock:
+            if self.port is not None:
+                self._serve_or_attach()
+            if self.client is None:
+                self._start_sampling()
+
+    def _serve_or_attach(self):
+        for attempt in range(ATTACH_ATTEMPTS):
+            try:
+                sock = bind_hub_socket(self.port)
+                try:
+                    self.token = write_hub_token(sock.getsockname()[1])
+                    self.server = HubListener(self, sock)
+                except BaseException:
+                    sock.close()
+                    raise
+                self.port = self.server.port
+                self.server.start()
+                return
+            except OSError:
+                pass
+            try:
+                self.client = HubClient(self, connect_to_hub(self.port, read_hub_token(self.port)))
+                self.client.start()
+                self._request = None
+                self._apply_schedule(sample_now=True)
+                return
+            except OSError:
+                # The owner may be exiting right now; try again to take its place.
+                time.sleep(0.05 * (attempt + 1))
+        print(f"Port {self.port} is used by another program; sampling without sharing.")
+
+    def _start_sampling(self):
+        if not self.sampler.is_alive():
+            self.sampler.start()
+        self._apply_schedule(sample_now=True)
+
+    def owner_lost(self, client):
+        """Called by the client thread when the owning process has gone away."""
+        with self._lock:
+            if self._stopped or client is not self.client:
+                return
+            self.client = None
+            self._serve_or_attach()
+            if self.client is None:
+                print("Sampling process exited; sampling here.")
+                self.open()
+                self._start_sampling()
+
+    def request_show(self):
+        """Passes a second launch's request to show the windows on to on_show_request."""
+        callback = self.on_show_request
+        if callback is not None:
+            callback()
+
+    def open(self):
+        """Creates the counter source, and the usage log if this process samples.
+
+        Views call this after their first paint. While attached to another process the
+        usage log stays with the owner, but the counter source is kept ready for taking over.
+        """
+        with self._lock:
+            if self.sampler.counter_source is None:
+                self.sampler.counter_source = create_counter_source()
+            if self.sampler.usage_log is None and self.client is None and self.record_usage:
+                try:
+                    from widgets.usage_log import UsageLog
+                    self.sampler.usage_log = UsageLog()
+                except Exception as e:
+                    print(f"Error opening usage log: {e}")
+
+    @property
+    def wakeups(self):
+        client = self.client
+        return client.wakeups if client is not None else self.sampler.wakeups
+
+    def attach(self, interval_ms: int = 1000) -> SampleReader:
+        """Returns a new, paused reader for a view."""
+        reader = SampleReader(self, interval_ms)
+        self.attach_reader(reader)
+        return reader
+
+    def attach_reader(self, reader):
+        with self._lock:
+            self.readers = self.readers + (reader,)
+            self._apply_schedule()
+
+    def detach(self, reader):
+        with self._lock:
+            self.readers = tuple(r for r in self.readers if r is not reader)
+            self._apply_schedule()
+
+    def update_schedule(self, sample_now: bool = False):
+        """Re-derives interval and interface after a reader changed its needs."""
+        with self._lock:
+            self._apply_schedule(sample_now)
+
+    def _schedule(self):
+        """Returns the interval to sample at (None to pause) and the interface to read."""
+        active = [reader for reader in self.readers if reader.active]
+        interfaces = {reader.interface for reader in active or self.readers if reader.interface}
+        if len(interfaces) == 1:
+            interface = interfaces.pop()
+        else:
+            interface = ALL_INTERFACES if interfaces else None
+        return (min(reader.interval_ms for reader in active) if active else None), interface
+
+    def _apply_schedule(self, sample_now: bool = False):
+        interval, interface = self._schedule()
+        if self.client is not None:
+            request = (interval or 0, interface)
+            # Repeating a request makes the owner sample right away.
+            if request != self._request or sample_now:
+                self._request = request
+                self.client.request(*request)
+            return
+        sampler = self.sampler
+        if interface != sampler.interface or (sample_now and interval):
+            sampler.set_interface(interface)  # Samples right away unless paused.
+        if interval is None:
+            if not self._paused:
+                self._paused = True
+                sampler.pause()
+            return
+        if interval != round(sampler.interval * 1000):
+            sampler.set_interval(interval)
+        if self._paused:
+            self._paused = False
+            sampler.resume()
+
+    def publish(self, sample):
+        """Hands a sample to every reader; runs on the sampler or client thread."""
+        for reader in self.readers:
+            reader.deliver(sample)
+
+    def sample_once(self):
+        """Takes a sample on the calling thread and publishes it."""
+        self.sampler.sample_once()
+
+    def encoded(self, sample) -> bytes:
+        """Returns the sample's frame, encoding each sample only once for all remote readers."""
+        cached, frame = self._encoded
+        if cached is not sample:
+            frame = encode_sample(sample)
+            self._encoded = (sample, frame)
+        return frame
+
+    def stop(self):
+        """Stops sampling and serving; readers in other processes then take over."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            if self.server is not None:
+                remove_hub_token(self.port, self.token)
+                self.server.stop()
+            if self.client is not None:
+                self.client.stop()
+            if self.sampler.is_alive():
+                # The thread closes the counter source and usage log on its way out.
+                self.sampler.stop()
+            else:
+                if self.sampler.counter_source is not None:
+                    self.sampler.counter_source.close()
+                if self.sampler.usage_log is not None:
+                    self.sampler.usage_log.close()
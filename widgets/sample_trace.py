@@ -0,0 +1,133 @@
+"""Recording of counter samples to a file, and a counter source that replays them.
+
+A trace file starts with TRACE_MAGIC and the offset from the monotonic clock to wall
+clock time when recording started, followed by one frame per sample in the format the
+sample hub sends over its socket. Files ending in .gz are compressed.
+"""
+import gzip
+import struct
+import time
+
+from widgets.counter_sources import ALL_INTERFACES, CounterSource
+from widgets.sample_hub import FRAME_LENGTH, decode_sample, encode_sample, select_interface
+
+TRACE_MAGIC = b"NSTR\x01"
+TRACE_HEAD = struct.Struct("=d")
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+class TraceWriter:
+    """Appends samples to a new trace file."""
+
+    def __init__(self, path: str):
+        self.file = _open(path, "wb")
+        self.file.write(TRACE_MAGIC + TRACE_HEAD.pack(time.time() - time.monotonic()))
+        self.count = 0
+
+    def write(self, sample):
+        self.file.write(encode_sample(sample))
+        self.count += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_trace(path: str):
+    """Returns (wall clock offset, [Sample]) from a trace file; a truncated last frame is ignored."""
+    with _open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(TRACE_MAGIC):
+        raise ValueError(f"{path} is not a sample trace")
+    (wall_offset,) = TRACE_HEAD.unpack_from(data, len(TRACE_MAGIC))
+    offset = len(TRACE_MAGIC) + TRACE_HEAD.size
+    samples = []
+    while offset + FRAME_LENGTH.size <= len(data):
+        (length,) = FRAME_LENGTH.unpack_from(data, offset)
+        offset += FRAME_LENGTH.size
+        if offset + length > len(data):
+            break
+        samples.append(decode_sample(data[offset:offset + length]))
+        offset += length
+    return wall_offset, samples
+
+
+class ReplayCounterSource(CounterSource):
+    """Serves the counters of a recorded trace in place of the live ones.
+
+    With a positive `speed`, trace time runs that many times faster than the monotonic
+    clock from the first read, and every read returns the newest sample that is due;
+    reads between two samples see the same sample again. With a speed of 0 every read
+    steps to the next sample, which replays a trace as fast as it is read. After the
+    last sample, reads keep returning it.
+
+    `clock()` is the timestamp of the sample served last; a NetworkSampler given it as
+    its clock stamps samples with trace time, so rates come out as they were recorded.
+    """
+
+    def __init__(self, samples, speed: float = 1.0, wall_offset: float = 0.0, real_clock=time.monotonic):
+        self.samples = samples
+        self.speed = speed
+        self.wall_offset = wall_offset
+        self.real_clock = real_clock
+        self.interface = samples[0].interface if samples else None  # The interface recorded first.
+        self.timestamp = samples[0].timestamp if samples else 0.0
+        self._index = -1
+        self._real_start = None
+
+    @classmethod
+    def open(cls, path: str, speed: float = 1.0) -> "ReplayCounterSource":
+        wall_offset, samples = read_trace(path)
+        return cls(samples, speed, wall_offset)
+
+    @property
+    def finished(self) -> bool:
+        return self._index >= len(self.samples) - 1
+
+    def clock(self) -> float:
+        return self.timestamp
+
+    def wall_time(self) -> float:
+        """Returns the wall clock time at which the sample served last was recorded."""
+        return self.timestamp + self.wall_offset
+
+    def _advance(self):
+        samples = self.samples
+        if not samples:
+            return None
+        index = self._index
+        if self.speed <= 0:
+            index = min(index + 1, len(samples) - 1)
+        else:
+            now = self.real_clock()
+            if self._real_start is None:
+                self._real_start = now
+            due = samples[0].timestamp + (now - self._real_start) * self.speed
+            index = max(index, 0)
+            while index + 1 < len(samples) and samples[index + 1].timestamp <= due:
+                index += 1
+        self._index = index
+        sample = samples[index]
+        self.timestamp = sample.timestamp
+        if sample.error:
+            raise OSError("Counters could not be read when this sample was recorded.")
+        return sample
+
+    def read(self, interface):
+        sample = self._advance()
+        if sample is None:
+            return None
+        selected = select_interface(sample, interface)
+        return selected.counters if selected is not None else None
+
+    def read_all(self):
+        from widgets.aggregate import to_counter_array
+        sample = self._advance()
+        if sample is None or not sample.counters:
+            return (), to_counter_array([]), to_counter_array([])
+        if sample.interface == ALL_INTERFACES:
+            return sample.counters
+        bytes_recv, bytes_sent = sample.counters
+        return (sample.interface,), to_counter_array([bytes_recv]), to_counter_array([bytes_sent])
@@ -0,0 +1,262 @@
+import threading
+import time
+from collections import namedtuple
+
+from widgets.counter_sources import ALL_INTERFACES
+from widgets.rates import RateCalculator
+
+# A single counter reading. `counters` is (bytes_recv, bytes_sent), or None when the
+# interface does not exist; `error` is set when the read itself failed. For the
+# all-interfaces pseudo interface, `counters` is (names, bytes_recv array, bytes_sent array).
+Sample = namedtuple("Sample", ["timestamp", "interface", "counters", "error"])
+
+# Seconds between usage log records. While a single interface is displayed every record
+# costs a read of all interfaces, which must stay off the per-sample path.
+USAGE_LOG_INTERVAL = 60.0
+
+
+class SampleRing:
+    """A fixed-size single-producer/single-consumer ring buffer.
+
+    The producer only ever advances `write_index` and the consumer only `read_index`.
+    Each index is a plain attribute store, which is atomic under the GIL, so neither
+    side needs a lock. When the consumer falls behind, the oldest pending sample is
+    overwritten and counted in `dropped`: the consumer only wants the newest one, so
+    after a stall it catches up in a single drain.
+    """
+
+    __slots__ = ("capacity", "slots", "write_index", "read_index", "dropped")
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.write_index = 0
+        self.read_index = 0
+        self.dropped = 0
+
+    def push(self, item) -> bool:
+        """Appends an item from the producer thread. Returns False if it overwrote the oldest pending one."""
+        write_index = self.write_index
+        # The slot being overwritten is never the one drain_latest() reads, which is
+        # always the newest published slot, so only read_index is left for the consumer.
+        full = write_index - self.read_index >= self.capacity
+        if full:
+            self.dropped += 1
+        self.slots[write_index % self.capacity] = item
+        # Publish the slot only after it has been filled.
+        self.write_index = write_index + 1
+        return not full
+
+    def drain_latest(self):
+        """Consumes every pending item and returns the newest one, or None if empty."""
+        write_index = self.write_index
+        if write_index == self.read_index:
+            return None
+        item = self.slots[(write_index - 1) % self.capacity]
+        self.read_index = write_index
+        return item
+
+    def __len__(self):
+        return min(self.write_index - self.read_index, self.capacity)
+
+
+class WakeupCounter:
+    """Counts wakeups and reports how many happened during the last full minute."""
+
+    __slots__ = ("window_start", "current", "last_minute")
+
+    def __init__(self):
+        self.window_start = time.monotonic()
+        self.current = 0
+        self.last_minute = 0
+
+    def tick(self):
+        """Records a single wakeup."""
+        now = time.monotonic()
+        if now - self.window_start >= 60:
+            self.last_minute = self._completed_window(now)
+            self.current = 0
+            self.window_start = now
+        self.current += 1
+
+    def _completed_window(self, now) -> int:
+        # Without a tick for a whole minute, the previous minute saw no wakeups.
+        return self.current if now - self.window_start < 120 else 0
+
+    def per_minute(self) -> int:
+        """Returns the wakeup count of the last completed one-minute window."""
+        now = time.monotonic()
+        if now - self.window_start >= 60:
+            return self._completed_window(now)
+        return self.last_minute
+
+
+class AdaptiveInterval:
+    """Backs the sampling interval off while traffic stays near zero.
+
+    Every `idle_ticks` consecutive idle samples double the interval up to `slow_ms`;
+    any sample above `idle_threshold` bytes/s snaps it back to `fast_ms`.
+    """
+
+    __slots__ = ("fast_ms", "slow_ms", "idle_threshold", "idle_ticks", "interval_ms", "idle_count")
+
+    def __init__(self, fast_ms: int = 1000, slow_ms: int = 8000, idle_threshold: float = 2048, idle_ticks: int = 5):
+        self.fast_ms = fast_ms
+        self.slow_ms = slow_ms
+        self.idle_threshold = idle_threshold
+        self.idle_ticks = idle_ticks
+        self.interval_ms = fast_ms
+        self.idle_count = 0
+
+    def reset(self, fast_ms: int = None):
+        """Returns to fast sampling, optionally with a new fast interval."""
+        if fast_ms is not None:
+            self.fast_ms = fast_ms
+        self.interval_ms = self.fast_ms
+        self.idle_count = 0
+
+    def update(self, download_speed: float, upload_speed: float) -> int:
+        """Feeds one sample and returns the interval to use for the next one."""
+        if download_speed + upload_speed >= self.idle_threshold:
+            self.reset()
+            return self.interval_ms
+
+        self.idle_count += 1
+        if self.idle_count >= self.idle_ticks:
+            self.idle_count = 0
+            self.interval_ms = min(self.interval_ms * 2, self.slow_ms)
+        return self.interval_ms
+
+
+class NetworkSampler(threading.Thread):
+    """Background thread that reads interface counters at a fixed rate.
+
+    Samples are timestamped with the monotonic clock and pushed into a SampleRing,
+    so a slow counter read never blocks the thread that renders them. While paused
+    the thread blocks without any timeout, so it causes no wakeups at all. A replayed
+    trace passes its own `clock`, which only stamps samples; scheduling stays monotonic.
+    """
+
+    def __init__(self, counter_source, interface=None, interval_ms: int = 1000, ring_capacity: int = 64,
+                 all_interfaces: str = ALL_INTERFACES, clock=time.monotonic):
+        super().__init__(name="NetworkSampler", daemon=True)
+        self.all_interfaces = all_interfaces
+        self.counter_source = counter_source
+        self.clock = clock
+        self.interface = interface
+        self.interval = interval_ms / 1000
+        self.ring = SampleRing(ring_capacity)
+        self.wakeups = WakeupCounter()
+        self.read_ns = 0  # Duration of the latest counter read.
+        # Optional UsageLog that receives the bytes transferred between samples.
+        self.usage_log = None
+        # Optional callable that receives every sample on this thread instead of the ring.
+        self.on_sample = None
+        self._usage_rates = RateCalculator(all_interfaces)
+        self._usage_due = 0.0  # Monotonic time of the next usage log record.
+        self._wake = threading.Event()
+        self._running = True
+        self._paused = False
+        self._sample_now = False
+
+    def set_interface(self, interface):
+        """Switches the sampled interface and takes a sample right away."""
+        self.interface = interface
+        self._sample_now = True
+        self._wake.set()
+
+    def set_interval(self, ms: int):
+        """Changes the sampling interval, measured from the previous sample."""
+        self.interval = ms / 1000
+        self._wake.set()
+
+    def pause(self):
+        """Stops sampling until resume() is called."""
+        self._paused = True
+        self._wake.set()
+
+    def resume(self):
+        """Restarts sampling with an immediate sample."""
+        self._paused = False
+        self._sample_now = True
+        self._wake.set()
+
+    def sample_once(self):
+        """Reads the current interface once and pushes the result into the ring (or on_sample)."""
+        interface = self.interface
+        if not interface:
+            return
+        read_start = time.perf_counter_ns()
+        try:
+            if interface == self.all_interfaces:
+                counters = self.counter_source.read_all()
+            else:
+                counters = self.counter_source.read(interface)
+            sample = Sample(self.clock(), interface, counters, False)
+        except Exception:
+            sample = Sample(self.clock(), interface, None, True)
+        self.read_ns = time.perf_counter_ns() - read_start
+        if self.on_sample is not None:
+            self.on_sample(sample)
+        else:
+            self.ring.push(sample)
+        if self.usage_log is not None and time.monotonic() >= self._usage_due:
+            self._record_usage(sample)
+
+    def _record_usage(self, sample=None):
+        """Appends the bytes all non-loopback interfaces transferred since the previous record.
+
+        The log always holds this one quantity, whichever interface is displayed. Records
+        are at most USAGE_LOG_INTERVAL apart, each stamped with the end of the window it
+        covers: a sample of all interfaces is used as is, otherwise the totals are read
+        separately, once per window. Without a sample (at exit) they are read right away.
+        The calculator is not reset on pause, so traffic while the widget was hidden is
+        logged with the first record after it is shown again.
+        """
+        self._usage_due = time.monotonic() + USAGE_LOG_INTERVAL
+        try:
+            if sample is None or sample.interface != self.all_interfaces or not sample.counters:
+                sample = Sample(self.clock(), self.all_interfaces, self.counter_source.read_all(), False)
+        except Exception:
+            return
+        speeds = self._usage_rates.update(sample)
+        if speeds is None:
+            return
+        elapsed = self._usage_rates.elapsed
+        bytes_recv, bytes_sent = round(speeds[0] * elapsed), round(speeds[1] * elapsed)
+        if bytes_recv or bytes_sent:
+            try:
+                self.usage_log.append(time.time(), bytes_recv, bytes_sent)
+            except Exception as e:
+                print(f"Error recording usage: {e}")
+
+    def run(self):
+        last_sample = None
+        while self._running:
+            if self._paused:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            now = time.monotonic()
+            if self._sample_now or last_sample is None or now - last_sample >= self.interval:
+                self._sample_now = False
+                self.sample_once()
+                last_sample = now
+
+            # Sleep until the next sample is due, or until a setting changes.
+            if self._wake.wait(max(last_sample + self.interval - time.monotonic(), 0)):
+                self._wake.clear()
+            self.wakeups.tick()
+        if self.usage_log is not None and self.counter_source is not None:
+            # Logs the partial window since the last record.
+            self._record_usage()
+        if self.counter_source is not None:
+            self.counter_source.close()
+        if self.usage_log is not None:
+            self.usage_log.close()
+
+    def stop(self):
+        """Asks the thread to exit after its current sample."""
+        self._running = False
+        self._wake.set()
@@ -0,0 +1,100 @@
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QPainter, QPixmap, QColor
+from PyQt6.QtCore import Qt
+
+DOWNLOAD_COLOR = QColor(90, 180, 255)
+UPLOAD_COLOR = QColor(255, 170, 60)
+
+
+class SparklineWidget(QWidget):
+    """Draws the whole download/upload history as a sparkline, one column per group of samples.
+
+    The history is squeezed into the widget's width: each column shows the highest
+    speeds among `per_column` consecutive samples, so a short burst stays visible
+    however long ago it was. The graph is kept in a cached QPixmap at the screen's
+    pixel density. A new sample repaints only the newest column, a filled column
+    scrolls the pixmap by one column, and the whole graph is redrawn only when the
+    vertical scale has to change.
+    """
+
+    def __init__(self, history, parent=None, width: int = 90, height: int = 18):
+        super().__init__(parent)
+        self.history = history
+        self.setFixedSize(width, height)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.per_column = max(-(-history.length // width), 1)
+        self.pixmap = QPixmap()
+        self.column = (0.0, 0.0)  # Peak speeds of the newest, still filling column.
+        self.scale = 1.0
+        self.scale_age = 0  # Columns added since the scale was last computed.
+        self.redraw()
+
+    def _draw_column(self, painter, x, download_speed, upload_speed):
+        height = self.height()
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.fillRect(x, 0, 1, height, Qt.GlobalColor.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        download_height = round(download_speed / self.scale * (height - 1))
+        if download_height > 0:
+            painter.fillRect(x, height - download_height, 1, download_height, DOWNLOAD_COLOR)
+        upload_y = height - 1 - round(upload_speed / self.scale * (height - 1))
+        painter.fillRect(x, upload_y, 1, 1, UPLOAD_COLOR)
+
+    def _render(self):
+        width = self.width()
+        dpr = self.devicePixelRatioF()
+        if self.pixmap.devicePixelRatio() != dpr or self.pixmap.isNull():
+            self.pixmap = QPixmap(round(width * dpr), round(self.height() * dpr))
+            self.pixmap.setDevicePixelRatio(dpr)
+        downloads, uploads = self.history.column_peaks(width, self.per_column)
+        self.scale = max(max(downloads, default=0.0) * 1.2, max(uploads, default=0.0) * 1.2, 1.0)
+        self.scale_age = 0
+        self.column = (downloads[-1], uploads[-1]) if downloads else (0.0, 0.0)
+        self.pixmap.fill(Qt.GlobalColor.transparent)
+        offset = width - len(downloads)
+        painter = QPainter(self.pixmap)
+        for x, (download_speed, upload_speed) in enumerate(zip(downloads, uploads), start=offset):
+            self._draw_column(painter, x, download_speed, upload_speed)
+        painter.end()
+
+    def redraw(self):
+        """Rescales to the whole history and repaints every column."""
+        self._render()
+        self.update()
+
+    def add_sample(self, download_speed: float, upload_speed: float):
+        """Adds the sample just appended to the history to the graph."""
+        if not self.isVisible():
+            return
+        new_column = (self.history.count - 1) % self.per_column == 0
+        if new_column:
+            self.column = (download_speed, upload_speed)
+            self.scale_age += 1
+        else:
+            self.column = (max(self.column[0], download_speed), max(self.column[1], upload_speed))
+        dpr = self.pixmap.devicePixelRatio()
+        # A new peak, the peak the scale was based on may have scrolled out of view, or a
+        # fractional pixel ratio that a whole-pixel scroll can't follow.
+        if (max(self.column) > self.scale or self.scale_age >= self.width()
+                or (new_column and not dpr.is_integer())):
+            self.redraw()
+            return
+
+        if new_column:
+            self.pixmap.scroll(-int(dpr), 0, self.pixmap.rect())
+        painter = QPainter(self.pixmap)
+        self._draw_column(painter, self.width() - 1, *self.column)
+        painter.end()
+        self.update()
+
+    def showEvent(self, event):
+        # Columns are not painted while hidden, so catch up from the history.
+        self.redraw()
+        super().showEvent(event)
+
+    def paintEvent(self, event):
+        if self.pixmap.devicePixelRatio() != self.devicePixelRatioF():
+            self._render()  # Moved to a screen with another pixel density.
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self.pixmap)
+        painter.end()
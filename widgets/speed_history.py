@@ -0,0 +1,68 @@
+from array import array
+
+# One hour of history at the default 1 second update interval.
+DEFAULT_HISTORY_LENGTH = 3600
+
+
+class SpeedHistory:
+    """A fixed-memory ring buffer of download/upload speeds in bytes per second.
+
+    Both series live in preallocated array('d') buffers, so memory stays constant no
+    matter how long the widget runs.
+    """
+
+    __slots__ = ("length", "download", "upload", "count")
+
+    def __init__(self, length: int = DEFAULT_HISTORY_LENGTH):
+        self.length = length
+        self.download = array('d', bytes(8 * length))
+        self.upload = array('d', bytes(8 * length))
+        self.count = 0  # Total number of samples ever appended.
+
+    def append(self, download_speed: float, upload_speed: float):
+        """Stores a sample, overwriting the oldest one once the buffer is full."""
+        index = self.count % self.length
+        self.download[index] = download_speed
+        self.upload[index] = upload_speed
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.length)
+
+    def latest(self, n: int):
+        """Returns the newest n samples, oldest first, as two lists."""
+        n = min(n, len(self))
+        start = self.count - n
+        indices = [i % self.length for i in range(start, self.count)]
+        return [self.download[i] for i in indices], [self.upload[i] for i in indices]
+
+    def peak(self, n: int) -> float:
+        """Returns the highest download or upload speed among the newest n samples."""
+        downloads, uploads = self.latest(n)
+        return max(max(downloads, default=0.0), max(uploads, default=0.0))
+
+    def column_peaks(self, columns: int, per_column: int):
+        """Returns the highest speeds of the newest `columns` groups of per_column samples.
+
+        Groups are aligned on the total sample count, so only the newest one is still
+        filling; the oldest may be cut short where the buffer has already overwritten
+        samples. Two lists, oldest group first.
+        """
+        end = self.count
+        if end == 0:
+            return [], []
+        start = max((end - 1) // per_column * per_column - (columns - 1) * per_column, end - len(self), 0)
+        downloads, uploads = self.latest(end - start)
+        download_peaks, upload_peaks = [], []
+        group = start - start % per_column
+        while group < end:
+            low = max(group, start) - start
+            high = min(group + per_column, end) - start
+            download_peaks.append(max(downloads[low:high]))
+            upload_peaks.append(max(uploads[low:high]))
+            group += per_column
+        return download_peaks, upload_peaks
+
+    def clear(self):
+        """Forgets all samples without releasing the buffers."""
+        self.count = 0
@@ -0,0 +1,196 @@
+import math
+from array import array
+from collections import deque
+
+# Sketch buckets are log-spaced with 32 sub-buckets per power of two of bytes per second,
+# and report their midpoint, so any percentile is within 1.6% of a value in the window.
+# Speeds below 64 B/s get one bucket per byte.
+SUB_BITS = 5
+SUB_BUCKETS = 1 << SUB_BITS
+EXACT_LIMIT = 2 * SUB_BUCKETS
+
+# Rolling windows shown in the tooltip, in seconds, and their labels.
+DEFAULT_STATS_WINDOWS = (60, 3600, 86400)
+WINDOW_LABELS = {60: "1 min", 3600: "1 h", 86400: "24 h"}
+# Each window is kept as this many slices; the oldest slice is dropped as a whole.
+WINDOW_SLICES = 6
+
+
+def _bucket_index(value: int) -> int:
+    if value < EXACT_LIMIT:
+        return value
+    shift = value.bit_length() - SUB_BITS - 1
+    return SUB_BUCKETS * shift + (value >> shift)
+
+
+def _bucket_value(index: int) -> float:
+    """Returns the midpoint of a bucket, in bytes per second."""
+    if index < EXACT_LIMIT:
+        return float(index)
+    shift = index // SUB_BUCKETS - 1
+    return ((index - SUB_BUCKETS * shift) << shift) + (1 << shift) / 2
+
+
+class SpeedSketch:
+    """A mergeable log-bucket histogram of speeds.
+
+    Counts are 4-byte slots of an array('I') that grows up to the highest bucket hit,
+    about 2.5 KB at 1 GB/s, instead of a dict entry and an int object per bucket.
+    """
+
+    __slots__ = ("counts", "count", "max")
+
+    def __init__(self):
+        self.counts = array('I')
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, speed: float):
+        self.record(_bucket_index(int(speed)) if speed > 0 else 0, speed)
+
+    def record(self, index: int, speed: float):
+        """Counts a speed whose bucket index is already known."""
+        counts = self.counts
+        if index >= len(counts):
+            counts.frombytes(bytes(4 * (index + 1 - len(counts))))
+        counts[index] += 1
+        self.count += 1
+        if speed > self.max:
+            self.max = speed
+
+    def merge(self, other: "SpeedSketch"):
+        counts = self.counts
+        if len(other.counts) > len(counts):
+            counts.frombytes(bytes(4 * (len(other.counts) - len(counts))))
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.count += other.count
+        if other.max > self.max:
+            self.max = other.max
+
+    def percentile(self, fraction: float) -> float:
+        """Returns the estimated speed below which the given fraction of speeds lies."""
+        return self.percentiles(fraction)[0]
+
+    def percentiles(self, *fractions: float):
+        """Returns the estimates for several ascending fractions in one pass over the buckets."""
+        if not self.count:
+            return [0.0] * len(fractions)
+        ranks = [max(math.ceil(self.count * fraction), 1) for fraction in fractions]
+        estimates = []
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if not count:
+                continue
+            seen += count
+            while len(estimates) < len(ranks) and seen >= ranks[len(estimates)]:
+                estimates.append(min(_bucket_value(index), self.max))
+            if len(estimates) == len(ranks):
+                break
+        return estimates + [self.max] * (len(ranks) - len(estimates))
+
+
+class SpeedStats:
+    """Rolling download and upload percentiles over several windows, in bounded memory.
+
+    Each window is kept as WINDOW_SLICES slices of SpeedSketch pairs. Adding a pair of
+    speeds touches only the newest slice of each window; a whole slice is dropped once
+    it has left its window, so a window covers between its length minus one slice and
+    its full length.
+    """
+
+    def __init__(self, windows=DEFAULT_STATS_WINDOWS, slices: int = WINDOW_SLICES):
+        self.windows = tuple(windows)
+        self.slices = slices
+        self._slice_lengths = [window / slices for window in self.windows]
+        self._slices = [deque() for _ in self.windows]  # (slice number, download, upload), oldest first.
+
+    def add(self, timestamp: float, download_speed: float, upload_speed: float):
+        download_index = _bucket_index(int(download_speed)) if download_speed > 0 else 0
+        upload_index = _bucket_index(int(upload_speed)) if upload_speed > 0 else 0
+        for slice_length, slices in zip(self._slice_lengths, self._slices):
+            number = int(timestamp // slice_length)
+            # A timestamp older than the newest slice is counted in it.
+            if not slices or number > slices[-1][0]:
+                self._expire(slices, number)
+                slices.append((number, SpeedSketch(), SpeedSketch()))
+            _, download, upload = slices[-1]
+            download.record(download_index, download_speed)
+            upload.record(upload_index, upload_speed)
+
+    def _expire(self, slices, number: int):
+        while slices and slices[0][0] <= number - self.slices:
+            slices.popleft()
+
+    def summary(self, timestamp: float):
+        """Returns (window, download sketch, upload sketch) for each window, shortest first."""
+        result = []
+        for window, slice_length, slices in zip(self.windows, self._slice_lengths, self._slices):
+            self._expire(slices, int(timestamp // slice_length))
+            download, upload = SpeedSketch(), SpeedSketch()
+            for _, download_slice, upload_slice in slices:
+                download.merge(download_slice)
+                upload.merge(upload_slice)
+            result.append((window, download, upload))
+        return result
+
+    def clear(self):
+        for slices in self._slices:
+            slices.clear()
+
+
+def parse_windows(text: str):
+    """Parses a comma-separated list of window lengths in seconds; invalid entries are skipped."""
+    windows = []
+    for part in text.split(","):
+        try:
+            window = int(part)
+        except ValueError:
+            continue
+        if window > 0 and window not in windows:
+            windows.append(window)
+    return tuple(sorted(windows))
+
+
+def window_label(window: int) -> str:
+    if window in WINDOW_LABELS:
+        return WINDOW_LABELS[window]
+    if window % 3600 == 0:
+        return f"{window // 3600} h"
+    if window % 60 == 0:
+        return f"{window // 60} min"
+    return f"{window} s"
+
+
+class SpeedSmoother:
+    """Exponentially weighted moving average of download and upload speeds.
+
+    The weight of a new speed depends on the time since the previous one, so the
+    smoothing stays the same when the update interval changes: after `time_constant`
+    seconds an old speed has faded to 1/e.
+    """
+
+    __slots__ = ("time_constant", "timestamp", "download", "upload")
+
+    def __init__(self, time_constant: float):
+        self.time_constant = time_constant
+        self.reset()
+
+    def reset(self):
+        self.timestamp = None
+        self.download = None
+        self.upload = None
+
+    def update(self, timestamp: float, download_speed: float, upload_speed: float):
+        """Feeds a pair of speeds; returns the smoothed (download, upload)."""
+        if self.timestamp is None:
+            self.timestamp, self.download, self.upload = timestamp, download_speed, upload_speed
+            return self.download, self.upload
+        if timestamp <= self.timestamp:
+            return self.download, self.upload
+        weight = 1.0 - math.exp((self.timestamp - timestamp) / self.time_constant)
+        self.download += weight * (download_speed - self.download)
+        self.upload += weight * (upload_speed - self.upload)
+        self.timestamp = timestamp
+        return self.download, self.upload
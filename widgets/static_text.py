@@ -0,0 +1,153 @@
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QColor, QFontMetricsF, QGlyphRun, QPainter, QTextLayout
+from PyQt6.QtCore import Qt, QEvent, QPointF, QSize
+
+DIGITS = "0123456789۰۱۲۳۴۵۶۷۸۹"
+TEXT_COLOR = QColor(Qt.GlobalColor.white)
+# Distinct non-digit runs are few (units, arrows, weekday names); this only guards
+# against unbounded growth if arbitrary text is shown.
+MAX_CACHED_RUNS = 256
+
+
+def _runs(line: str):
+    """Splits a line into runs of digits and runs of anything else."""
+    start = 0
+    for i in range(1, len(line) + 1):
+        if i == len(line) or (line[i] in DIGITS) != (line[start] in DIGITS):
+            yield line[start:i]
+            start = i
+
+
+class StaticTextLabel(QWidget):
+    """Paints one or more lines of text with cached glyph layouts and tabular digits.
+
+    A replacement for QLabel on text that changes every tick. Each run of text is shaped
+    once and its glyphs are reused; every digit gets a slot as wide as the widest digit
+    of the font, so changing numbers never move the text around (the Persian digits of
+    Vazirmatn FD are proportional). A line is painted as one glyph run per font. setText
+    with unchanged text does nothing, and a new text only repaints: the size hint
+    depends on the text only through `size_template`, so the layout is left alone
+    unless the text outgrows the template.
+    """
+
+    def __init__(self, text: str = "", alignment=Qt.AlignmentFlag.AlignLeft, size_template: str = "",
+                 parent=None):
+        super().__init__(parent)
+        self.alignment = alignment
+        self.size_template = size_template
+        self._text = None
+        self._glyphs = {}  # run -> ([(QRawFont, glyph indexes, positions)], advance); reset on font change
+        self._lines = []  # [(width, [QGlyphRun])] for the current text
+        self._digit_width = 0.0
+        self._line_height = 0.0
+        self._template_width = 0.0
+        self._hint = QSize()
+        self._update_metrics()
+        self.setText(text)
+
+    def text(self) -> str:
+        return self._text
+
+    def setText(self, text: str):
+        if text == self._text:
+            return
+        self._text = text
+        self._lines = [self._layout_line(line) for line in text.split("\n")]
+        hint = self._size_for(self._lines)
+        if hint != self._hint:
+            self._hint = hint
+            self.updateGeometry()
+        self.update()
+
+    def _update_metrics(self):
+        metrics = QFontMetricsF(self.font())
+        self._digit_width = max(metrics.horizontalAdvance(digit) for digit in DIGITS)
+        self._line_height = metrics.height()
+        self._glyphs.clear()
+        self._template_width = max((self._layout_line(line)[0] for line in self.size_template.split("\n")),
+                                   default=0.0) if self.size_template else 0.0
+
+    def _glyph(self, run: str):
+        glyph = self._glyphs.get(run)
+        if glyph is None:
+            if len(self._glyphs) >= MAX_CACHED_RUNS:
+                self._glyphs.clear()
+            layout = QTextLayout(run, self.font())
+            layout.beginLayout()
+            line = layout.createLine()
+            layout.endLayout()
+            # Characters missing from the font come from fallback fonts, one glyph run each.
+            pieces = [(glyph_run.rawFont(), glyph_run.glyphIndexes(), glyph_run.positions())
+                      for glyph_run in layout.glyphRuns()]
+            glyph = self._glyphs[run] = (pieces, line.horizontalAdvance())
+        return glyph
+
+    def _layout_line(self, line: str):
+        fonts = []  # [(QRawFont, glyph indexes, positions)], one entry per font used on the line
+        x = 0.0
+
+        def place(pieces, offset):
+            for raw_font, indexes, positions in pieces:
+                for entry in fonts:
+                    if entry[0] == raw_font:
+                        break
+                else:
+                    entry = (raw_font, [], [])
+                    fonts.append(entry)
+                entry[1].extend(indexes)
+                entry[2].extend(QPointF(position.x() + offset, position.y()) for position in positions)
+
+        for run in _runs(line):
+            if run[0] in DIGITS:
+                for digit in run:
+                    pieces, advance = self._glyph(digit)
+                    # Centered in a fixed-width slot.
+                    place(pieces, x + (self._digit_width - advance) / 2)
+                    x += self._digit_width
+            else:
+                pieces, advance = self._glyph(run)
+                place(pieces, x)
+                x += advance
+        glyph_runs = []
+        for raw_font, indexes, positions in fonts:
+            glyph_run = QGlyphRun()
+            glyph_run.setRawFont(raw_font)
+            glyph_run.setGlyphIndexes(indexes)
+            glyph_run.setPositions(positions)
+            glyph_runs.append(glyph_run)
+        return x, glyph_runs
+
+    def _size_for(self, lines):
+        width = max(max((line_width for line_width, _ in lines), default=0.0), self._template_width)
+        height = self._line_height * max(len(lines), self.size_template.count("\n") + 1)
+        return QSize(int(width + 0.999), int(height + 0.999))
+
+    def sizeHint(self):
+        return self._hint
+
+    def minimumSizeHint(self):
+        return self._hint
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.Type.FontChange:
+            self._update_metrics()
+            text, self._text, self._hint = self._text, None, QSize()
+            self.setText(text)
+        super().changeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setPen(TEXT_COLOR)
+        # The block of lines is centered vertically; each line is aligned horizontally.
+        y = (self.height() - self._line_height * len(self._lines)) / 2
+        for line_width, glyph_runs in self._lines:
+            if self.alignment & Qt.AlignmentFlag.AlignHCenter:
+                x0 = (self.width() - line_width) / 2
+            elif self.alignment & Qt.AlignmentFlag.AlignRight:
+                x0 = self.width() - line_width
+            else:
+                x0 = 0.0
+            for glyph_run in glyph_runs:
+                painter.drawGlyphRun(QPointF(x0, y), glyph_run)
+            y += self._line_height
+        painter.end()
@@ -0,0 +1,284 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from datetime import date, timedelta
+
+from widgets.config_store import atomic_write, default_config_path
+from widgets.jalali_index import get_index
+
+USAGE_LOG_NAME = "usage.log"
+ROLLUPS_NAME = "usage_rollups.json"
+MAGIC = b"NSUL"
+VERSION = 1
+HEADER = struct.Struct("=4sIQQ")  # magic, version, sequence number of the first record, record count
+COUNT_OFFSET = 16
+COUNT = struct.Struct("=Q")
+RECORD = struct.Struct("=dQQ")  # epoch seconds, bytes received and sent since the previous record
+# The file grows by this many records at a time, so appends rarely touch the file size.
+GROW_RECORDS = 65536
+RAW_RETENTION_DAYS = 7
+HOURLY_RETENTION_DAYS = 90
+ROLLUP_SAVE_INTERVAL = 300.0
+COMPACT_INTERVAL = 86400.0
+
+
+def default_usage_dir() -> str:
+    """Returns the per-user directory that holds the usage log, next to the config file."""
+    return os.path.dirname(default_config_path())
+
+
+def format_bytes(count: float) -> str:
+    """Formats a byte count as a human-readable string (KB, MB, GB)."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024:
+            return f"{count:.1f} {unit}" if unit != "B" else f"{count:.0f} B"
+        count /= 1024
+    return f"{count:.2f} TB"
+
+
+def _add(buckets: dict, key: int, recv: int, sent: int):
+    bucket = buckets.get(key)
+    if bucket is None:
+        buckets[key] = [recv, sent]
+    else:
+        bucket[0] += recv
+        bucket[1] += sent
+
+
+class UsageLog:
+    """Append-only traffic log with incrementally maintained hourly, daily and monthly totals.
+
+    Every record is a fixed-size (timestamp, bytes received, bytes sent) entry in a
+    memory-mapped file, so an append is a memory write. Each append is also added to
+    hour, local-day and Jalali-month buckets, which is what queries read: their cost
+    depends on the number of buckets asked for, never on the size of the log.
+
+    The buckets are saved to a JSON file every few minutes together with the sequence
+    number of the last record they include; on open, only records after it are replayed.
+    Raw records older than `raw_retention_days` are compacted away once a day, after the
+    buckets covering them have been saved.
+    """
+
+    def __init__(self, directory: str = None, raw_retention_days: int = RAW_RETENTION_DAYS,
+                 hourly_retention_days: int = HOURLY_RETENTION_DAYS):
+        directory = directory or default_usage_dir()
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, USAGE_LOG_NAME)
+        self.rollups_path = os.path.join(directory, ROLLUPS_NAME)
+        self.raw_retention = raw_retention_days * 86400
+        self.hourly_retention = hourly_retention_days * 86400
+        self.hours = {}  # epoch hour -> [bytes received, bytes sent]
+        self.days = {}  # Gregorian ordinal of the local date -> [received, sent]
+        self.months = {}  # Jalali year * 100 + month -> [received, sent]
+        self.rolled_up = 0  # Sequence number just past the last record in the buckets.
+        self._lock = threading.Lock()
+        # Bounds of the local day the last record fell in, to avoid localtime() per append.
+        self._day_start = self._day_end = 0.0
+        self._day_key = self._month_key = None
+        self._next_save = 0.0
+        self._next_compaction = 0.0
+        self.fd = None
+        self.map = None
+        self._open()
+        self._load_rollups()
+        self._catch_up()
+
+    # --- raw log ---
+
+    def _open(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        if os.fstat(self.fd).st_size < HEADER.size:
+            os.write(self.fd, HEADER.pack(MAGIC, VERSION, 0, 0))
+            os.ftruncate(self.fd, HEADER.size + GROW_RECORDS * RECORD.size)
+        self.map = mmap.mmap(self.fd, 0)
+        magic, version, self.first_sequence, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            os.close(self.fd)
+            self.map = self.fd = None
+            raise ValueError(f"{self.path} is not a version {VERSION} usage log")
+        self.count = min(count, self.capacity)
+
+    @property
+    def capacity(self) -> int:
+        return (len(self.map) - HEADER.size) // RECORD.size
+
+    def _grow(self):
+        size = len(self.map) + GROW_RECORDS * RECORD.size
+        # The mapping has to be closed before resizing the file on Windows.
+        self.map.close()
+        os.ftruncate(self.fd, size)
+        self.map = mmap.mmap(self.fd, 0)
+
+    def _timestamp_at(self, index: int) -> float:
+        return RECORD.unpack_from(self.map, HEADER.size + index * RECORD.size)[0]
+
+    def records(self, start: int = 0):
+        """Yields (timestamp, received, sent) for the raw records from index `start`."""
+        with self._lock:
+            view = self.map[HEADER.size + start * RECORD.size:HEADER.size + self.count * RECORD.size]
+        yield from RECORD.iter_unpack(view)
+
+    def append(self, timestamp: float, bytes_recv: int, bytes_sent: int):
+        """Records traffic transferred up to `timestamp` (epoch seconds)."""
+        with self._lock:
+            if self.count == self.capacity:
+                self._grow()
+            RECORD.pack_into(self.map, HEADER.size + self.count * RECORD.size, timestamp, bytes_recv, bytes_sent)
+            # The record is written before the count, so a crash never exposes a partial one.
+            self.count += 1
+            COUNT.pack_into(self.map, COUNT_OFFSET, self.count)
+            self._roll_up(timestamp, bytes_recv, bytes_sent)
+            self.rolled_up = self.first_sequence + self.count
+            if timestamp >= self._next_compaction:
+                self._compact(timestamp)
+            elif timestamp >= self._next_save:
+                self._save_rollups(timestamp)
+
+    # --- rollups ---
+
+    def _enter_day(self, timestamp: float):
+        local = time.localtime(timestamp)
+        day = date(local.tm_year, local.tm_mon, local.tm_mday)
+        following = day + timedelta(days=1)
+        self._day_start = time.mktime((day.year, day.month, day.day, 0, 0, 0, 0, 0, -1))
+        self._day_end = time.mktime((following.year, following.month, following.day, 0, 0, 0, 0, 0, -1))
+        self._day_key = day.toordinal()
+        year, month, _ = get_index().from_ordinal(self._day_key)
+        self._month_key = year * 100 + month
+
+    def _roll_up(self, timestamp: float, bytes_recv: int, bytes_sent: int):
+        _add(self.hours, int(timestamp // 3600), bytes_recv, bytes_sent)
+        if not self._day_start <= timestamp < self._day_end:
+            self._enter_day(timestamp)
+        _add(self.days, self._day_key, bytes_recv, bytes_sent)
+        _add(self.months, self._month_key, bytes_recv, bytes_sent)
+
+    def _catch_up(self):
+        """Adds the records written after the last saved rollup to the buckets."""
+        start = max(self.rolled_up - self.first_sequence, 0)
+        for timestamp, bytes_recv, bytes_sent in self.records(start):
+            self._roll_up(timestamp, bytes_recv, bytes_sent)
+        self.rolled_up = self.first_sequence + self.count
+
+    def _load_rollups(self):
+        if not os.path.exists(self.rollups_path):
+            return
+        try:
+            with open(self.rollups_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.rolled_up = data["sequence"]
+            for name in ("hours", "days", "months"):
+                setattr(self, name, {int(key): value for key, value in data[name].items()})
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading usage rollups: {e}")
+            self.hours, self.days, self.months, self.rolled_up = {}, {}, {}, 0
+
+    def _save_rollups(self, now: float):
+        data = {"sequence": self.rolled_up, "hours": self.hours, "days": self.days, "months": self.months}
+        try:
+            atomic_write(self.rollups_path, json.dumps(data, separators=(",", ":")))
+        except OSError as e:
+            print(f"Error saving usage rollups: {e}")
+        self._next_save = now + ROLLUP_SAVE_INTERVAL
+
+    # --- compaction ---
+
+    def _first_index_after(self, timestamp: float) -> int:
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamp_at(middle) < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _compact(self, now: float):
+        """Drops raw records and hourly buckets past their retention."""
+        self._next_compaction = now + COMPACT_INTERVAL
+        oldest_hour = int((now - self.hourly_retention) // 3600)
+        for hour in [hour for hour in self.hours if hour < oldest_hour]:
+            del self.hours[hour]
+        # The dropped records must be covered by saved buckets before they disappear.
+        self._save_rollups(now)
+
+        dropped = self._first_index_after(now - self.raw_retention)
+        if dropped == 0:
+            return
+        kept = self.map[HEADER.size + dropped * RECORD.size:HEADER.size + self.count * RECORD.size]
+        first_sequence = self.first_sequence + dropped
+        header = HEADER.pack(MAGIC, VERSION, first_sequence, len(kept) // RECORD.size)
+        padding = bytes(GROW_RECORDS * RECORD.size)
+        # Rewritten through a temp file and a rename, like the config, so a crash leaves
+        # either the old log or the new one.
+        atomic_path = self.path + ".compact"
+        with open(atomic_path, "wb") as f:
+            f.write(header)
+            f.write(kept)
+            f.write(padding)
+            f.flush()
+            os.fsync(f.fileno())
+        self.map.close()
+        os.close(self.fd)
+        os.replace(atomic_path, self.path)
+        self._open()
+
+    # --- queries ---
+
+    def day(self, ordinal: int):
+        """Returns (received, sent) for a local date given as a Gregorian ordinal."""
+        with self._lock:
+            return tuple(self.days.get(ordinal, (0, 0)))
+
+    def month(self, year: int, month: int):
+        """Returns (received, sent) for a Jalali month."""
+        with self._lock:
+            return tuple(self.months.get(year * 100 + month, (0, 0)))
+
+    def recent_days(self, count: int, today: int = None):
+        """Returns [(ordinal, received, sent)] for the last `count` days, oldest first."""
+        today = today or date.today().toordinal()
+        with self._lock:
+            return [(ordinal, *self.days.get(ordinal, (0, 0)))
+                    for ordinal in range(today - count + 1, today + 1)]
+
+    def recent_hours(self, count: int, now: float = None):
+        """Returns [(epoch hour start, received, sent)] for the last `count` hours, oldest first."""
+        current = int((now or time.time()) // 3600)
+        with self._lock:
+            return [(hour * 3600, *self.hours.get(hour, (0, 0)))
+                    for hour in range(current - count + 1, current + 1)]
+
+    def recent_months(self, count: int, today: int = None):
+        """Returns [(year, month, received, sent)] for the last `count` Jalali months, oldest first."""
+        year, month, _ = get_index().from_ordinal(today or date.today().toordinal())
+        keys = []
+        for _ in range(count):
+            keys.append((year, month))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        with self._lock:
+            return [(y, m, *self.months.get(y * 100 + m, (0, 0))) for y, m in reversed(keys)]
+
+    @staticmethod
+    def total(rows):
+        """Sums the received and sent columns of rows returned by the recent_* queries."""
+        return sum(row[-2] for row in rows), sum(row[-1] for row in rows)
+
+    def flush(self):
+        """Saves the buckets now."""
+        with self._lock:
+            self._save_rollups(time.time())
+
+    def close(self):
+        if self.map is not None:
+            if self.count or self.rolled_up:
+                self.flush()
+            self.map.close()
+            self.map = None
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None